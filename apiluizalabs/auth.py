@@ -8,6 +8,8 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 
+from apiluizalabs.utils.cache import TokenCache
+
 load_dotenv()
 
 # Configurações do JWT
@@ -17,6 +19,11 @@ ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# Tokens ja verificados, validos ate o exp (0 desabilita)
+token_cache = TokenCache(
+    capacity=int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000")), name="tokens"
+)
+
 # TODO: Em PRD, USAR SENHA COM HASH + SALT (para maior seguranca)
 fake_users_db = {
     "admin": {
@@ -49,13 +56,17 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
         detail="Não autorizado",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
+    # Token ja verificado anteriormente (e ainda dentro do exp)
+    username = token_cache.get(token)
+    if username is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            username: str = payload.get("sub")
+            if username is None:
+                raise credentials_exception
+        except JWTError:
             raise credentials_exception
-    except JWTError:
-        raise credentials_exception
+        token_cache.put(token, username, payload.get("exp"))
     user = fake_users_db.get(username)
     if user is None:
         raise credentials_exception
@@ -1,8 +1,11 @@
+import math
 import os
+from contextlib import asynccontextmanager
 from datetime import timedelta
 
 from dotenv import load_dotenv
 from fastapi import Depends, FastAPI, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.openapi.docs import get_swagger_ui_html
 from fastapi.openapi.utils import get_openapi
 from fastapi.security import OAuth2PasswordRequestForm
@@ -12,7 +15,18 @@ from apiluizalabs.auth import (
     authenticate_user,
     create_access_token,
 )
-from apiluizalabs.routes import clients, favorites, products
+from apiluizalabs.models import client_index, mem_clients
+from apiluizalabs.repositories.client_repository import PreconditionFailed
+from apiluizalabs.repositories.product_repository import ProductsUnavailable
+from apiluizalabs.routes import catalog, clients, debug, favorites, products
+from apiluizalabs.services.catalog_service import catalog_sync
+from apiluizalabs.services.product_service import product_refresher
+from apiluizalabs.utils import metrics, persistence
+from apiluizalabs.utils.cache import cache_sweeper
+from apiluizalabs.utils.concurrency import shutdown_executor
+from apiluizalabs.utils.etag import make_etag
+from apiluizalabs.utils.http_client import close_http_client
+from apiluizalabs.utils.profiling import ProfilingMiddleware, profile_store
 
 env_path = os.path.join(os.path.dirname(__file__), "..", ".env")
 load_dotenv(env_path)
@@ -21,6 +35,32 @@ load_dotenv(env_path)
 PRODUCTS_SOURCE = os.getenv("PRODUCTS_SOURCE", "api")
 PRODUCTS_API_URL = os.getenv("PRODUCTS_API_URL", None)
 PRODUCTS_API_AUTHORIZATION = os.getenv("PRODUCTS_API_AUTHORIZATION", None)
+DEBUG_ROUTES_ENABLED = os.getenv("DEBUG_ROUTES_ENABLED", "false").lower() == "true"
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() == "true"
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Recupera os clientes do snapshot + journal (PERSISTENCE_DIR)
+    if persistence.engine is not None:
+        persistence.engine.start(mem_clients)
+        client_index.rebuild(mem_clients)
+    # Sincronizacao do catalogo em segundo plano (PRODUCTS_SYNC_ENABLED)
+    if PRODUCTS_SOURCE != "mock":
+        catalog_sync.start()
+    # Remocao periodica dos itens expirados dos caches (CACHE_SWEEP_INTERVAL)
+    cache_sweeper.start()
+    yield
+    cache_sweeper.stop()
+    catalog_sync.stop()
+    # Encerra as atualizacoes em segundo plano e fecha o pool de conexoes
+    # com a API de produtos no shutdown
+    product_refresher.shutdown()
+    shutdown_executor()
+    close_http_client()
+    if persistence.engine is not None:
+        persistence.engine.stop(mem_clients)
 
 
 app = FastAPI(
@@ -36,13 +76,56 @@ app = FastAPI(
     ],
     docs_url=None,
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
+# Latencia por rota e requisicoes em andamento (exportadas em /metrics)
+if METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+# Profiling por amostragem de requisicoes selecionadas (desabilitado por
+# padrao: sem o middleware, nenhum custo por requisicao)
+if PROFILING_ENABLED:
+    app.add_middleware(
+        ProfilingMiddleware,
+        store=profile_store,
+        tokens=os.getenv("PROFILING_TOKENS", "").split(","),
+        sample_rate=float(os.getenv("PROFILING_SAMPLE_RATE", "0")),
+        interval=float(os.getenv("PROFILING_INTERVAL", "0.001")),
+    )
+
+
+# API de produtos fora do ar (erro, timeout ou circuito aberto) sem versao
+# conhecida do produto: 503 em vez de "produto nao encontrado"
+@app.exception_handler(ProductsUnavailable)
+async def products_unavailable_handler(request, exc: ProductsUnavailable):
+    headers = {}
+    if exc.retry_after:
+        headers["Retry-After"] = str(math.ceil(exc.retry_after))
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "API de produtos indisponivel, tente novamente"},
+        headers=headers,
+    )
+
+
+# If-Match com uma versao antiga do cliente: 412 com a ETag atual, p/ o app
+# reler o cliente e refazer a alteracao
+@app.exception_handler(PreconditionFailed)
+async def precondition_failed_handler(request, exc: PreconditionFailed):
+    return JSONResponse(
+        status_code=412,
+        content={"detail": "Cliente alterado por outra requisicao (If-Match)"},
+        headers={"ETag": make_etag(exc.version)},
+    )
+
 
 app.include_router(clients.router)
 app.include_router(favorites.router)
+app.include_router(catalog.router)
 if PRODUCTS_SOURCE == "mock":
     app.include_router(products.router)
+if DEBUG_ROUTES_ENABLED:
+    app.include_router(debug.router)
 
 
 @app.get("/", tags=["Root"])
@@ -66,6 +149,16 @@ def healthcheck():
     return {"status": "ok"}
 
 
+@app.get("/metrics", tags=["DevOps"], response_class=PlainTextResponse)
+def get_metrics():
+    # Formato texto do Prometheus, sem autenticacao (para o scraper):
+    # desabilitado por padrao, habilitar apenas com a rota restrita a rede
+    # interna (ex: bloqueada no proxy de entrada)
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metricas desabilitadas")
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+
 @app.post("/token", tags=["Autenticacao"])
 def login(form_data: OAuth2PasswordRequestForm = Depends()):
     user = authenticate_user(form_data.username, form_data.password)
@@ -1,5 +1,26 @@
-from typing import Dict
+import os
+import sys
+from typing import Dict, Iterable
 
-# Estrutura em memória
-mem_clients: Dict[str, Dict] = {}
+from apiluizalabs.utils.pagination import OrderedIndex
+from apiluizalabs.utils.persistent import PersistentOrderedSet
+from apiluizalabs.utils.store import StripedStore
+
+# Estrutura em memória (clientes com locks por faixa de email p/ as escritas)
+mem_clients: StripedStore = StripedStore(
+    stripes=int(os.getenv("CLIENTS_STORE_STRIPES", "64"))
+)
 mem_products: Dict[str, Dict] = {}
+# Ordem estavel dos clientes (emails) para a paginacao por cursor
+client_index = OrderedIndex()
+
+
+def favorites_from_ids(product_ids: Iterable[str]) -> PersistentOrderedSet:
+    """Monta os favoritos de um cliente: apenas os IDs, na ordem informada
+
+    Os produtos sao resolvidos na leitura (tabela de produtos compartilhada) e
+    os IDs sao internados, entao clientes que favoritam o mesmo produto
+    compartilham a mesma string. O conjunto e persistente: alteracoes
+    retornam um conjunto novo sem alterar o publicado.
+    """
+    return PersistentOrderedSet.from_iterable(map(sys.intern, product_ids))
@@ -1,4 +1,27 @@
-from apiluizalabs.models import mem_clients, mem_products
+from itertools import islice
+
+from apiluizalabs.models import client_index, favorites_from_ids, mem_clients
+from apiluizalabs.utils.persistence import journal
+from apiluizalabs.utils.persistent import PersistentOrderedSet
+
+
+class PreconditionFailed(Exception):
+    """Versao do cliente diferente da informada no If-Match (a rota responde 412)"""
+
+    def __init__(self, version):
+        super().__init__("Cliente alterado por outra requisicao")
+        self.version = version
+
+
+def check_version(email, expected):
+    """Verifica a versao esperada do cliente (chamar com o lock do email)
+
+    `expected`: versoes aceitas (If-Match) ou None p/ nao verificar.
+    """
+    if expected is not None:
+        version = mem_clients.versions.get(email, 0)
+        if version not in expected:
+            raise PreconditionFailed(version)
 
 
 class ClientRepository:
@@ -6,84 +29,106 @@ class ClientRepository:
         """Retorna todos os clientes"""
         return list(mem_clients.values())
 
-    def get_by_email(self, email, product_source="mock"):
-        """Retorna um cliente pelo email e monta os favoritos corretamente"""
-        client = mem_clients.get(email)
-        if client:
-            if "favorites" not in client:
-                client["favorites"] = []
-            elif client["favorites"]:
-                # Se favoritos são IDs, buscar os dados completos
-                if isinstance(client["favorites"][0], str):
-                    if product_source == "mock":
-                        client["favorites"] = [
-                            mem_products[fav_id]
-                            for fav_id in client["favorites"]
-                            if fav_id in mem_products
-                        ]
-                    elif product_source == "api":
-                        api_auth = os.getenv("PRODUCTS_API_AUTHORIZATION")
-                        api_url = os.getenv("PRODUCTS_API_URL")
-                        headers = {}
-
-                        if all([api_url, api_auth]):
-                            headers["Authorization"] = f"Bearer {api_auth}"
-                        else:
-                            raise Exception("API de produtos não configurada")
-
-                        favoritos = []
-                        for product_id in client["favorites"]:
-                            url = f"{api_url}/products/{product_id}"
-                            try:
-                                resp = httpx.get(url, headers=headers)
-                                if resp.status_code == 200:
-                                    favoritos.append(resp.json())
-                            except Exception:
-                                continue
-                        client["favorites"] = favoritos
-        return client
+    def get_page(self, after=0, limit=50):
+        """Retorna (clientes, ultima sequencia, tem_mais) apos a sequencia `after`"""
+        emails, last, has_more = client_index.page(after, limit)
+        clients = [mem_clients.get(email) for email in emails]
+        # Clientes removidos entre a leitura do indice e do store sao omitidos
+        return [c for c in clients if c is not None], last, has_more
+
+    def iter_batches(self, batch_size=1000):
+        """Percorre os clientes em lotes, a partir de um snapshot fixado
+
+        Os registros vem de um snapshot do store fixado no inicio da leitura:
+        clientes criados, alterados ou removidos depois disso nao afetam a
+        leitura (as escritas publicam versoes novas sem alterar o snapshot).
+        """
+        with mem_clients.pin() as snapshot:
+            clients = iter(snapshot.data.values())
+            while True:
+                batch = [
+                    {**client, "favorites": list(client.get("favorites") or ())}
+                    for client in islice(clients, batch_size)
+                ]
+                if not batch:
+                    return
+                yield batch
+
+    def count(self):
+        """Retorna o total de clientes"""
+        return len(mem_clients)
+
+    def get_by_email(self, email):
+        """Retorna um cliente pelo email (registro publicado, somente leitura)"""
+        return mem_clients.get(email)
+
+    def get_version(self, email):
+        """Retorna a versao do registro publicado do cliente (0 se ausente)"""
+        return mem_clients.versions.get(email, 0)
+
+    def get_with_version(self, email):
+        """Retorna (versao, cliente) lidos juntos; (0, None) se ausente"""
+        return mem_clients.current(email)
 
     def create(self, client_data):
-        """Cria um novo cliente"""
+        """Cria um novo cliente (None se o email ja existir)"""
         email = client_data["email"]
 
-        # Garantir que o cliente tenha uma lista de favorites
-        if "favorites" not in client_data:
-            client_data["favorites"] = []
+        # Garantir que o cliente tenha os favoritos (conjunto de IDs)
+        favorites = client_data.get("favorites")
+        if not isinstance(favorites, PersistentOrderedSet):
+            client_data["favorites"] = favorites_from_ids(favorites or ())
 
-        mem_clients[email] = client_data
+        # Verificacao e insercao atomicas (unicidade do email)
+        with mem_clients.locked(email):
+            if email in mem_clients:
+                return None
+            mem_clients.publish(email, client_data)
+            client_index.add(email)
+            journal("put", client=client_data)
         return client_data
 
-    def update(self, email, client_data):
-        """Atualiza um cliente existente"""
-        if email not in mem_clients:
-            return None
+    def create_many(self, clients):
+        """Cria varios clientes em uma unica passada; retorna os criados"""
+        return [client for client in clients if self.create(client) is not None]
 
-        # Se estiver atualizando o email, mover o cliente
+    def update(self, email, client_data, expected=None):
+        """Atualiza um cliente existente (na versao `expected`, se informada)"""
         new_email = client_data.get("email")
-        if new_email and new_email != email and new_email in mem_clients:
+        if new_email == email:
+            new_email = None
+
+        # Locks dos dois emails: a troca de email e atomica (compare-and-set)
+        with mem_clients.locked(email, new_email):
+            client = mem_clients.get(email)
+            if client is None:
+                return None
+            check_version(email, expected)
             # Se email ja existente, nao permitir atualizacao
-            return None
+            if new_email and new_email in mem_clients:
+                return None
 
-        # Atualiza os campos fornecidos
-        for key, value in client_data.items():
-            mem_clients[email][key] = value
+            # Nova versao do registro com os campos fornecidos (o registro
+            # publicado nao e alterado)
+            client = {**client, **client_data}
 
-        if new_email and new_email != email:
-            client = mem_clients[email]
-            del mem_clients[email]
-            mem_clients[new_email] = client
+            if new_email:
+                # Se estiver atualizando o email, mover o cliente
+                mem_clients.retire(email)
+                client_index.rename(email, new_email)
+                journal("del", email=email)
+            mem_clients.publish(new_email or email, client)
+            journal("put", client=client)
             return client
 
-        return mem_clients[email]
-
     def delete(self, email):
         """Remove um cliente pelo email"""
-        if email in mem_clients:
-            client = mem_clients[email]
-            del mem_clients[email]
+        with mem_clients.locked(email):
+            client = mem_clients.retire(email)
+            if client is not None:
+                client_index.remove(email)
+                journal("del", email=email)
             return client
-        return None
 
     def email_exists(self, email):
         """Verifica se um email ja existe"""
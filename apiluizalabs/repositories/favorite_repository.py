@@ -1,95 +1,106 @@
-import os
+import sys
 
-import httpx
-
-from apiluizalabs.models import mem_clients, mem_products
+from apiluizalabs.models import mem_clients
+from apiluizalabs.repositories.client_repository import check_version
+from apiluizalabs.utils.persistence import journal
 
 
 class FavoriteRepository:
-    def get_favorites(self, email, product_source="mock"):
-        """Retorna os produtos favoritos de um cliente"""
-
+    # Os favoritos de cada cliente ficam em um conjunto persistente ordenado
+    # por insercao (apiluizalabs.utils.persistent): verificar duplicidade e
+    # O(1), adicionar/remover retornam um conjunto novo em O(log n) (copia so
+    # do caminho alterado) e a ordem de exibicao e a ordem em que foram
+    # adicionados. Os produtos nao sao copiados p/ o cliente, sao resolvidos
+    # na leitura. Toda alteracao publica um registro novo (copy-on-write);
+    # as escritas usam o lock da faixa do email no store (o lote nao pode
+    # perder uma adicao/remocao simultanea). Os metodos retornam o proprio
+    # conjunto publicado (imutavel): a lista so e montada p/ a resposta
+
+    def get_favorite_ids(self, email):
+        """Retorna os IDs dos produtos favoritos de um cliente (conjunto)"""
         client = mem_clients.get(email)
-
         if not client:
             return None
 
-        # Verifica se a chave "favorites" existe no dicionário
-        if "favorites" not in client:
-            # Não modifica o dicionário, apenas retorna uma lista vazia
-            return []
-
-        # Obtém a lista de favoritos (pode ser None, lista vazia ou lista com IDs)
-        favorites_ids = client["favorites"]
-
-        # Se for None ou lista vazia, retorna lista vazia
-        if not favorites_ids:
-            return []
-
-        # Se favoritos já são objetos completos, apenas retorne
-        if isinstance(favorites_ids[0], dict):
-            return favorites_ids
-
-        # Se favoritos são apenas IDs, buscar os dados completos conforme a origem
-        if product_source == "mock":
-            return [
-                mem_products[fav_id]
-                for fav_id in favorites_ids
-                if fav_id in mem_products
-            ]
-        elif product_source == "api":
-            api_url = os.getenv("PRODUCTS_API_URL")
-            api_auth = os.getenv("PRODUCTS_API_AUTHORIZATION")
-            headers = {}
-
-            if all([api_url, api_auth]):
-                headers["Authorization"] = f"Bearer {api_auth}"
-            else:
-                raise Exception("API de produtos nao configurada")
-
-            favoritos = []
-            for product_id in favorites_ids:
-                url = f"{api_url}/products/{product_id}"
-                try:
-                    resp = httpx.get(url, headers=headers)
-                    if resp.status_code == 200:
-                        favoritos.append(resp.json())
-                except Exception:
-                    continue
-            return favoritos
-        else:
-            return []
-
-    def add_favorite(self, email, product):
-        """Adiciona um produto aos favoritos do cliente"""
+        return client["favorites"]
+
+    def get_favorite_ids_page(self, email, offset, limit):
+        """Retorna (IDs da pagina, total de favoritos) de um cliente"""
         client = mem_clients.get(email)
         if not client:
             return None
 
-        if "favorites" not in client:
-            client["favorites"] = []
+        favorites = client["favorites"]
+        return favorites.page(offset, limit), len(favorites)
 
-        for fav in client["favorites"]:
-            if fav["id"] == product["id"]:
-                return client["favorites"]
+    def add_favorite(self, email, product_id, expected=None):
+        """Adiciona um produto aos favoritos do cliente; retorna os IDs (conjunto)"""
+        with mem_clients.locked(email):
+            client = mem_clients.get(email)
+            if not client:
+                return None
+            check_version(email, expected)
 
-        client["favorites"].append(product)
-        return client["favorites"]
+            if product_id not in client["favorites"]:
+                favorites = client["favorites"].add(sys.intern(product_id))
+                client = {**client, "favorites": favorites}
+                mem_clients.publish(email, client)
+                journal("fav_add", email=email, product_id=product_id)
 
-    def remove_favorite(self, email, product_id):
-        """Remove um produto dos favoritos do cliente"""
-        client = mem_clients.get(email)
-        if not client:
-            return None
-
-        if "favorites" not in client:
-            client["favorites"] = []
             return client["favorites"]
 
-        # Verifica se o produto esta nos favoritos
-        for i, fav in enumerate(client["favorites"]):
-            if fav["id"] == product_id:
-                client["favorites"].pop(i)
-                return client["favorites"]
-
-        return None  # Prod nao encontrado
+    def batch_update(self, email, add, remove, valid_ids, expected=None):
+        """Aplica remocoes e adicoes de uma vez; retorna (resultados, total)
+
+        As alteracoes geram um conjunto novo de favoritos, publicado como nova
+        versao do registro: leitores veem o estado anterior ou o final, nunca
+        parte do lote.
+        """
+        with mem_clients.locked(email):
+            client = mem_clients.get(email)
+            if not client:
+                return None
+            check_version(email, expected)
+
+            favorites = client["favorites"]
+            results = []
+            for product_id in remove:
+                if product_id in favorites:
+                    favorites = favorites.discard(product_id)
+                    results.append({"id": product_id, "status": "removed"})
+                else:
+                    results.append({"id": product_id, "status": "not_found"})
+            for product_id in add:
+                if product_id not in valid_ids:
+                    results.append({"id": product_id, "status": "not_found"})
+                elif product_id in favorites:
+                    results.append({"id": product_id, "status": "duplicate"})
+                else:
+                    favorites = favorites.add(sys.intern(product_id))
+                    results.append({"id": product_id, "status": "added"})
+
+            added = [r["id"] for r in results if r["status"] == "added"]
+            removed = [r["id"] for r in results if r["status"] == "removed"]
+            # Lote sem efeito (apenas duplicados/inexistentes): nenhuma versao
+            # nova (ETags continuam validas) e nada no journal
+            if added or removed:
+                mem_clients.publish(email, {**client, "favorites": favorites})
+                journal("fav_batch", email=email, add=added, remove=removed)
+            return results, len(favorites)
+
+    def remove_favorite(self, email, product_id, expected=None):
+        """Remove um produto dos favoritos do cliente; retorna os IDs (conjunto)"""
+        with mem_clients.locked(email):
+            client = mem_clients.get(email)
+            if not client:
+                return None
+            check_version(email, expected)
+
+            # Verifica se o produto esta nos favoritos
+            if product_id not in client["favorites"]:
+                return None  # Prod nao encontrado
+
+            favorites = client["favorites"].discard(product_id)
+            mem_clients.publish(email, {**client, "favorites": favorites})
+            journal("fav_del", email=email, product_id=product_id)
+            return favorites
@@ -1,65 +1,215 @@
 import os
 import random
+import time
 
-import httpx
 from faker import Faker
 
 from apiluizalabs.models import mem_products
+from apiluizalabs.utils.http_client import get_http_client
+from apiluizalabs.utils.metrics import observe_upstream, registry
+from apiluizalabs.utils.resilience import CircuitBreaker, RetryBudget, backoff_delay
 
 fake = Faker("pt_BR")
 
+# Status do upstream que indicam falha temporaria (nova tentativa faz sentido)
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+RETRIES = int(os.getenv("PRODUCTS_API_RETRIES", "2"))
+RETRY_BACKOFF = float(os.getenv("PRODUCTS_API_RETRY_BACKOFF", "0.05"))
+RETRY_BACKOFF_MAX = float(os.getenv("PRODUCTS_API_RETRY_BACKOFF_MAX", "1"))
+
+
+def _breaker(name):
+    return CircuitBreaker(
+        name,
+        failure_rate=float(os.getenv("PRODUCTS_API_BREAKER_FAILURE_RATE", "0.5")),
+        min_requests=int(os.getenv("PRODUCTS_API_BREAKER_MIN_REQUESTS", "20")),
+        window=float(os.getenv("PRODUCTS_API_BREAKER_WINDOW", "10")),
+        open_timeout=float(os.getenv("PRODUCTS_API_BREAKER_OPEN_TIMEOUT", "5")),
+    )
+
+
+# Um circuito por endpoint do upstream (detalhe do produto e catalogo paginado)
+breakers = {"product": _breaker("product"), "catalog": _breaker("catalog")}
+ENDPOINT_OF = {
+    "get": "product",
+    "exists": "product",
+    "page": "catalog",
+    "list": "catalog",
+}
+# Novas tentativas compartilhadas por todas as chamadas ao upstream
+retry_budget = RetryBudget(
+    ratio=float(os.getenv("PRODUCTS_API_RETRY_BUDGET", "0.2")),
+    min_per_second=float(os.getenv("PRODUCTS_API_RETRY_MIN_PER_SECOND", "1")),
+)
+
+CIRCUIT_STATE_VALUE = {"closed": 0, "half_open": 1, "open": 2}
+
+
+def _resilience_metrics():
+    """Coletor do estado dos circuitos e do retry budget (/metrics)"""
+    stats = {name: breaker.stats() for name, breaker in breakers.items()}
+    yield (
+        "products_api_circuit_state",
+        "gauge",
+        "Estado do circuito por endpoint (0 fechado, 1 meio aberto, 2 aberto)",
+        [({"endpoint": n}, CIRCUIT_STATE_VALUE[s["state"]]) for n, s in stats.items()],
+    )
+    yield (
+        "products_api_circuit_rejected_total",
+        "counter",
+        "Chamadas recusadas com o circuito aberto",
+        [({"endpoint": n}, s["rejected"]) for n, s in stats.items()],
+    )
+    budget = retry_budget.stats()
+    yield (
+        "products_api_retries_total",
+        "counter",
+        "Novas tentativas de chamadas a API de produtos",
+        [({}, budget["retries"])],
+    )
+    yield (
+        "products_api_retry_budget_exhausted_total",
+        "counter",
+        "Novas tentativas descartadas por falta de retry budget",
+        [({}, budget["exhausted"])],
+    )
+
+
+registry.collector(_resilience_metrics)
+
+
+class ProductsUnavailable(Exception):
+    """API de produtos indisponivel (erro, timeout, rate limit ou circuito aberto)
+
+    Diferente de "produto nao encontrado": a rota responde 503.
+    """
+
+    def __init__(self, message="API de produtos indisponivel", retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
 
 class ProductRepository:
-    def __init__(self, source="mock", api_url=None):
+    def __init__(self, source="mock", api_url=None, concurrency=None):
         self.source = source
         self.api_url = api_url
-        self.api_auth = os.getenv("PRODUCTS_API_AUTHORIZATION")
+        # Limite de requisicoes simultaneas a API ao buscar varios produtos
+        # (PRODUCTS_API_CONCURRENCY quando nao informado)
+        self.concurrency = concurrency
+
+    @property
+    def max_concurrency(self):
+        return self.concurrency or int(os.getenv("PRODUCTS_API_CONCURRENCY", "10"))
+
+    def _request(self, operation, url, retries=None, **kwargs):
+        """GET na API de produtos com circuit breaker e novas tentativas
+
+        Falhas temporarias (erro de conexao, timeout, 5xx, 429) sao repetidas
+        com backoff exponencial e jitter, limitadas por `retries` e pelo retry
+        budget. Com o circuito do endpoint aberto, ou esgotadas as tentativas,
+        levanta ProductsUnavailable. Latencia e status vao para as metricas.
+        """
+        breaker = breakers[ENDPOINT_OF[operation]]
+        retries = RETRIES if retries is None else retries
+        retry_budget.deposit()
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                raise ProductsUnavailable(
+                    f"Circuito aberto p/ a API de produtos ({breaker.name})",
+                    retry_after=breaker.retry_after(),
+                )
+            started = time.perf_counter()
+            try:
+                response = get_http_client().get(url, **kwargs)
+            except Exception as e:
+                observe_upstream(operation, started, "error")
+                breaker.record(False)
+                error, response = e, None
+            else:
+                observe_upstream(operation, started, str(response.status_code))
+                if response.status_code not in RETRYABLE_STATUS:
+                    breaker.record(True)
+                    return response
+                breaker.record(False)
+                error = None
+
+            if attempt >= retries or not retry_budget.withdraw():
+                if response is not None and not error:
+                    # Sem novas tentativas: o chamador decide pelo status
+                    return response
+                raise ProductsUnavailable(
+                    f"Erro ao acessar API de produtos: {error}"
+                ) from error
+            time.sleep(backoff_delay(attempt, RETRY_BACKOFF, RETRY_BACKOFF_MAX))
+            attempt += 1
 
     def get_all(self):
         """Retorna todos os produtos"""
         if self.source == "mock":
             return list(mem_products.values())
         else:
-            try:
-                headers = {}
-                if self.api_auth:
-                    headers["Authorization"] = f"Bearer {self.api_auth}"
-                response = httpx.get(self.api_url, headers=headers)
-                if response.status_code == 200:
-                    return response.json()
-                return []
-            except Exception:
-                raise Exception("Erro ao acessar API de produtos")
+            # Catalogo inteiro em uma chamada: sem novas tentativas
+            response = self._request("list", self.api_url, retries=0)
+            if response.status_code == 200:
+                return response.json()
+            return []
+
+    def get_page(self, page):
+        """Retorna os produtos de uma pagina do catalogo (lista vazia no fim)"""
+        if self.source == "mock":
+            raise ValueError("Operação não suportada para produtos mock")
+        response = self._request("page", f"{self.api_url}/", params={"page": page})
+        if response.status_code == 404:
+            return []
+        if response.status_code != 200:
+            raise ProductsUnavailable(
+                f"Erro ao acessar API de produtos (status {response.status_code})"
+            )
+        data = response.json()
+        # A API retorna {"meta": {...}, "products": [...]}
+        if isinstance(data, dict):
+            return data.get("products") or []
+        return data or []
 
     def get_by_id(self, product_id):
         """Retorna um produto pelo ID"""
         if self.source == "mock":
             return mem_products.get(product_id)
         else:
-            try:
-                headers = {}
-                if self.api_auth:
-                    headers["Authorization"] = f"Bearer {self.api_auth}"
-                response = httpx.get(f"{self.api_url}/{product_id}", headers=headers)
-                if response.status_code == 200:
-                    return response.json()
+            response = self._request("get", f"{self.api_url}/{product_id}")
+            if response.status_code == 200:
+                return response.json()
+            if response.status_code == 404:
                 return None
-            except Exception:
-                raise Exception("Erro ao acessar API de produtos")
+            # Erro do upstream nao significa que o produto nao existe
+            raise ProductsUnavailable(
+                f"Erro ao acessar API de produtos (status {response.status_code})"
+            )
+
+    def get_many(self, product_ids):
+        """Retorna os produtos de uma lista de IDs, na mesma ordem da lista
+
+        Produtos inexistentes retornam None. Apenas no modo mock: no modo api
+        a busca em lote e feita pelo ProductService.lookup_products (cache,
+        single-flight, fallback e indisponibilidade por ID).
+        """
+        if self.source != "mock":
+            raise ValueError("Operação não suportada para API externa")
+
+        return [mem_products.get(product_id) for product_id in product_ids]
 
     def exists(self, product_id):
         """Verifica se um produto existe"""
         if self.source == "mock":
             return product_id in mem_products
         else:
-            try:
-                headers = {}
-                if self.api_auth:
-                    headers["Authorization"] = f"Bearer {self.api_auth}"
-                response = httpx.get(f"{self.api_url}/{product_id}", headers=headers)
+            response = self._request("exists", f"{self.api_url}/{product_id}")
+            if response.status_code in (200, 404):
                 return response.status_code == 200
-            except Exception:
-                raise Exception("Erro ao acessar API de produtos")
+            raise ProductsUnavailable(
+                f"Erro ao acessar API de produtos (status {response.status_code})"
+            )
 
     def create_mock_products(self, total):
         """Cria produtos mockados (apenas para testes)"""
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+
+from apiluizalabs.auth import get_current_user, oauth2_scheme
+from apiluizalabs.services.catalog_service import catalog_sync
+
+router = APIRouter(prefix="/catalog", tags=["Catalogo"])
+
+
+@router.get("/sync")
+def get_sync_status(token: str = Depends(oauth2_scheme)):
+    get_current_user(token)
+    return catalog_sync.status()
+
+
+@router.post("/sync", status_code=202)
+def trigger_sync(
+    background_tasks: BackgroundTasks, token: str = Depends(oauth2_scheme)
+):
+    get_current_user(token)
+    if not catalog_sync.enabled:
+        raise HTTPException(status_code=400, detail="Sincronizacao desabilitada")
+    if catalog_sync.running:
+        raise HTTPException(status_code=409, detail="Sincronizacao em andamento")
+    # Executa apos o envio da resposta; o progresso e consultado via GET
+    background_tasks.add_task(catalog_sync.sync)
+    return catalog_sync.status()
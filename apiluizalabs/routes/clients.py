@@ -1,27 +1,87 @@
-from fastapi import APIRouter, Depends, HTTPException
+import json
+import os
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 
 from apiluizalabs.auth import get_current_user, oauth2_scheme
 from apiluizalabs.schemas import ClientCreate, ClientOut, ClientUpdate
 from apiluizalabs.services.client_service import ClientService
+from apiluizalabs.utils.etag import expected_versions, make_etag, not_modified
+from apiluizalabs.utils.fast_json import respond
+from apiluizalabs.utils.ndjson import gzip_chunks, ndjson_chunks
+from apiluizalabs.utils.pagination import InvalidCursor
 
 router = APIRouter(prefix="/clients", tags=["Clientes"])
 
 client_service = ClientService()
 
+# Maximo de clientes aceitos por requisicao em /clients/bulk
+BULK_MAX_ITEMS = int(os.getenv("CLIENTS_BULK_MAX_ITEMS", "100000"))
+# Tamanho maximo (bytes) do corpo de /clients/bulk
+BULK_MAX_BYTES = int(os.getenv("CLIENTS_BULK_MAX_BYTES", str(64 * 1024 * 1024)))
+
+
+def client_out(client):
+    """Monta a resposta do cliente com os favoritos como lista de IDs"""
+    return {**client, "favorites": list(client.get("favorites") or {})}
+
 
 @router.get("/", response_model=dict)
-def list_clients(token: str = Depends(oauth2_scheme)):
+def list_clients(
+    limit: int = Query(50, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    token: str = Depends(oauth2_scheme),
+):
+    get_current_user(token)
+    try:
+        result = client_service.get_all_clients(limit=limit, cursor=cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return respond(
+        None, {**result, "results": [client_out(c) for c in result["results"]]}
+    )
+
+
+# Declarada antes de /{email} para nao ser tratada como um email
+@router.get("/export")
+def export_clients(
+    hydrate: bool = False,
+    gzip: bool = False,
+    token: str = Depends(oauth2_scheme),
+):
+    """Exporta todos os clientes em NDJSON (um cliente por linha)"""
     get_current_user(token)
-    return client_service.get_all_clients()
+    chunks = ndjson_chunks(client_service.export_clients(hydrate=hydrate))
+    headers = {"Content-Disposition": 'attachment; filename="clients.ndjson"'}
+    if gzip:
+        chunks = gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(chunks, media_type="application/x-ndjson", headers=headers)
 
 
 @router.get("/{email}", response_model=ClientOut)
-def get_client(email: str, token: str = Depends(oauth2_scheme)):
+def get_client(
+    email: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    token: str = Depends(oauth2_scheme),
+):
     get_current_user(token)
+    # Versao lida antes do cliente: a ETag nunca e mais nova que o corpo
+    version = client_service.get_version(email)
     client = client_service.get_client(email)
     if not client:
         raise HTTPException(status_code=404, detail="Cliente não encontrado")
-    return client
+    etag = make_etag(version)
+    unchanged = not_modified(if_none_match, etag)
+    if unchanged:
+        return unchanged
+    response.headers["ETag"] = etag
+    return respond(ClientOut, client_out(client), response=response)
 
 
 @router.post("/", response_model=ClientOut, status_code=201)
@@ -34,19 +94,89 @@ def create_client(client: ClientCreate, token: str = Depends(oauth2_scheme)):
         raise HTTPException(status_code=400, detail=result["error"])
 
     # Converter objetos de produto para IDs de produto
-    if "favorites" in result and result["favorites"]:
-        result["favorites"] = [prod["id"] for prod in result["favorites"]]
-
-    return result
+    return respond(ClientOut, client_out(result), status_code=201)
+
+
+def _bulk_import(body: bytes, content_type: str):
+    """Interpreta, valida e cria os clientes do lote (executado no threadpool)"""
+    try:
+        if "ndjson" in content_type:
+            items = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            items = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Corpo da requisicao invalido")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Esperado um array de clientes")
+    if len(items) > BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413, detail=f"Maximo de {BULK_MAX_ITEMS} clientes por lote"
+        )
+
+    # Validacao do formato de cada item; os validos seguem p/ o servico
+    results = [None] * len(items)
+    valid = []
+    for i, item in enumerate(items):
+        try:
+            valid.append((i, ClientCreate.model_validate(item).model_dump()))
+        except ValidationError as e:
+            email = item.get("email") if isinstance(item, dict) else None
+            error = "; ".join(err["msg"] for err in e.errors())
+            results[i] = {"email": email, "status": "error", "error": error}
+
+    created = client_service.bulk_create_clients([data for _, data in valid])
+    for (i, _), result in zip(valid, created):
+        results[i] = result
+
+    total_created = sum(1 for r in results if r["status"] == "created")
+    return {
+        "created": total_created,
+        "failed": len(results) - total_created,
+        "results": [{"index": i, **r} for i, r in enumerate(results)],
+    }
+
+
+@router.post("/bulk")
+async def bulk_create_clients(request: Request, token: str = Depends(oauth2_scheme)):
+    """Cria varios clientes; aceita um array JSON ou NDJSON (um por linha)
+
+    Apenas a leitura do corpo (limitada a CLIENTS_BULK_MAX_BYTES) acontece no
+    event loop; interpretacao, validacao e criacao rodam no threadpool, sem
+    bloquear as demais requisicoes durante a importacao.
+    """
+    get_current_user(token)
+    too_large = HTTPException(
+        status_code=413, detail=f"Maximo de {BULK_MAX_BYTES} bytes por lote"
+    )
+    length = request.headers.get("content-length")
+    if length is not None and length.isdigit() and int(length) > BULK_MAX_BYTES:
+        raise too_large
+    # Sem Content-Length (chunked) o limite e verificado durante a leitura
+    chunks = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > BULK_MAX_BYTES:
+            raise too_large
+        chunks.append(chunk)
+
+    return await run_in_threadpool(
+        _bulk_import, b"".join(chunks), request.headers.get("content-type", "")
+    )
 
 
 @router.patch("/{email}", response_model=ClientOut)
 def update_client(
-    email: str, client: ClientUpdate, token: str = Depends(oauth2_scheme)
+    email: str,
+    client: ClientUpdate,
+    if_match: Optional[str] = Header(None),
+    token: str = Depends(oauth2_scheme),
 ):
     get_current_user(token)
     client_data = {k: v for k, v in client.model_dump().items() if v is not None}
-    result = client_service.update_client(email, client_data)
+    result = client_service.update_client(
+        email, client_data, expected_versions(if_match)
+    )
 
     if result is None:
         raise HTTPException(status_code=404, detail="Cliente nao encontrado")
@@ -55,10 +185,7 @@ def update_client(
         raise HTTPException(status_code=400, detail=result["error"])
 
     # Converter objetos de produto para IDs de produto
-    if "favorites" in result and result["favorites"]:
-        result["favorites"] = [prod["id"] for prod in result["favorites"]]
-
-    return result
+    return respond(ClientOut, client_out(result))
 
 
 @router.delete("/{email}")
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from apiluizalabs.auth import get_current_user, oauth2_scheme
+from apiluizalabs.repositories.product_repository import breakers, retry_budget
+from apiluizalabs.services.product_service import product_flight
+from apiluizalabs.utils.cache import cache_sweeper, caches_stats
+from apiluizalabs.utils.profiling import collapsed, profile_store
+
+# Incluido apenas com DEBUG_ROUTES_ENABLED=true (ver main.py)
+router = APIRouter(prefix="/debug", tags=["Debug"])
+
+
+@router.get("/caches")
+def get_caches_stats(token: str = Depends(oauth2_scheme)):
+    get_current_user(token)
+    return {
+        "caches": caches_stats(),
+        "sweeper": {
+            "interval": cache_sweeper.interval,
+            "runs": cache_sweeper.runs,
+            "removed": cache_sweeper.removed,
+        },
+    }
+
+
+@router.get("/upstream")
+def get_upstream_status(token: str = Depends(oauth2_scheme)):
+    get_current_user(token)
+    return {
+        "circuits": {name: breaker.stats() for name, breaker in breakers.items()},
+        "retry_budget": retry_budget.stats(),
+        "singleflight": product_flight.stats(),
+    }
+
+
+@router.get("/profiles")
+def list_profiles(token: str = Depends(oauth2_scheme)):
+    get_current_user(token)
+    return profile_store.list()
+
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+def get_profile(profile_id: str, token: str = Depends(oauth2_scheme)):
+    # Pilhas no formato collapsed (ex: flamegraph.pl perfil.txt > perfil.svg)
+    get_current_user(token)
+    profile = profile_store.get(profile_id)
+    if profile is None or "stacks" not in profile:
+        raise HTTPException(status_code=404, detail="Perfil nao encontrado")
+    return PlainTextResponse(collapsed(profile["stacks"]))
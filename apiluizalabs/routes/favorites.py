@@ -1,38 +1,111 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional, Union
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
 
 from apiluizalabs.auth import get_current_user, oauth2_scheme
-from apiluizalabs.schemas import FavoritesListOut, ProductFavorite
+from apiluizalabs.schemas import (
+    FavoriteBatch,
+    FavoriteBatchOut,
+    FavoriteList,
+    FavoritesListOut,
+    ProductFavorite,
+)
 from apiluizalabs.services.favorite_service import FavoriteService
+from apiluizalabs.utils.etag import expected_versions, not_modified
+from apiluizalabs.utils.fast_json import respond
 
 router = APIRouter(prefix="/favorites", tags=["Favoritos"])
 
 favorite_service = FavoriteService()
 
 
-@router.get("/{email}", response_model=FavoritesListOut)
-def list_favorites(email: str, token: str = Depends(oauth2_scheme)):
+# Sem `page`/`limit` a resposta e a lista completa ({"favorites": [...]}),
+# como antes da paginacao; com um deles, a pagina (FavoriteList)
+@router.get("/{email}", response_model=Union[FavoriteList, FavoritesListOut])
+def list_favorites(
+    email: str,
+    request: Request,
+    response: Response,
+    page: Optional[int] = Query(None, ge=1),
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    if_none_match: Optional[str] = Header(None),
+    token: str = Depends(oauth2_scheme),
+):
     get_current_user(token)
-    favorites = favorite_service.get_favorites(email)
-    if favorites is None:
+    # Favoritos inalterados: 304 sem ler a pagina nem resolver os produtos
+    etag = favorite_service.get_etag(email)
+    if etag is None:
         raise HTTPException(status_code=404, detail="Cliente nao encontrado")
-    return {"favorites": favorites}
+    unchanged = not_modified(if_none_match, etag)
+    if unchanged:
+        return unchanged
+
+    if page is None and limit is None:
+        favorites = favorite_service.get_favorites(email)
+        if favorites is None:
+            raise HTTPException(status_code=404, detail="Cliente nao encontrado")
+        response.headers["ETag"] = etag
+        return respond(FavoritesListOut, {"favorites": favorites}, response=response)
+
+    page, limit = page or 1, limit or 50
+    result = favorite_service.get_favorites_page(email, page=page, limit=limit)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Cliente nao encontrado")
+    has_more = result.pop("has_more")
+    if has_more:
+        next_url = request.url_for("list_favorites", email=email)
+        result["next"] = str(next_url.include_query_params(page=page + 1, limit=limit))
+    response.headers["ETag"] = etag
+    return respond(FavoriteList, result, response=response)
 
 
 @router.post("/{email}", response_model=FavoritesListOut)
 def add_favorite(
-    email: str, product: ProductFavorite, token: str = Depends(oauth2_scheme)
+    email: str,
+    product: ProductFavorite,
+    if_match: Optional[str] = Header(None),
+    token: str = Depends(oauth2_scheme),
 ):
     get_current_user(token)
-    result = favorite_service.add_favorite(email, product.id)
+    result = favorite_service.add_favorite(
+        email, product.id, expected_versions(if_match)
+    )
     if result is None:
         raise HTTPException(status_code=404, detail="Cliente ou produto nao encontrado")
-    return {"favorites": result}
+    return respond(FavoritesListOut, {"favorites": result})
+
+
+@router.post("/{email}/batch", response_model=FavoriteBatchOut)
+def batch_update_favorites(
+    email: str,
+    batch: FavoriteBatch,
+    if_match: Optional[str] = Header(None),
+    token: str = Depends(oauth2_scheme),
+):
+    """Adiciona e remove varios produtos dos favoritos em uma unica alteracao"""
+    get_current_user(token)
+    result = favorite_service.batch_update_favorites(
+        email,
+        add=batch.add,
+        remove=batch.remove,
+        expected=expected_versions(if_match),
+    )
+    if result is None:
+        raise HTTPException(status_code=404, detail="Cliente nao encontrado")
+    return respond(FavoriteBatchOut, result)
 
 
 @router.delete("/{email}/{product_id}", response_model=FavoritesListOut)
-def remove_favorite(email: str, product_id: str, token: str = Depends(oauth2_scheme)):
+def remove_favorite(
+    email: str,
+    product_id: str,
+    if_match: Optional[str] = Header(None),
+    token: str = Depends(oauth2_scheme),
+):
     get_current_user(token)
-    result = favorite_service.remove_favorite(email, product_id)
+    result = favorite_service.remove_favorite(
+        email, product_id, expected_versions(if_match)
+    )
     if result is None:
         raise HTTPException(status_code=404, detail="Produto nao esta nos favoritos")
-    return {"favorites": result}
+    return respond(FavoritesListOut, {"favorites": result})
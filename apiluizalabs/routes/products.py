@@ -3,6 +3,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from apiluizalabs.auth import get_current_user, oauth2_scheme
 from apiluizalabs.schemas import ProductOut
 from apiluizalabs.services.product_service import ProductService
+from apiluizalabs.utils.fast_json import respond
 
 router = APIRouter(prefix="/products", tags=["Produtos (Mock)"])
 
@@ -43,7 +44,7 @@ def get_product(id: str, token: str = Depends(oauth2_scheme)):
     produto = product_service.get_product(id)
     if not produto:
         raise HTTPException(status_code=404, detail="Produto nao existe")
-    return produto
+    return respond(ProductOut, produto)
 
 
 @router.post("/mock/{total}", response_model=list[ProductOut], status_code=201)
@@ -51,6 +52,6 @@ def create_mock_products(total: int, token: str = Depends(oauth2_scheme)):
     get_current_user(token)
     try:
         produtos = product_service.create_mock_products(total)
-        return produtos
+        return respond(list[ProductOut], produtos, status_code=201)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
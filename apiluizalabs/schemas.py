@@ -1,7 +1,11 @@
+import os
 from enum import Enum
-from typing import List, Optional
+from typing import List, Literal, Optional
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
+
+# Maximo de IDs em cada lista (add/remove) de uma alteracao em lote
+FAVORITES_BATCH_MAX = int(os.getenv("FAVORITES_BATCH_MAX_ITEMS", "1000"))
 
 
 class ClientBase(BaseModel):
@@ -53,9 +57,24 @@ class FavoriteAdd(BaseModel):
     id: str
 
 
+class FavoriteBatch(BaseModel):
+    add: List[str] = Field(default_factory=list, max_length=FAVORITES_BATCH_MAX)
+    remove: List[str] = Field(default_factory=list, max_length=FAVORITES_BATCH_MAX)
+
+
+class FavoriteBatchResult(BaseModel):
+    id: str
+    status: Literal["added", "duplicate", "removed", "not_found"]
+
+
+class FavoriteBatchOut(BaseModel):
+    total: int
+    results: List[FavoriteBatchResult]
+
+
 class FavoriteList(BaseModel):
     total: int
     page: int
+    limit: int
     next: Optional[str] = None
-    results: List = []
-    favorites: List[str] = []
+    favorites: List[ProductOut] = []
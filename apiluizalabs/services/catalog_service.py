@@ -0,0 +1,131 @@
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from apiluizalabs.repositories.product_repository import ProductRepository
+from apiluizalabs.utils.concurrency import bounded_map
+
+
+class CatalogSyncService:
+    """Sincroniza o catalogo completo da API de produtos em um indice local
+
+    As paginas sao buscadas em lotes de `concurrency` paginas simultaneas ate
+    a primeira pagina vazia. O indice novo so substitui o anterior (troca
+    atomica de referencia) quando a sincronizacao termina sem erro;
+    `generation` muda quando o indice novo difere do anterior.
+    """
+
+    def __init__(self, enabled=False, interval=3600, concurrency=4):
+        self.enabled = enabled
+        self.interval = interval
+        self.concurrency = concurrency
+        self.index: Dict[str, Dict] = {}
+        self.generation = 0
+        self.last_synced: Optional[datetime] = None
+        self.last_duration: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.running = False
+        self.pages_synced = 0
+        self.products_synced = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> bool:
+        """Indica se existe um indice sincronizado para consulta"""
+        return self.enabled and self.last_synced is not None
+
+    def get(self, product_id) -> Optional[Dict]:
+        """Retorna o produto do indice local (None se nao estiver no indice)"""
+        return self.index.get(product_id)
+
+    def sync(self, repository: Optional[ProductRepository] = None) -> bool:
+        """Executa uma sincronizacao completa; retorna False se ja em andamento"""
+        if not self._lock.acquire(blocking=False):
+            return False
+        repository = repository or ProductRepository(
+            source="api", api_url=os.getenv("PRODUCTS_API_URL")
+        )
+        started = time.perf_counter()
+        self.running = True
+        self.pages_synced = 0
+        self.products_synced = 0
+        try:
+            index = {}
+            page = 1
+            finished = False
+            while not finished and not self._stop.is_set():
+                pages = list(range(page, page + self.concurrency))
+                for products in bounded_map(
+                    repository.get_page, pages, self.concurrency
+                ):
+                    if not products:
+                        finished = True
+                        continue
+                    for product in products:
+                        index[product["id"]] = product
+                    self.pages_synced += 1
+                    self.products_synced = len(index)
+                page += self.concurrency
+
+            if finished:
+                # Troca atomica: leitores veem o indice antigo ou o novo completo
+                if index != self.index:
+                    self.generation += 1
+                self.index = index
+                self.last_synced = datetime.now(timezone.utc)
+                self.last_error = None
+            return finished
+        except Exception as e:
+            # Log do erro (o indice anterior continua valendo)
+            self.last_error = str(e)
+            print(f"Erro ao sincronizar catalogo de produtos: {str(e)}")
+            return False
+        finally:
+            self.last_duration = time.perf_counter() - started
+            self.running = False
+            self._lock.release()
+
+    def start(self) -> None:
+        """Inicia a sincronizacao periodica em segundo plano"""
+        if not self.enabled or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="catalog-sync", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.sync()
+            self._stop.wait(self.interval)
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def status(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "running": self.running,
+            "last_synced": self.last_synced.isoformat() if self.last_synced else None,
+            "last_duration": self.last_duration,
+            "last_error": self.last_error,
+            "pages_synced": self.pages_synced,
+            "products_synced": self.products_synced,
+            "products": len(self.index),
+        }
+
+
+# Indice local do catalogo compartilhado pelo processo (opcional)
+catalog_sync = CatalogSyncService(
+    enabled=os.getenv("PRODUCTS_SYNC_ENABLED", "false").lower() == "true",
+    interval=float(os.getenv("PRODUCTS_SYNC_INTERVAL", "3600")),
+    concurrency=int(os.getenv("PRODUCTS_SYNC_CONCURRENCY", "4")),
+)
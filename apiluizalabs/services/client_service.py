@@ -1,6 +1,13 @@
+import os
+
+from apiluizalabs.models import favorites_from_ids
 from apiluizalabs.repositories.client_repository import ClientRepository
 from apiluizalabs.services.product_service import ProductService
 from apiluizalabs.utils.cache import LRUCacheTTL
+from apiluizalabs.utils.pagination import InvalidCursor, decode_cursor, encode_cursor
+
+# Clientes lidos por lote na exportacao
+EXPORT_BATCH_SIZE = int(os.getenv("CLIENTS_EXPORT_BATCH_SIZE", "1000"))
 
 
 class ClientService:
@@ -8,28 +15,77 @@ class ClientService:
         self.repository = ClientRepository()
         self.product_service = ProductService()
         # Inicializado o cache com capacidade para 512 clientes e TTL de 30 segundos
-        self.cache = LRUCacheTTL(capacity=512, ttl=30)
+        self.cache = LRUCacheTTL(capacity=512, ttl=30, name="clients")
 
-    def get_all_clients(self):
-        """Retorna todos os clientes"""
-        clients = self.repository.get_all()
-        return {"total": len(clients), "page": 1, "results": clients}
+    def _cache_put(self, email):
+        """Guarda no cache o registro publicado e a versao dele
 
-    def get_client(self, email):
-        """Retorna um cliente pelo email"""
-        # Tenta obter do cache primeiro
-        cached_client = self.cache.get(email)
-        if cached_client:
-            return cached_client
+        Versao e registro sao lidos juntos: com uma escrita concorrente o
+        cache nunca associa um registro antigo a versao nova.
+        """
+        version, client = self.repository.get_with_version(email)
+        if client is not None:
+            self.cache.put(email, (version, client))
+        return client
 
-        # Se não estiver no cache, busca no repositório
-        client = self.repository.get_by_email(email)
+    def get_all_clients(self, limit=50, cursor=None):
+        """Retorna uma pagina de clientes (paginacao por cursor)"""
+        position = decode_cursor(cursor) if cursor else {}
+        after, page = position.get("seq", 0), position.get("page", 1)
+        if not isinstance(after, int) or not isinstance(page, int):
+            raise InvalidCursor("Cursor invalido")
+
+        clients, last, has_more = self.repository.get_page(after, limit)
+        return {
+            "total": self.repository.count(),
+            "page": page,
+            "limit": limit,
+            "next": encode_cursor(seq=last, page=page + 1) if has_more else None,
+            "results": clients,
+        }
+
+    def export_clients(self, hydrate=False, batch_size=EXPORT_BATCH_SIZE):
+        """Gera os clientes para exportacao, em lotes
+
+        Com `hydrate`, os favoritos sao resolvidos em uma unica consulta em
+        lote por grupo de clientes (IDs repetidos no lote consultados uma vez).
+        A resposta ja foi iniciada quando os lotes sao gerados, entao falhas
+        da API de produtos nao interrompem a exportacao: os favoritos que nao
+        puderam ser resolvidos saem como {"id": ..., "unavailable": true}.
+        """
+        for batch in self.repository.iter_batches(batch_size):
+            if hydrate:
+                ids = list(
+                    dict.fromkeys(
+                        pid for client in batch for pid in client["favorites"]
+                    )
+                )
+                found, unavailable = self.product_service.lookup_products(ids)
+                products = dict(zip(ids, found))
+                for pid in unavailable:
+                    products[pid] = {"id": pid, "unavailable": True}
+                for client in batch:
+                    client["favorites"] = [
+                        products[pid]
+                        for pid in client["favorites"]
+                        if products[pid] is not None
+                    ]
+            yield from batch
+
+    def get_version(self, email):
+        """Retorna a versao atual do cliente (ETag); 0 se nao existe"""
+        return self.repository.get_version(email)
 
-        # Se encontrou, armazena no cache
-        if client:
-            self.cache.put(email, client)
+    def get_client(self, email):
+        """Retorna um cliente pelo email"""
+        # Tenta obter do cache primeiro (valido se o registro nao mudou desde
+        # entao, ex: favoritos alterados por outra rota)
+        cached = self.cache.get(email)
+        if cached and cached[0] == self.repository.get_version(email):
+            return cached[1]
 
-        return client
+        # Se não estiver no cache, busca no repositório (e armazena no cache)
+        return self._cache_put(email)
 
     def create_client(self, client_data):
         """Cria um novo cliente"""
@@ -46,36 +102,88 @@ class ClientService:
                 duplicates = [item for item in favorites if favorites.count(item) > 1]
                 return {"error": f"Produtos duplicados: {', '.join(duplicates)}"}
 
-            # Verificar se todos os produtos existem
-            non_existent = []
-            for product_id in favorites:
-                if not self.product_service.product_exists(product_id):
-                    non_existent.append(product_id)
+            # Verificar se todos os produtos existem (uma unica consulta por
+            # produto); o cliente guarda apenas os IDs
+            products = self.product_service.get_products(favorites)
+            non_existent = [
+                product_id
+                for product_id, product in zip(favorites, products)
+                if not product
+            ]
 
             if non_existent:
                 return {"error": f"Produtos nao encontrado: {', '.join(non_existent)}"}
 
-            # Substituir IDs por objetos de produto
-            product_objects = []
-            for product_id in favorites:
-                product = self.product_service.get_product(product_id)
-                if product:
-                    product_objects.append(product)
-
-            client_data["favorites"] = product_objects
+            client_data["favorites"] = favorites_from_ids(favorites)
         else:
-            client_data["favorites"] = []
+            client_data["favorites"] = favorites_from_ids(())
 
-        # Criar o cliente
+        # Criar o cliente (None se outro cliente com o email foi criado antes)
         client = self.repository.create(client_data)
+        if client is None:
+            return {"error": "Email existente, forneca outro email"}
 
         # Adiciona ao cache
-        self.cache.put(email, client)
+        self._cache_put(email)
 
         return client
 
-    def update_client(self, email, client_data):
-        """Atualiza um cliente existente"""
+    def bulk_create_clients(self, clients):
+        """Cria varios clientes; retorna o resultado de cada item, na ordem
+
+        Os IDs de produto de todo o lote sao deduplicados e validados uma
+        unica vez (consulta em lote) antes da insercao.
+        """
+        ids = list(
+            dict.fromkeys(pid for c in clients for pid in c.get("favorites") or ())
+        )
+        products = self.product_service.get_products(ids)
+        existing = {pid for pid, product in zip(ids, products) if product}
+
+        results = []
+        to_create = []
+        emails = set()
+        for client_data in clients:
+            email = client_data["email"]
+            favorites = client_data.get("favorites") or []
+            error = None
+            if email in emails or self.repository.email_exists(email):
+                error = "Email existente, forneca outro email"
+            elif len(favorites) != len(set(favorites)):
+                duplicates = dict.fromkeys(
+                    f for f in favorites if favorites.count(f) > 1
+                )
+                error = f"Produtos duplicados: {', '.join(duplicates)}"
+            else:
+                non_existent = [pid for pid in favorites if pid not in existing]
+                if non_existent:
+                    error = f"Produtos nao encontrado: {', '.join(non_existent)}"
+
+            if error:
+                results.append({"email": email, "status": "error", "error": error})
+                continue
+
+            emails.add(email)
+            client_data["favorites"] = favorites_from_ids(favorites)
+            result = {"email": email, "status": "created"}
+            to_create.append((result, client_data))
+            results.append(result)
+
+        created = self.repository.create_many([data for _, data in to_create])
+        created = {id(data) for data in created}
+        for result, data in to_create:
+            # Email criado por outra requisicao entre a validacao e a insercao
+            if id(data) not in created:
+                result["status"] = "error"
+                result["error"] = "Email existente, forneca outro email"
+        return results
+
+    def update_client(self, email, client_data, expected=None):
+        """Atualiza um cliente existente
+
+        `expected`: versoes aceitas do cliente (If-Match); com outra versao
+        levanta PreconditionFailed.
+        """
         # Verificar se o cliente existe
         if not self.repository.get_by_email(email):
             return None
@@ -93,36 +201,32 @@ class ClientService:
                 duplicates = [item for item in favorites if favorites.count(item) > 1]
                 return {"error": f"Produtos duplicados: {', '.join(duplicates)}"}
 
-            # Verificar se todos os produtos existem
-            non_existent = []
-            for product_id in favorites:
-                if not self.product_service.product_exists(product_id):
-                    non_existent.append(product_id)
+            # Verificar se todos os produtos existem (uma unica consulta por
+            # produto); o cliente guarda apenas os IDs
+            products = self.product_service.get_products(favorites)
+            non_existent = [
+                product_id
+                for product_id, product in zip(favorites, products)
+                if not product
+            ]
 
             if non_existent:
                 return {"error": f"Produtos nao encontrado: {', '.join(non_existent)}"}
 
-            # Substituir IDs por objetos de produto
-            product_objects = []
-            for product_id in favorites:
-                product = self.product_service.get_product(product_id)
-                if product:
-                    product_objects.append(product)
-
-            client_data["favorites"] = product_objects
+            client_data["favorites"] = favorites_from_ids(favorites)
 
         # Atualizar o cliente
-        updated_client = self.repository.update(email, client_data)
+        updated_client = self.repository.update(email, client_data, expected)
 
         # Invalidar cache do email antigo
         self.cache.invalidate(email)
 
         # Se o email foi alterado, adicionar ao cache com o novo email
         if updated_client and new_email and new_email != email:
-            self.cache.put(new_email, updated_client)
+            self._cache_put(new_email)
         # Caso contrário, atualizar o cache com o email atual
         elif updated_client:
-            self.cache.put(email, updated_client)
+            self._cache_put(email)
 
         return updated_client
 
@@ -1,6 +1,7 @@
 from apiluizalabs.repositories.client_repository import ClientRepository
 from apiluizalabs.repositories.favorite_repository import FavoriteRepository
 from apiluizalabs.services.product_service import ProductService
+from apiluizalabs.utils.etag import make_etag
 
 
 class FavoriteService:
@@ -9,48 +10,99 @@ class FavoriteService:
         self.client_repository = ClientRepository()
         self.product_service = ProductService()
 
+    def get_etag(self, email):
+        """ETag dos favoritos: versao do cliente + geracao dos produtos
+
+        Calculada sem ler nem resolver os favoritos; None se o cliente nao
+        existe. Deve ser lida antes dos favoritos: a ETag nunca e mais nova
+        que o corpo.
+        """
+        version, client = self.client_repository.get_with_version(email)
+        if client is None:
+            return None
+        return make_etag(version, self.product_service.generation())
+
     def get_favorites(self, email):
         """Retorna os produtos favoritos de um cliente"""
+        favorite_ids = self.repository.get_favorite_ids(email)
+        if favorite_ids is None:
+            return None
+
+        return self._resolve(favorite_ids)
+
+    def get_favorites_page(self, email, page=1, limit=50):
+        """Retorna uma pagina dos favoritos de um cliente
+
+        Apenas os produtos da pagina sao resolvidos na fonte de produtos.
+        """
+        result = self.repository.get_favorite_ids_page(email, (page - 1) * limit, limit)
+        if result is None:
+            return None
+
+        favorite_ids, total = result
+        return {
+            "total": total,
+            "page": page,
+            "limit": limit,
+            "has_more": page * limit < total,
+            "favorites": self._resolve(favorite_ids),
+        }
+
+    def add_favorite(self, email, product_id, expected=None):
+        """Adiciona um produto aos favoritos do cliente (If-Match: `expected`)"""
         # Verificar se o cliente existe
         client = self.client_repository.get_by_email(email)
         if not client:
             return None
 
-        favorites = self.repository.get_favorites(email, product_source="mock")
+        # Verificar se o produto existe
+        if not self.product_service.get_product(product_id):
+            return None
+
+        favorite_ids = self.repository.add_favorite(email, product_id, expected)
         # Garantir que sempre retorne uma lista, mesmo que vazia
-        if favorites is None:
-            favorites = []
+        if favorite_ids is None:
+            return []
 
-        return favorites
+        return self._resolve(favorite_ids)
 
-    def add_favorite(self, email, product_id):
-        """Adiciona um produto aos favoritos do cliente"""
+    def batch_update_favorites(self, email, add=(), remove=(), expected=None):
+        """Adiciona/remove varios produtos de uma vez; retorna o resultado por ID"""
         # Verificar se o cliente existe
         client = self.client_repository.get_by_email(email)
         if not client:
             return None
 
-        # Verificar se o produto existe
-        product = self.product_service.get_product(product_id)
-        if not product:
-            return None
+        # Uma unica consulta em lote para os produtos a adicionar
+        add_ids = list(dict.fromkeys(add))
+        products = self.product_service.get_products(add_ids)
+        valid_ids = {pid for pid, product in zip(add_ids, products) if product}
 
-        result = self.repository.add_favorite(email, product)
-        # Garantir que sempre retorne uma lista, mesmo que vazia
+        result = self.repository.batch_update(email, add, remove, valid_ids, expected)
         if result is None:
-            result = []
+            return None
 
-        return result
+        results, total = result
+        return {"total": total, "results": results}
 
-    def remove_favorite(self, email, product_id):
-        """Remove um produto dos favoritos do cliente"""
+    def remove_favorite(self, email, product_id, expected=None):
+        """Remove um produto dos favoritos do cliente (If-Match: `expected`)"""
         # Verificar se o cliente existe
         client = self.client_repository.get_by_email(email)
         if not client:
             return None
 
-        result = self.repository.remove_favorite(email, product_id)
-        if result is None:
+        favorite_ids = self.repository.remove_favorite(email, product_id, expected)
+        if favorite_ids is None:
             return None
 
-        return result
+        return self._resolve(favorite_ids)
+
+    def _resolve(self, favorite_ids):
+        """Resolve os IDs na tabela de produtos (mock, cache ou indice local)"""
+        # Na API externa os produtos vem do ProductService (cache compartilhado,
+        # single-flight e stale-while-revalidate); produtos que deixaram de
+        # existir ou indisponiveis na API (sem versao conhecida) sao omitidos.
+        # Com todos indisponiveis levanta ProductsUnavailable (503)
+        products = self.product_service.get_products(favorite_ids, partial=True)
+        return [product for product in products if product is not None]
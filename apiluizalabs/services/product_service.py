@@ -1,6 +1,64 @@
 import os
 
-from apiluizalabs.repositories.product_repository import ProductRepository
+from apiluizalabs.repositories.product_repository import (
+    ProductRepository,
+    ProductsUnavailable,
+)
+from apiluizalabs.services.catalog_service import catalog_sync
+from apiluizalabs.utils.background import BackgroundRefresher
+from apiluizalabs.utils.cache import LRUCacheTTL, ProductCache
+from apiluizalabs.utils.concurrency import bounded_map
+from apiluizalabs.utils.metrics import registry
+from apiluizalabs.utils.singleflight import SingleFlight
+
+# Cache de produtos compartilhado por todas as instancias do servico (processo)
+product_cache = ProductCache(
+    capacity=int(os.getenv("PRODUCTS_CACHE_CAPACITY", "10000")),
+    ttl=float(os.getenv("PRODUCTS_CACHE_TTL", "300")),
+    negative_ttl=float(os.getenv("PRODUCTS_CACHE_NEGATIVE_TTL", "30")),
+    stale_ttl=float(os.getenv("PRODUCTS_CACHE_STALE_TTL", "0")),
+    name="products",
+)
+# Ultima versao conhecida de cada produto (last-known-good), servida quando a
+# API falha ou o circuito esta aberto, depois que o item saiu do cache
+product_fallback = LRUCacheTTL(
+    capacity=int(os.getenv("PRODUCTS_FALLBACK_CAPACITY", "10000")),
+    ttl=float(os.getenv("PRODUCTS_FALLBACK_TTL", "86400")),
+    name="products-fallback",
+)
+# Buscas simultaneas do mesmo produto compartilham uma unica chamada ao upstream
+product_flight = SingleFlight()
+
+
+def _singleflight_metrics():
+    """Coletor das chamadas ao upstream economizadas pelo single-flight (/metrics)"""
+    stats = product_flight.stats()
+    yield (
+        "products_singleflight_calls_total",
+        "counter",
+        "Buscas de produto executadas no upstream (lider do single-flight)",
+        [({}, stats["calls"])],
+    )
+    yield (
+        "products_singleflight_shared_total",
+        "counter",
+        "Buscas que reaproveitaram uma chamada em andamento (chamadas economizadas)",
+        [({}, stats["shared"])],
+    )
+    yield (
+        "products_singleflight_in_flight",
+        "gauge",
+        "Buscas de produto em andamento no upstream",
+        [({}, stats["in_flight"])],
+    )
+
+
+registry.collector(_singleflight_metrics)
+# Atualizacoes em segundo plano de produtos stale (stale-while-revalidate)
+product_refresher = BackgroundRefresher(
+    max_workers=int(os.getenv("PRODUCTS_REFRESH_WORKERS", "2")),
+    max_pending=int(os.getenv("PRODUCTS_REFRESH_QUEUE", "1000")),
+)
 
 
 class ProductService:
@@ -8,6 +66,8 @@ class ProductService:
         source = os.getenv("PRODUCTS_SOURCE", "api")
         api_url = os.getenv("PRODUCTS_API_URL")
         self.repository = ProductRepository(source=source, api_url=api_url)
+        # No modo mock os produtos ja estao em memoria, o cache so vale p/ a API
+        self.cache = product_cache if source != "mock" else None
 
     def get_all_products(self):
         """Retorna todos os produtos"""
@@ -20,21 +80,162 @@ class ProductService:
 
     def get_product(self, product_id):
         """Retorna um produto pelo ID"""
+        if self.cache is None:
+            try:
+                return self.repository.get_by_id(product_id)
+            except Exception as e:
+                # Log do erro
+                print(f"Erro ao obter produto {product_id}: {str(e)}")
+                return None
+
+        found, product = self._get_cached(product_id)
+        if found:
+            return product
+
         try:
-            return self.repository.get_by_id(product_id)
+            return product_flight.do(product_id, self._fetch_product, product_id)
         except Exception as e:
-            # Log do erro
-            print(f"Erro ao obter produto {product_id}: {str(e)}")
-            return None
+            # Erros nao sao armazenados no cache
+            return self._fallback(product_id, e)
+
+    async def get_product_async(self, product_id):
+        """Retorna um produto pelo ID (para uso a partir de codigo async)"""
+        if self.cache is None:
+            return self.get_product(product_id)
+
+        found, product = self._get_cached(product_id)
+        if found:
+            return product
 
-    def product_exists(self, product_id):
-        """Verifica se um produto existe"""
         try:
-            return self.repository.exists(product_id)
+            return await product_flight.do_async(
+                product_id, self._fetch_product, product_id
+            )
         except Exception as e:
-            # Log do erro
-            print(f"Erro ao verificar produto {product_id}: {str(e)}")
-            return False
+            # Erros nao sao armazenados no cache
+            return self._fallback(product_id, e)
+
+    def get_products(self, product_ids, partial=False):
+        """Retorna os produtos de uma lista de IDs, na mesma ordem (None se nao existe)
+
+        Com a API indisponivel (produto sem versao conhecida) levanta
+        ProductsUnavailable. Com `partial` os IDs indisponiveis voltam como
+        None, como os inexistentes, e o erro so e levantado se nenhum ID
+        pode ser resolvido (leituras: um produto indisponivel nao derruba a
+        lista inteira).
+        """
+        products, unavailable = self.lookup_products(product_ids)
+        if unavailable and (not partial or len(unavailable) == len(set(product_ids))):
+            raise next(iter(unavailable.values()))
+        return products
+
+    def lookup_products(self, product_ids):
+        """Retorna (produtos na ordem dos IDs, {ID: erro} dos indisponiveis)
+
+        Cada ID e resolvido de forma independente: a falha de um nao impede
+        os demais. Os indisponiveis voltam como None na lista de produtos.
+        """
+        if self.cache is None:
+            return self.repository.get_many(product_ids), {}
+
+        products = {}
+        missing = []
+        for product_id in product_ids:
+            found, product = self._get_cached(product_id)
+            if found:
+                products[product_id] = product
+            else:
+                missing.append(product_id)
+
+        # Apenas os IDs fora do cache vao ao upstream, em paralelo
+        missing = list(dict.fromkeys(missing))
+        fetched = bounded_map(
+            self._get_product_or_error, missing, self.repository.max_concurrency
+        )
+        unavailable = {}
+        for product_id, product in zip(missing, fetched):
+            if isinstance(product, ProductsUnavailable):
+                unavailable[product_id], product = product, None
+            products[product_id] = product
+        return [products.get(product_id) for product_id in product_ids], unavailable
+
+    def _get_product_or_error(self, product_id):
+        try:
+            return self.get_product(product_id)
+        except ProductsUnavailable as e:
+            return e
+
+    def _get_cached(self, product_id):
+        """Consulta o indice local e o cache, agendando atualizacao se stale"""
+        if catalog_sync.ready:
+            # IDs fora do indice (mais novos que a ultima sincronizacao) seguem
+            # para o cache e, em ultimo caso, para o upstream
+            product = catalog_sync.get(product_id)
+            if product is not None:
+                return True, product
+
+        found, product, stale = self.cache.lookup(product_id)
+        if stale:
+            product_refresher.submit(product_id, self._refresh_product, product_id)
+        return found, product
+
+    def _refresh_product(self, product_id):
+        # Compartilha a chamada com buscas simultaneas do mesmo produto
+        product_flight.do(product_id, self._fetch_product, product_id)
+
+    def _fetch_product(self, product_id):
+        """Busca o produto no upstream e armazena no cache (inclusive inexistente)"""
+        product = self.repository.get_by_id(product_id)
+        known = product_fallback.get(product_id)
+        if known is not None and known != product:
+            # Alterado (ou removido) no upstream desde a ultima busca
+            self.cache.changed()
+        self.cache.put(product_id, product)
+        if product is None:
+            product_fallback.invalidate(product_id)
+        else:
+            product_fallback.put(product_id, product)
+        return product
+
+    def _fallback(self, product_id, error):
+        """Ultima versao conhecida do produto quando a API falha
+
+        Sem versao conhecida levanta ProductsUnavailable: o produto pode
+        existir, entao nao e tratado como inexistente.
+        """
+        # Log do erro
+        print(f"Erro ao obter produto {product_id}: {str(error)}")
+        product = product_fallback.get(product_id)
+        if product is not None:
+            return product
+        if isinstance(error, ProductsUnavailable):
+            raise error
+        raise ProductsUnavailable(f"Erro ao obter produto {product_id}") from error
+
+    def product_exists(self, product_id):
+        """Verifica se um produto existe"""
+        if self.cache is not None:
+            # Responde a partir do detalhe em cache (ou busca e armazena);
+            # com a API indisponivel levanta ProductsUnavailable
+            return self.get_product(product_id) is not None
+
+        return self.repository.exists(product_id)
+
+    def generation(self):
+        """Geracao do conteudo dos produtos (compoe a ETag dos favoritos)
+
+        Muda quando o conteudo de um produto conhecido muda: no cache
+        (detectado na nova busca ao upstream, ou invalidacao) ou no indice
+        do catalogo. No modo mock os produtos nao sao alterados.
+        """
+        if self.cache is None:
+            return 0
+        return self.cache.generation + catalog_sync.generation
+
+    def invalidate_product(self, product_id):
+        """Remove um produto do cache (ex: apos alteracao no upstream)"""
+        if self.cache is not None:
+            self.cache.invalidate(product_id)
 
     def create_mock_products(self, total):
         """Cria produtos mockados (apenas para testes)"""
@@ -0,0 +1,65 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Hashable, Optional, Set
+
+
+class BackgroundRefresher:
+    """Executa atualizacoes em segundo plano com workers e fila limitados
+
+    Cada chave fica no maximo uma vez na fila; com a fila cheia novas
+    atualizacoes sao descartadas (o valor stale continua sendo servido).
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Set[Hashable] = set()
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def submit(self, key: Hashable, fn: Callable, *args) -> bool:
+        """Agenda fn(*args); retorna False se ja agendado ou fila cheia"""
+        with self._lock:
+            if key in self._pending:
+                return False
+            if len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                return False
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="refresh"
+                )
+            self._pending.add(key)
+            self.submitted += 1
+            executor = self._executor
+        executor.submit(self._run, key, fn, *args)
+        return True
+
+    def _run(self, key: Hashable, fn: Callable, *args) -> None:
+        try:
+            fn(*args)
+        except Exception as e:
+            # Log do erro
+            self.failed += 1
+            print(f"Erro na atualizacao em segundo plano de {key}: {str(e)}")
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+
+    def shutdown(self, wait: bool = False) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._pending.clear()
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": len(self._pending),
+            "submitted": self.submitted,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
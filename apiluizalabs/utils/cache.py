@@ -1,44 +1,344 @@
+import hashlib
+import heapq
+import itertools
+import os
+import threading
 import time
+import weakref
 from collections import OrderedDict
-from typing import Any, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
+
+# Caches nomeados do processo (para estatisticas e varredura de expirados).
+# Referencias fracas: instancias descartadas saem do registro sozinhas.
+caches: "weakref.WeakValueDictionary[str, Any]" = weakref.WeakValueDictionary()
+
+
+def register_cache(name: str, cache: Any) -> None:
+    """Registra um cache pelo nome (mantem o primeiro registrado, se vivo)"""
+    caches.setdefault(name, cache)
+
+
+def caches_stats() -> Dict[str, Dict]:
+    """Retorna as estatisticas de todos os caches registrados"""
+    return {name: cache.stats() for name, cache in sorted(caches.items())}
+
+
+def sweep_caches(sample: int = 64) -> int:
+    """Varre os caches registrados removendo expirados; retorna o total"""
+    return sum(cache.sweep(sample) for cache in list(caches.values()))
 
 
 class LRUCacheTTL:
-    def __init__(self, capacity: int, ttl: float):
+    # Thread-safe: as rotas sync rodam no threadpool e get/put alteram a ordem
+    # do OrderedDict. Usa relogio monotonico (imune a ajustes do relogio).
+    # Os itens tambem ficam em um heap por prazo de expiracao, usado pela
+    # varredura: com TTLs diferentes (ex: cache negativo) os expirados nao
+    # ficam no inicio da ordem LRU. Entradas do heap de itens ja removidos ou
+    # atualizados sao descartadas ao sair do heap (remocao preguicosa).
+
+    def __init__(self, capacity: int, ttl: float, name: Optional[str] = None):
         self.capacity = capacity
         self.ttl = ttl
-        # key (chave) -> (value, timestamp)
-        self.data: OrderedDict[str, Tuple[Any, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        # key (chave) -> (value, timestamp, ttl do item ou None p/ usar o padrao)
+        self.data: OrderedDict[str, Tuple[Any, float, Optional[float]]] = OrderedDict()
+        # (prazo, ordem de insercao, key, timestamp do item)
+        self._expiry: List[Tuple[float, int, Any, float]] = []
+        self._counter = itertools.count()
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        if name:
+            register_cache(name, self)
 
-    def _is_expired(self, timestamp: float) -> bool:
-        return (time.time() - timestamp) > self.ttl
+    def _is_expired(
+        self, timestamp: float, ttl: Optional[float] = None, now: Optional[float] = None
+    ) -> bool:
+        now = time.monotonic() if now is None else now
+        return (now - timestamp) > (self.ttl if ttl is None else ttl)
 
     def get(self, key: str) -> Optional[Any]:
-        if key not in self.data:
-            return None
-        value, ts = self.data[key]
-        if self._is_expired(ts):
-            # Remove itns expirados
-            self.data.pop(key)
-            return None
-        # Move para o fim os mais recentes usados
-        self.data.move_to_end(key)
-        return value
-
-    def put(self, key: str, value: Any) -> None:
-        now = time.time()
-        if key in self.data:
-            # Atualiza existente
+        entry = self.get_with_age(key)
+        return None if entry is None else entry[0]
+
+    def get_with_age(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Retorna (valor, idade em segundos) ou None se ausente/expirado"""
+        now = time.monotonic()
+        with self._lock:
+            if key not in self.data:
+                self.misses += 1
+                return None
+            value, ts, ttl = self.data[key]
+            if self._is_expired(ts, ttl, now):
+                # Remove itns expirados
+                self.data.pop(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            # Move para o fim os mais recentes usados
             self.data.move_to_end(key)
-            self.data[key] = (value, now)
-        else:
-            if len(self.data) >= self.capacity:
-                # Remove os recentes menos usados
-                self.data.popitem(last=False)
-            self.data[key] = (value, now)
+            self.hits += 1
+            return value, now - ts
+
+    def put(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if key in self.data:
+                # Atualiza existente
+                self.data.move_to_end(key)
+                self.data[key] = (value, now, ttl)
+            else:
+                if len(self.data) >= self.capacity:
+                    # Antes de descartar um item valido, tenta liberar espaco
+                    # com os expirados de prazo mais antigo
+                    if not self._sweep(16, now):
+                        # Remove os recentes menos usados
+                        self.data.popitem(last=False)
+                        self.evictions += 1
+                self.data[key] = (value, now, ttl)
+            self._schedule(key, now, ttl)
+
+    def _schedule(self, key: Any, ts: float, ttl: Optional[float]) -> None:
+        # Chamado com o lock adquirido
+        deadline = ts + (self.ttl if ttl is None else ttl)
+        heapq.heappush(self._expiry, (deadline, next(self._counter), key, ts))
+        if len(self._expiry) > 2 * len(self.data) + 64:
+            # Muitas entradas obsoletas (itens lidos apos expirar, atualizados
+            # ou removidos): reconstroi o heap apenas com os itens atuais
+            self._expiry = [
+                (t + (self.ttl if i is None else i), next(self._counter), k, t)
+                for k, (_, t, i) in self.data.items()
+            ]
+            heapq.heapify(self._expiry)
+
+    def sweep(self, sample: int = 64) -> int:
+        """Remove expirados examinando ate `sample` itens; retorna removidos
+
+        Varredura incremental pelo heap de prazos: examina apenas itens cujo
+        prazo ja passou, independente da posicao na ordem LRU, em rodadas de
+        ate `sample` entradas (o lock e liberado entre as rodadas), com
+        trabalho limitado por chamada.
+        """
+        now = time.monotonic()
+        removed = 0
+        for _ in range(16):
+            with self._lock:
+                expired = self._sweep(sample, now)
+                done = not self._expiry or self._expiry[0][0] >= now
+            removed += expired
+            if done:
+                break
+        return removed
+
+    def _sweep(self, sample: int, now: float) -> int:
+        # Chamado com o lock adquirido: examina ate `sample` entradas vencidas
+        expired = 0
+        for _ in range(sample):
+            if not self._expiry or self._expiry[0][0] >= now:
+                break
+            _, _, key, ts = heapq.heappop(self._expiry)
+            entry = self.data.get(key)
+            if entry is None or entry[1] != ts:
+                continue  # Item ja removido ou atualizado
+            if self._is_expired(ts, entry[2], now):
+                del self.data[key]
+                expired += 1
+            else:
+                # TTL padrao aumentado depois da insercao: novo prazo
+                self._schedule(key, ts, entry[2])
+        self.expirations += expired
+        return expired
 
     def invalidate(self, key: str) -> None:
-        self.data.pop(key, None)
+        with self._lock:
+            self.data.pop(key, None)
 
     def clear(self) -> None:
-        self.data.clear()
+        with self._lock:
+            self.data.clear()
+            self._expiry.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.data),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "expirations": self.expirations,
+            "evictions": self.evictions,
+        }
+
+
+# Marcador para produtos que nao existem (cache negativo)
+_NOT_FOUND = object()
+
+
+class ProductCache:
+    """Cache de detalhes de produtos com cache negativo para IDs inexistentes
+
+    Com stale_ttl > 0 funciona em modo stale-while-revalidate: apos o ttl o
+    produto ainda e retornado (marcado como stale) por mais stale_ttl segundos,
+    para que a atualizacao seja feita em segundo plano.
+
+    `generation` muda sempre que o conteudo de um produto ja conhecido muda
+    (compoe a ETag dos favoritos, sem resolver os produtos).
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        ttl: float,
+        negative_ttl: float,
+        stale_ttl: float = 0,
+        name: Optional[str] = None,
+    ):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = negative_ttl
+        # Os itens ficam no LRU ate o fim da janela stale (TTL "hard")
+        self.cache = LRUCacheTTL(capacity=capacity, ttl=ttl + stale_ttl)
+        self.stale_hits = 0
+        self.generation = 0
+        if name:
+            register_cache(name, self)
+
+    def get(self, product_id: str) -> Tuple[bool, Optional[Dict]]:
+        """Retorna (encontrado no cache, produto ou None se nao existe)"""
+        found, product, _ = self.lookup(product_id)
+        return found, product
+
+    def lookup(self, product_id: str) -> Tuple[bool, Optional[Dict], bool]:
+        """Retorna (encontrado no cache, produto ou None, precisa atualizar)"""
+        entry = self.cache.get_with_age(product_id)
+        if entry is None:
+            return False, None, False
+        value, age = entry
+        if value is _NOT_FOUND:
+            return True, None, False
+        stale = age > self.ttl
+        if stale:
+            self.stale_hits += 1
+        return True, value, stale
+
+    def put(self, product_id: str, product: Optional[Dict]) -> None:
+        """Armazena o produto, ou o marcador de inexistente se for None"""
+        if product is None:
+            self.cache.put(product_id, _NOT_FOUND, ttl=self.negative_ttl)
+        else:
+            self.cache.put(product_id, product)
+
+    def changed(self) -> None:
+        """Registra a alteracao do conteudo de um produto"""
+        # Incrementos concorrentes podem se sobrepor: o valor ainda muda
+        self.generation += 1
+
+    def invalidate(self, product_id: str) -> None:
+        self.cache.invalidate(product_id)
+        self.changed()
+
+    def clear(self) -> None:
+        self.cache.clear()
+        self.changed()
+
+    def sweep(self, sample: int = 64) -> int:
+        return self.cache.sweep(sample)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.cache.stats(),
+            "stale_hits": self.stale_hits,
+            "generation": self.generation,
+        }
+
+
+class TokenCache:
+    """Cache de tokens ja verificados (hash do token -> usuario)
+
+    Cada token fica no cache ate o seu `exp`, com remocao LRU ao atingir a
+    capacidade. A chave e o SHA-256 do token, entao o token em si nao fica
+    em memoria. Apenas tokens validos sao armazenados.
+    """
+
+    def __init__(self, capacity: int, name: Optional[str] = None):
+        self.capacity = capacity
+        self.cache = LRUCacheTTL(capacity=max(capacity, 1), ttl=0)
+        if name:
+            register_cache(name, self)
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[str]:
+        """Retorna o usuario do token verificado (None se ausente/expirado)"""
+        if self.capacity <= 0:
+            return None
+        return self.cache.get(self._key(token))
+
+    def put(self, token: str, username: str, exp: Optional[float]) -> None:
+        """Armazena um token valido ate o seu exp (tokens sem exp nao entram)"""
+        if self.capacity <= 0 or exp is None:
+            return
+        ttl = exp - time.time()
+        if ttl > 0:
+            self.cache.put(self._key(token), username, ttl=ttl)
+
+    def clear(self) -> None:
+        self.cache.clear()
+
+    def sweep(self, sample: int = 64) -> int:
+        return self.cache.sweep(sample)
+
+    def stats(self) -> Dict[str, Any]:
+        return self.cache.stats()
+
+
+class CacheSweeper:
+    """Varredura periodica dos expirados de todos os caches registrados
+
+    Sem a varredura, itens expirados so saem do cache quando sao lidos e
+    ocupam a capacidade ate la, empurrando itens validos para fora.
+    """
+
+    def __init__(self, interval: float, sample: int = 64):
+        self.interval = interval
+        self.sample = sample
+        self.runs = 0
+        self.removed = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Inicia a varredura em segundo plano (interval <= 0 desabilita)"""
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="cache-sweeper", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.run_once()
+
+    def run_once(self) -> int:
+        removed = sweep_caches(self.sample)
+        self.runs += 1
+        self.removed += removed
+        return removed
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+cache_sweeper = CacheSweeper(
+    interval=float(os.getenv("CACHE_SWEEP_INTERVAL", "1")),
+    sample=int(os.getenv("CACHE_SWEEP_SAMPLE", "64")),
+)
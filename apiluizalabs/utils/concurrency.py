@@ -0,0 +1,81 @@
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Threads do pool compartilhado por todas as chamadas de bounded_map
+POOL_SIZE = int(os.getenv("CONCURRENCY_POOL_SIZE", "32"))
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Pool de threads do processo (criado no primeiro uso)"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=POOL_SIZE, thread_name_prefix="bounded-map"
+            )
+        return _executor
+
+
+def shutdown_executor() -> None:
+    """Encerra o pool compartilhado (shutdown da aplicacao)"""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+def bounded_map(fn: Callable[[T], R], items: Iterable[T], concurrency: int) -> List[R]:
+    """Aplica fn a cada item com no maximo `concurrency` execucoes simultaneas
+
+    Os resultados mantem a ordem dos itens de entrada; se alguma chamada
+    falhar, a excecao do primeiro item com erro e levantada. As execucoes
+    usam o pool compartilhado (limitado a CONCURRENCY_POOL_SIZE threads no
+    processo, sem criar threads por chamada). A thread chamadora tambem
+    consome os itens: com o pool ocupado (ou em chamadas aninhadas) a
+    chamada avanca sozinha, e as tarefas que nao chegaram a iniciar sao
+    canceladas. Como no threadpool do anyio, fn executa com uma copia dos
+    contextvars da chamadora (ex: o profiler da requisicao).
+    """
+    items = list(items)
+    if len(items) <= 1 or concurrency <= 1:
+        return [fn(item) for item in items]
+
+    results: List = [None] * len(items)
+    errors: Dict[int, BaseException] = {}
+    indexes = iter(range(len(items)))
+    lock = threading.Lock()
+    parent = contextvars.copy_context()
+
+    def work():
+        # Um contexto por thread (um Context nao pode ser executado em duas
+        # threads ao mesmo tempo)
+        context = parent.copy()
+        while True:
+            with lock:
+                i = next(indexes, None)
+            if i is None:
+                return
+            try:
+                results[i] = context.run(fn, items[i])
+            except BaseException as exc:
+                errors[i] = exc
+
+    executor = get_executor()
+    futures = [executor.submit(work) for _ in range(min(concurrency, len(items)) - 1)]
+    work()
+    for future in futures:
+        if not future.cancel():
+            future.result()
+    if errors:
+        raise errors[min(errors)]
+    return results
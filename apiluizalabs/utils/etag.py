@@ -0,0 +1,61 @@
+"""ETags fortes a partir das versoes dos registros de clientes
+
+Cada publicacao de um cliente no store (criacao, alteracao, favoritos)
+recebe uma versao nova (contador global, nunca reutilizado no processo).
+A ETag e "<epoca>.<versao>[.<extras>]": a epoca e sorteada no inicio do
+processo, entao ETags emitidas antes de um restart (versoes recomecam) nao
+sao aceitas depois dele.
+
+- GET: If-None-Match com a ETag atual responde 304 sem hidratar os
+  favoritos e sem serializar o corpo. Nos favoritos a ETag inclui a geracao
+  do conteudo dos produtos (ProductService.generation), que muda quando um
+  produto conhecido muda.
+- Alteracoes: If-Match com uma ETag antiga responde 412 (a comparacao e
+  feita pelo repositorio com o lock do cliente, atomica com a escrita).
+"""
+
+import secrets
+from typing import Optional, Set
+
+from starlette.responses import Response
+
+EPOCH = secrets.token_hex(4)
+
+
+def make_etag(version: int, *extras) -> str:
+    """ETag forte da versao do cliente (extras: ex. geracao dos produtos)"""
+    return '"' + ".".join([EPOCH, str(version), *map(str, extras)]) + '"'
+
+
+def _tags(header: str):
+    # Comparacao fraca (If-None-Match): W/"x" equivale a "x"
+    return [tag.strip().removeprefix("W/") for tag in header.split(",")]
+
+
+def not_modified(if_none_match: Optional[str], etag: str) -> Optional[Response]:
+    """Resposta 304 se o If-None-Match inclui a ETag atual (senao None)"""
+    if not if_none_match:
+        return None
+    if if_none_match.strip() == "*" or etag in _tags(if_none_match):
+        return Response(status_code=304, headers={"ETag": etag})
+    return None
+
+
+def expected_versions(if_match: Optional[str]) -> Optional[Set[int]]:
+    """Versoes aceitas pelo If-Match (None: sem pre-condicao)
+
+    ETags de outra epoca ou invalidas nao correspondem a versao alguma, e
+    If-Match com ETag fraca nunca e satisfeito (comparacao forte).
+    """
+    if not if_match or if_match.strip() == "*":
+        return None
+    versions = set()
+    for tag in if_match.split(","):
+        tag = tag.strip()
+        if not (tag.startswith('"') and tag.endswith('"')):
+            continue
+        epoch, _, rest = tag[1:-1].partition(".")
+        version = rest.partition(".")[0]
+        if epoch == EPOCH and version.isdigit():
+            versions.add(int(version))
+    return versions
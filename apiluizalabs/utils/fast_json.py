@@ -0,0 +1,111 @@
+"""Respostas JSON sem a validacao redundante do response_model
+
+Por padrao o FastAPI valida o retorno de cada rota contra o response_model
+(ClientOut, FavoritesListOut, ProductOut...), converte o resultado com o
+jsonable_encoder e so entao serializa com json.dumps. Os dados das rotas ja
+vem dos repositorios no formato esperado, entao a validacao refaz um
+trabalho ja feito e, em listas grandes de favoritos, e o maior custo de CPU
+da requisicao.
+
+Com FAST_JSON_ENABLED=true as rotas retornam FastJSONResponse: o conteudo e
+projetado nos campos do modelo (serializador pre-computado por modelo, com
+os defaults e sem campos extras, como o response_model faria) e serializado
+direto em bytes pelo pydantic_core.to_json. O response_model continua na
+rota para a documentacao (OpenAPI).
+"""
+
+import os
+from functools import lru_cache
+from inspect import isclass
+from typing import Any, Callable, Optional, Type, Union, get_args, get_origin
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from pydantic_core import to_json
+
+FAST_JSON_ENABLED = os.getenv("FAST_JSON_ENABLED", "false").lower() == "true"
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse serializada pelo pydantic_core (sem jsonable_encoder)"""
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
+
+
+@lru_cache(maxsize=None)
+def _compile(annotation) -> Optional[Callable[[Any], Any]]:
+    """Serializador de um tipo (None quando o valor e usado como esta)"""
+    if isclass(annotation) and issubclass(annotation, BaseModel):
+        return serializer(annotation)
+    origin, args = get_origin(annotation), get_args(annotation)
+    if origin is list and args:
+        item = _compile(args[0])
+        if item is not None:
+            return lambda values: [item(value) for value in values]
+    if origin is Union:
+        types = [arg for arg in args if arg is not type(None)]
+        inner = _compile(types[0]) if len(types) == 1 else None
+        if inner is not None:
+            return lambda value: None if value is None else inner(value)
+    return None
+
+
+@lru_cache(maxsize=None)
+def serializer(model: Type[BaseModel]) -> Callable[[Any], Any]:
+    """Projeta um dict nos campos do modelo (defaults aplicados, extras fora)
+
+    Campo obrigatorio ausente levanta KeyError (ver `respond`).
+    """
+    fields = [
+        (
+            name,
+            info.is_required(),
+            None if info.is_required() else info.get_default(call_default_factory=True),
+            _compile(info.annotation),
+        )
+        for name, info in model.model_fields.items()
+    ]
+
+    def project(value):
+        if isinstance(value, BaseModel):
+            return value
+        out = {}
+        for name, required, default, inner in fields:
+            if required:
+                item = value[name]
+            else:
+                item = value.get(name, default)
+            out[name] = item if inner is None or item is None else inner(item)
+        return out
+
+    return project
+
+
+def respond(
+    model: Any,
+    content: Any,
+    status_code: int = 200,
+    response: Optional[Response] = None,
+):
+    """Retorna o conteudo da rota, pelo caminho rapido quando habilitado
+
+    `model` e o response_model da rota (ex: ClientOut, list[ProductOut]) ou
+    None p/ conteudo serializado como esta. Desabilitado, o conteudo segue
+    para a validacao do response_model. `response` e o Response injetado na
+    rota: os headers definidos nele (ex: ETag) vao tambem na resposta rapida.
+    Conteudo fora do formato do modelo (ex: campo obrigatorio ausente) tambem
+    segue para a validacao, que responde o mesmo erro do caminho padrao.
+    """
+    if not FAST_JSON_ENABLED:
+        return content
+    project = _compile(model) if model is not None else None
+    if project is not None:
+        try:
+            projected = project(content)
+        except (KeyError, TypeError, AttributeError):
+            return content
+        content = projected
+    headers = dict(response.headers) if response is not None else None
+    return FastJSONResponse(content, status_code=status_code, headers=headers)
@@ -0,0 +1,82 @@
+import os
+import threading
+from typing import Optional
+
+import httpx
+
+# Cliente HTTP compartilhado (um por processo) para a API de produtos.
+# Mantem o pool de conexoes (keep-alive) e o header de autorizacao montado
+# uma unica vez, evitando um handshake TCP+TLS novo a cada chamada.
+_client: Optional[httpx.Client] = None
+_lock = threading.Lock()
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _build_client(transport: Optional[httpx.BaseTransport] = None) -> httpx.Client:
+    """Cria o cliente HTTP a partir das variaveis de ambiente"""
+    headers = {}
+    api_auth = os.getenv("PRODUCTS_API_AUTHORIZATION")
+    if api_auth:
+        headers["Authorization"] = f"Bearer {api_auth}"
+
+    limits = httpx.Limits(
+        max_connections=int(os.getenv("PRODUCTS_API_MAX_CONNECTIONS", "100")),
+        max_keepalive_connections=int(os.getenv("PRODUCTS_API_MAX_KEEPALIVE", "20")),
+        keepalive_expiry=float(os.getenv("PRODUCTS_API_KEEPALIVE_EXPIRY", "30")),
+    )
+    # O timeout de leitura vale tambem para escrita e espera por conexao do pool
+    timeout = httpx.Timeout(
+        float(os.getenv("PRODUCTS_API_READ_TIMEOUT", "5")),
+        connect=float(os.getenv("PRODUCTS_API_CONNECT_TIMEOUT", "2")),
+    )
+
+    http2 = os.getenv("PRODUCTS_API_HTTP2", "false").lower() == "true"
+    if http2 and not _http2_available():
+        print(
+            "HTTP/2 desabilitado: pacote 'h2' nao instalado (pip install httpx[http2])"
+        )
+        http2 = False
+
+    return httpx.Client(
+        headers=headers,
+        limits=limits,
+        timeout=timeout,
+        http2=http2,
+        transport=transport,
+    )
+
+
+def get_http_client() -> httpx.Client:
+    """Retorna o cliente HTTP compartilhado, criando-o na primeira chamada"""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = _build_client()
+    return _client
+
+
+def init_http_client(transport: Optional[httpx.BaseTransport] = None) -> httpx.Client:
+    """Recria o cliente compartilhado (ex: com outro transport em testes)"""
+    global _client
+    with _lock:
+        if _client is not None:
+            _client.close()
+        _client = _build_client(transport=transport)
+    return _client
+
+
+def close_http_client() -> None:
+    """Fecha o pool de conexoes (chamado no shutdown da aplicacao)"""
+    global _client
+    with _lock:
+        if _client is not None:
+            _client.close()
+            _client = None
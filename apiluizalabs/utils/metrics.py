@@ -0,0 +1,299 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from apiluizalabs.utils.cache import caches_stats
+
+# Buckets (segundos) dos histogramas de latencia
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    """Base das metricas: registro sem lock, agregacao em lote
+
+    Registrar um valor e apenas um append em uma deque (operacao atomica no
+    CPython, sem lock no caminho da requisicao). Os valores pendentes sao
+    agregados sob lock na leitura/exportacao ou a cada DRAIN_THRESHOLD
+    registros, o que limita a memoria usada entre duas coletas.
+    """
+
+    type = ""
+    DRAIN_THRESHOLD = 1024
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._pending: deque = deque()
+
+    def _record(self, labels: Tuple[str, ...], value: float) -> None:
+        self._pending.append((labels, value))
+        if len(self._pending) >= self.DRAIN_THRESHOLD:
+            self._drain()
+
+    def _drain(self) -> None:
+        with self._lock:
+            pending = self._pending
+            for _ in range(len(pending)):
+                self._apply(*pending.popleft())
+
+    def _apply(self, labels: Tuple[str, ...], value: float) -> None:
+        raise NotImplementedError
+
+    def header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+
+
+class Counter(_Metric):
+    """Contador monotonico (por combinacao de labels)"""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._record(labels, amount)
+
+    def _apply(self, labels: Tuple[str, ...], value: float) -> None:
+        self._values[labels] = self._values.get(labels, 0) + value
+
+    def value(self, *labels: str) -> float:
+        self._drain()
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        self._drain()
+        lines = self.header()
+        for labels, value in sorted(self._values.items()):
+            lines.append(
+                f"{self.name}{_format_labels(self.label_names, labels)} "
+                f"{_format_value(value)}"
+            )
+        return lines
+
+
+class Gauge(Counter):
+    """Valor que sobe e desce (ex: requisicoes em andamento)"""
+
+    type = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self._record(labels, -amount)
+
+
+class Histogram(_Metric):
+    """Histograma com buckets fixos (contagem por bucket, soma e total)
+
+    A busca do bucket (binaria) e os valores acumulados do formato
+    Prometheus sao calculados na agregacao, fora do caminho da requisicao.
+    """
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Iterable[str] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [contagem por bucket (+ o bucket +Inf), soma, total]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        self._record(labels, value)
+
+    def _apply(self, labels: Tuple[str, ...], value: float) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def count(self, *labels: str) -> int:
+        self._drain()
+        series = self._series.get(labels)
+        return series[2] if series else 0
+
+    def render(self) -> List[str]:
+        self._drain()
+        lines = self.header()
+        with self._lock:
+            items = sorted(
+                (labels, list(counts), total, count)
+                for labels, (counts, total, count) in self._series.items()
+            )
+        names = self.label_names + ("le",)
+        for labels, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                label_str = _format_labels(names, labels + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{label_str} {cumulative}")
+            label_str = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_str} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_str} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Registro das metricas do processo, exportadas no formato texto do Prometheus
+
+    Alem das metricas registradas, aceita coletores: funcoes chamadas na
+    exportacao que retornam (nome, tipo, descricao, [(labels, valor)]), para
+    valores que ja sao contados em outro lugar (ex: estatisticas dos caches).
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple]]] = []
+
+    def _register(self, metric: _Metric) -> _Metric:
+        # Reutiliza a metrica ja registrada com o mesmo nome
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labels=()) -> Counter:
+        return self._register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels=()) -> Gauge:
+        return self._register(Gauge(name, documentation, labels))
+
+    def histogram(
+        self, name: str, documentation: str, labels=(), buckets=DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def collector(self, func: Callable[[], Iterable[Tuple]]) -> None:
+        self._collectors.append(func)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        for collect in self._collectors:
+            for name, type_, documentation, samples in collect():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {type_}")
+                for labels, value in samples:
+                    label_str = _format_labels(tuple(labels), tuple(labels.values()))
+                    lines.append(f"{name}{label_str} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Registro do processo
+registry = MetricsRegistry()
+
+http_requests = registry.histogram(
+    "http_request_duration_seconds",
+    "Latencia das requisicoes HTTP por rota",
+    labels=("method", "route", "status"),
+)
+http_in_flight = registry.gauge(
+    "http_requests_in_flight", "Requisicoes HTTP em andamento", labels=("method",)
+)
+upstream_requests = registry.histogram(
+    "products_api_request_duration_seconds",
+    "Latencia das chamadas a API de produtos por operacao e status",
+    labels=("operation", "status"),
+)
+
+
+def observe_upstream(operation: str, started: float, status: str) -> None:
+    """Registra uma chamada a API de produtos iniciada em `started`"""
+    upstream_requests.observe(time.perf_counter() - started, operation, status)
+
+
+def _route_label(scope) -> str:
+    # Template da rota (ex: /clients/{email}) p/ nao criar uma serie por URL
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """Middleware ASGI que mede latencia e requisicoes em andamento por rota
+
+    Middleware ASGI puro (sem BaseHTTPMiddleware), para que o custo por
+    requisicao seja apenas o de duas leituras do relogio e das metricas.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = ["500"]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = str(message["status"])
+            await send(message)
+
+        http_in_flight.inc(method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_requests.observe(
+                time.perf_counter() - started, method, _route_label(scope), status[0]
+            )
+            http_in_flight.dec(method)
+
+
+def _cache_metrics():
+    """Coletor com os contadores dos caches nomeados (clients, products, ...)"""
+    stats = caches_stats()
+    for key, type_, documentation in (
+        ("hits", "counter", "Leituras encontradas no cache"),
+        ("misses", "counter", "Leituras nao encontradas (ou expiradas) no cache"),
+        ("expirations", "counter", "Itens removidos do cache por TTL"),
+        ("evictions", "counter", "Itens validos removidos do cache pelo LRU"),
+        ("size", "gauge", "Itens no cache"),
+    ):
+        suffix = "_total" if type_ == "counter" else ""
+        yield (
+            f"cache_{key}{suffix}",
+            type_,
+            documentation,
+            [({"cache": name}, cache[key]) for name, cache in stats.items()],
+        )
+
+
+registry.collector(_cache_metrics)
@@ -0,0 +1,31 @@
+import json
+import zlib
+from typing import Dict, Iterable, Iterator
+
+# Tamanho aproximado de cada pedaco enviado na resposta
+CHUNK_SIZE = 64 * 1024
+
+
+def ndjson_chunks(records: Iterable[Dict], chunk_size=CHUNK_SIZE) -> Iterator[bytes]:
+    """Serializa registros em NDJSON, agrupando as linhas em pedacos"""
+    lines = []
+    size = 0
+    for record in records:
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+        lines.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield "".join(lines).encode()
+            lines, size = [], 0
+    if lines:
+        yield "".join(lines).encode()
+
+
+def gzip_chunks(chunks: Iterable[bytes], level=6) -> Iterator[bytes]:
+    """Comprime os pedacos em um unico stream gzip, incrementalmente"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -0,0 +1,129 @@
+import base64
+import json
+import threading
+from bisect import bisect_left, bisect_right
+from typing import Dict, Hashable, List, Optional, Tuple
+
+
+class InvalidCursor(ValueError):
+    """Cursor de paginacao invalido ou corrompido"""
+
+
+def encode_cursor(**data) -> str:
+    """Gera um cursor opaco (base64 url-safe) com a posicao da proxima pagina"""
+    raw = json.dumps(data, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict:
+    """Le um cursor gerado por encode_cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("Cursor invalido") from e
+    if not isinstance(data, dict):
+        raise InvalidCursor("Cursor invalido")
+    return data
+
+
+class OrderedIndex:
+    """Ordem estavel de chaves p/ paginacao por cursor
+
+    Cada chave recebe um numero de sequencia crescente na insercao. As
+    sequencias ficam em uma lista ordenada (append no final) e a pagina
+    seguinte a um cursor e localizada por busca binaria, entao cada pagina
+    custa O(log N + tamanho da pagina), sem percorrer os itens anteriores.
+
+    Remocoes deixam uma lapide (chave None) no lugar, para nao deslocar a
+    lista a cada remocao; a lista e compactada quando as lapides passam da
+    metade. Como o cursor guarda a sequencia (e nao a posicao), paginas
+    seguintes nao repetem nem pulam itens quando ha insercoes/remocoes
+    concorrentes: itens novos aparecem no final.
+    """
+
+    def __init__(self):
+        self._seqs: List[int] = []
+        self._keys: List[Optional[Hashable]] = []
+        self._seq_of: Dict[Hashable, int] = {}
+        self._next_seq = 1
+        self._tombstones = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._seq_of)
+
+    def __contains__(self, key) -> bool:
+        return key in self._seq_of
+
+    def add(self, key: Hashable) -> int:
+        """Adiciona a chave no final da ordem (reinsercao vai p/ o final)"""
+        with self._lock:
+            if key in self._seq_of:
+                self._remove(key)
+            seq = self._next_seq
+            self._next_seq += 1
+            self._seqs.append(seq)
+            self._keys.append(key)
+            self._seq_of[key] = seq
+            return seq
+
+    def rename(self, old_key: Hashable, new_key: Hashable) -> None:
+        """Troca a chave mantendo a posicao (ex: alteracao do email)"""
+        with self._lock:
+            seq = self._seq_of.pop(old_key, None)
+            if seq is None:
+                return
+            self._keys[bisect_left(self._seqs, seq)] = new_key
+            self._seq_of[new_key] = seq
+
+    def remove(self, key: Hashable) -> None:
+        with self._lock:
+            self._remove(key)
+            if self._tombstones > len(self._seq_of):
+                self._compact()
+
+    def _remove(self, key: Hashable) -> None:
+        seq = self._seq_of.pop(key, None)
+        if seq is not None:
+            self._keys[bisect_left(self._seqs, seq)] = None
+            self._tombstones += 1
+
+    def _compact(self) -> None:
+        alive = [(s, k) for s, k in zip(self._seqs, self._keys) if k is not None]
+        self._seqs = [s for s, _ in alive]
+        self._keys = [k for _, k in alive]
+        self._tombstones = 0
+
+    def page(self, after: int, limit: int) -> Tuple[List[Hashable], int, bool]:
+        """Retorna (chaves, ultima sequencia, tem_mais) apos a sequencia `after`"""
+        keys = []
+        last = after
+        with self._lock:
+            position = bisect_right(self._seqs, after)
+            total = len(self._seqs)
+            while position < total and len(keys) < limit:
+                key = self._keys[position]
+                if key is not None:
+                    keys.append(key)
+                    last = self._seqs[position]
+                position += 1
+            # Lapides no final nao contam como proxima pagina
+            while position < total and self._keys[position] is None:
+                position += 1
+            return keys, last, position < total
+
+    def rebuild(self, keys) -> None:
+        """Reconstroi a ordem a partir das chaves (ex: apos recuperar o store)"""
+        with self._lock:
+            self._seqs, self._keys, self._seq_of = [], [], {}
+            self._tombstones = 0
+            self._next_seq = 1
+            for key in keys:
+                self._seqs.append(self._next_seq)
+                self._keys.append(key)
+                self._seq_of[key] = self._next_seq
+                self._next_seq += 1
+
+    def clear(self) -> None:
+        self.rebuild([])
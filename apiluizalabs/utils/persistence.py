@@ -0,0 +1,328 @@
+import gc
+import glob
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from json.scanner import make_scanner
+from typing import Dict, List, Optional, Tuple
+
+from apiluizalabs.models import favorites_from_ids
+from apiluizalabs.utils.persistent import PersistentOrderedSet
+from apiluizalabs.utils.store import StripedStore
+
+SNAPSHOT_FILE = "snapshot.jsonl"
+SEGMENT_PATTERN = "journal-*.log"
+
+
+class PersistenceEngine:
+    """Persistencia opcional dos clientes: journal append-only + snapshots
+
+    - Journal: cada mutacao vira uma linha JSON com numero de sequencia. As
+      linhas ficam em memoria e uma thread escritora grava e faz um unico
+      fsync por lote (group commit), sem fsync no caminho da requisicao.
+    - Snapshot: periodicamente todos os clientes sao gravados em um arquivo
+      compacto (escrita em arquivo temporario + rename atomico) e os
+      segmentos antigos do journal sao descartados.
+    - Recuperacao: carrega o snapshot e reaplica o final do journal.
+
+    As operacoes do journal sao idempotentes (estado final do cliente,
+    remocao, adicao/remocao de favorito), entao o snapshot pode ser feito
+    sem bloquear as escritas: reaplicar em ordem as entradas posteriores ao
+    inicio do snapshot converge para o estado correto.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        fsync_interval: float = 0.05,
+        snapshot_interval: float = 300,
+    ):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.fsync_interval = fsync_interval
+        self.snapshot_interval = snapshot_interval
+        self._seq = 0
+        # (sequencia, linha JSON) aguardando gravacao
+        self._pending: List[Tuple[int, str]] = []
+        self._lock = threading.Lock()
+        # Serializa escrita no arquivo do journal e rotacao de segmentos
+        self._io_lock = threading.Lock()
+        self._snapshot_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._file = None
+        self.batches = 0
+        self.entries_written = 0
+        self.last_snapshot_seq = 0
+        self.last_snapshot_duration: Optional[float] = None
+
+    # Caminho de escrita ---------------------------------------------------
+
+    def record(self, op: str, **data) -> None:
+        """Registra uma mutacao no journal (sem I/O no chamador)"""
+        data["op"] = op
+        with self._lock:
+            self._seq += 1
+            data["seq"] = self._seq
+            self._pending.append((self._seq, _dumps(data)))
+
+    def flush(self) -> None:
+        """Grava as entradas pendentes e faz fsync (um por lote)"""
+        with self._io_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch: List[Tuple[int, str]]) -> None:
+        if self._file is None:
+            self._open_segment(batch[0][0])
+        self._file.write("".join(line + "\n" for _, line in batch))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.batches += 1
+        self.entries_written += len(batch)
+
+    def _open_segment(self, start_seq: int) -> None:
+        if self._file is not None:
+            self._file.close()
+        path = os.path.join(self.directory, f"journal-{start_seq:016d}.log")
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _writer_loop(self) -> None:
+        while not self._stop.is_set():
+            self._wakeup.wait(self.fsync_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    # Snapshot -------------------------------------------------------------
+
+    def snapshot(self, store: Dict[str, Dict]) -> int:
+        """Grava um snapshot compacto do store; retorna a sequencia de inicio"""
+        with self._snapshot_lock:
+            started = time.perf_counter()
+            with self._io_lock:
+                with self._lock:
+                    seq = self._seq
+                    batch, self._pending = self._pending, []
+                if batch:
+                    self._write(batch)
+                # Entradas posteriores ao inicio do snapshot vao p/ novo segmento
+                self._open_segment(seq + 1)
+                current = self._file.name
+
+            if hasattr(store, "pin"):
+                # Store versionado: snapshot fixado (MVCC), registros
+                # publicados depois do inicio nao entram
+                with store.pin() as pinned:
+                    self._write_snapshot(seq, list(pinned.data.values()))
+            else:
+                # Copia atomica (sob o GIL) das referencias; os registros sao
+                # serializados fora de qualquer lock
+                self._write_snapshot(seq, list(store.values()))
+
+            # Segmentos anteriores ja estao refletidos no snapshot
+            for segment in self._segments():
+                if segment != current:
+                    os.remove(segment)
+
+            self.last_snapshot_seq = seq
+            self.last_snapshot_duration = time.perf_counter() - started
+            return seq
+
+    def _write_snapshot(self, seq: int, clients: List[Dict]) -> None:
+        path = os.path.join(self.directory, SNAPSHOT_FILE)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            header = {
+                "seq": seq,
+                "clients": len(clients),
+                "created_at": datetime.now(timezone.utc).isoformat(),
+            }
+            f.write(json.dumps(header) + "\n")
+            for client in clients:
+                f.write(_dumps(client) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _snapshot_loop(self, store: Dict[str, Dict]) -> None:
+        while not self._stop.wait(self.snapshot_interval):
+            try:
+                self.snapshot(store)
+            except Exception as e:
+                # Log do erro (o journal continua garantindo a durabilidade)
+                print(f"Erro ao gravar snapshot: {str(e)}")
+
+    # Recuperacao ----------------------------------------------------------
+
+    def _segments(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.directory, SEGMENT_PATTERN)))
+
+    def recover(self, store: Dict[str, Dict]) -> int:
+        """Carrega o snapshot e reaplica o journal no store; retorna o total"""
+        # Milhoes de dicts novos disparariam o GC ciclico varias vezes sem
+        # encontrar lixo; desabilitar durante a carga reduz bastante o tempo
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return self._recover(store)
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    def _recover(self, store: Dict[str, Dict]) -> int:
+        store.clear()
+        # O scanner do json (em C) evita o custo por linha de json.loads
+        scan = make_scanner(json.JSONDecoder())
+        snapshot_seq = 0
+        path = os.path.join(self.directory, SNAPSHOT_FILE)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                snapshot_seq = json.loads(f.readline())["seq"]
+                for line in f:
+                    client = _load_client(scan(line, 0)[0])
+                    store[client["email"]] = client
+
+        last_seq = snapshot_seq
+        for segment in self._segments():
+            with open(segment, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = scan(line, 0)[0]
+                    except (ValueError, StopIteration):
+                        # Linha incompleta (queda durante a escrita)
+                        break
+                    if entry["seq"] > snapshot_seq:
+                        apply_entry(store, entry)
+                    last_seq = max(last_seq, entry["seq"])
+
+        if isinstance(store, StripedStore):
+            # Registros recuperados ganham versao (ETag) como os publicados
+            store.stamp_unversioned()
+        self._seq = last_seq
+        self.last_snapshot_seq = snapshot_seq
+        return len(store)
+
+    # Ciclo de vida --------------------------------------------------------
+
+    def start(self, store: Dict[str, Dict]) -> None:
+        """Recupera o estado e inicia as threads de escrita e snapshot"""
+        self.recover(store)
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._writer_loop, name="journal", daemon=True),
+            threading.Thread(
+                target=self._snapshot_loop,
+                args=(store,),
+                name="snapshot",
+                daemon=True,
+            ),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, store: Optional[Dict[str, Dict]] = None) -> None:
+        """Grava o que estiver pendente (e um snapshot final, se informado)"""
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+        self.flush()
+        if store is not None:
+            self.snapshot(store)
+        with self._io_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def stats(self) -> Dict:
+        return {
+            "seq": self._seq,
+            "pending": len(self._pending),
+            "batches": self.batches,
+            "entries_written": self.entries_written,
+            "last_snapshot_seq": self.last_snapshot_seq,
+            "last_snapshot_duration": self.last_snapshot_duration,
+        }
+
+
+def apply_entry(store: Dict[str, Dict], entry: Dict) -> None:
+    """Reaplica uma entrada do journal no store (operacao idempotente)"""
+    op = entry["op"]
+    if op == "put":
+        client = _load_client(entry["client"])
+        store[client["email"]] = client
+    elif op == "del":
+        store.pop(entry["email"], None)
+    elif op == "fav_add":
+        client = store.get(entry["email"])
+        if client is not None:
+            # Entradas antigas gravavam o produto completo
+            product_id = entry.get("product_id") or _fav_id(entry["product"])
+            client["favorites"] = client["favorites"].add(sys.intern(product_id))
+    elif op == "fav_del":
+        client = store.get(entry["email"])
+        if client is not None:
+            client["favorites"] = client["favorites"].discard(entry["product_id"])
+    elif op == "fav_batch":
+        client = store.get(entry["email"])
+        if client is not None:
+            favorites = client["favorites"]
+            for product_id in entry["remove"]:
+                favorites = favorites.discard(product_id)
+            for product_id in entry["add"]:
+                favorites = favorites.add(sys.intern(product_id))
+            client["favorites"] = favorites
+
+
+def _load_client(client: Dict) -> Dict:
+    """Normaliza os favoritos carregados para o conjunto de IDs
+
+    Aceita os formatos antigos (lista de IDs ou de produtos e dict com o
+    produto completo).
+    """
+    favorites = client.get("favorites") or ()
+    client["favorites"] = favorites_from_ids(map(_fav_id, favorites))
+    return client
+
+
+def _encode(value):
+    # Favoritos (conjunto persistente) sao gravados como lista de IDs
+    if isinstance(value, PersistentOrderedSet):
+        return list(value)
+    raise TypeError(f"{type(value).__name__} nao serializavel")
+
+
+def _dumps(data: Dict) -> str:
+    return json.dumps(data, separators=(",", ":"), default=_encode)
+
+
+def _fav_id(favorite) -> str:
+    return favorite["id"] if isinstance(favorite, dict) else favorite
+
+
+def _engine_from_env() -> Optional[PersistenceEngine]:
+    directory = os.getenv("PERSISTENCE_DIR")
+    if not directory:
+        return None
+    return PersistenceEngine(
+        directory,
+        fsync_interval=float(os.getenv("PERSISTENCE_FSYNC_INTERVAL", "0.05")),
+        snapshot_interval=float(os.getenv("PERSISTENCE_SNAPSHOT_INTERVAL", "300")),
+    )
+
+
+# Motor de persistencia do processo (None quando PERSISTENCE_DIR nao definido)
+engine = _engine_from_env()
+
+
+def journal(op: str, **data) -> None:
+    """Registra uma mutacao no journal, se a persistencia estiver habilitada"""
+    if engine is not None:
+        engine.record(op, **data)
@@ -0,0 +1,331 @@
+"""Conjunto ordenado persistente (imutavel, alteracoes por copia de caminho)
+
+Usado nos favoritos dos clientes: cada adicao/remocao devolve um conjunto
+novo e o anterior continua valido (snapshots e leitores concorrentes nunca
+veem uma alteracao no meio), sem copiar todos os IDs a cada alteracao.
+
+- ate SMALL itens: tupla simples (copiar ate 32 referencias e mais barato que
+  qualquer estrutura)
+- acima disso: uma HAMT (hash array mapped trie) de ID -> posicao e um trie
+  de 32 vias com os IDs na ordem de insercao. Adicionar/remover copia apenas
+  o caminho alterado (O(log32 n) nos de ate 32 referencias); remocoes deixam
+  a posicao vazia, compactada quando as vagas passam do numero de itens.
+
+A interface e a de um Mapping somente leitura ID -> None (a mesma do dict
+ordenado usado antes): `in`, iteracao na ordem de insercao, len e igualdade
+com dicts.
+"""
+
+from collections.abc import Mapping
+from itertools import chain, islice
+from typing import Iterable, Iterator, List
+
+BITS = 5
+WIDTH = 1 << BITS
+MASK = WIDTH - 1
+HASH_BITS = 64
+HASH_MASK = (1 << HASH_BITS) - 1
+# Ate SMALL itens o conjunto e uma tupla
+SMALL = 32
+
+_MISSING = object()
+
+
+def _hash(key) -> int:
+    return hash(key) & HASH_MASK
+
+
+class _Node:
+    """No da HAMT: bitmap das posicoes ocupadas e entradas compactadas
+
+    Cada entrada e uma folha (chave, valor) ou um no filho.
+    """
+
+    __slots__ = ("bitmap", "slots")
+
+    def __init__(self, bitmap: int, slots: list):
+        self.bitmap = bitmap
+        self.slots = slots
+
+
+class _Bucket(list):
+    """Chaves com o mesmo hash completo (bits do hash esgotados)"""
+
+    __slots__ = ()
+
+
+def _get(node, key, h):
+    shift = 0
+    while True:
+        if type(node) is _Bucket:
+            for k, v in node:
+                if k == key:
+                    return v
+            return _MISSING
+        bit = 1 << ((h >> shift) & MASK)
+        if not node.bitmap & bit:
+            return _MISSING
+        entry = node.slots[(node.bitmap & (bit - 1)).bit_count()]
+        if type(entry) is tuple:
+            return entry[1] if entry[0] == key else _MISSING
+        node = entry
+        shift += BITS
+
+
+def _pair(leaf, key, value, h, shift):
+    """Subarvore com a folha existente e a nova (hashes diferentes no nivel)"""
+    if shift >= HASH_BITS:
+        return _Bucket([leaf, (key, value)])
+    h1 = _hash(leaf[0])
+    b1, b2 = (h1 >> shift) & MASK, (h >> shift) & MASK
+    if b1 == b2:
+        return _Node(1 << b1, [_pair(leaf, key, value, h, shift + BITS)])
+    slots = [leaf, (key, value)] if b1 < b2 else [(key, value), leaf]
+    return _Node((1 << b1) | (1 << b2), slots)
+
+
+def _assoc(node, key, value, h, shift):
+    """Novo no com a chave associada (os nos originais nao sao alterados)"""
+    if type(node) is _Bucket:
+        return _Bucket([p for p in node if p[0] != key] + [(key, value)])
+    bit = 1 << ((h >> shift) & MASK)
+    pos = (node.bitmap & (bit - 1)).bit_count()
+    slots = list(node.slots)
+    if not node.bitmap & bit:
+        slots.insert(pos, (key, value))
+        return _Node(node.bitmap | bit, slots)
+    entry = slots[pos]
+    if type(entry) is tuple:
+        if entry[0] == key:
+            slots[pos] = (key, value)
+        else:
+            slots[pos] = _pair(entry, key, value, h, shift + BITS)
+    else:
+        slots[pos] = _assoc(entry, key, value, h, shift + BITS)
+    return _Node(node.bitmap, slots)
+
+
+def _assoc_in_place(node, key, value, h):
+    """Associa alterando os nos (apenas na construcao, antes de publicar)"""
+    shift = 0
+    while True:
+        if type(node) is _Bucket:
+            node.append((key, value))
+            return
+        bit = 1 << ((h >> shift) & MASK)
+        pos = (node.bitmap & (bit - 1)).bit_count()
+        if not node.bitmap & bit:
+            node.slots.insert(pos, (key, value))
+            node.bitmap |= bit
+            return
+        entry = node.slots[pos]
+        if type(entry) is tuple:
+            node.slots[pos] = _pair(entry, key, value, h, shift + BITS)
+            return
+        node = entry
+        shift += BITS
+
+
+def _dissoc(node, key, h, shift):
+    """Novo no sem a chave (None se ficou vazio; o proprio no se ausente)"""
+    if type(node) is _Bucket:
+        items = [p for p in node if p[0] != key]
+        if len(items) == len(node):
+            return node
+        return _Bucket(items) if items else None
+    bit = 1 << ((h >> shift) & MASK)
+    if not node.bitmap & bit:
+        return node
+    pos = (node.bitmap & (bit - 1)).bit_count()
+    entry = node.slots[pos]
+    if type(entry) is tuple:
+        if entry[0] != key:
+            return node
+        new = None
+    else:
+        new = _dissoc(entry, key, h, shift + BITS)
+        if new is entry:
+            return node
+    slots = list(node.slots)
+    if new is None:
+        del slots[pos]
+        bitmap = node.bitmap & ~bit
+        return _Node(bitmap, slots) if bitmap else None
+    # Subarvore com uma unica folha sobe p/ este nivel
+    if type(new) is _Node and len(new.slots) == 1 and type(new.slots[0]) is tuple:
+        new = new.slots[0]
+    elif type(new) is _Bucket and len(new) == 1:
+        new = new[0]
+    slots[pos] = new
+    return _Node(node.bitmap, slots)
+
+
+def _vec_set(node: tuple, shift: int, i: int, value) -> tuple:
+    """Novo trie com a posicao i definida (i == tamanho acrescenta)"""
+    idx = (i >> shift) & MASK
+    if shift:
+        child = node[idx] if idx < len(node) else ()
+        value = _vec_set(child, shift - BITS, i, value)
+    return node[:idx] + (value,) + node[idx + 1 :]
+
+
+def _flatten(node: tuple, shift: int) -> Iterator:
+    """Itens do trie em ordem (um chain em C por nivel, sem geradores)"""
+    items = iter(node)
+    for _ in range(shift // BITS):
+        items = chain.from_iterable(items)
+    return items
+
+
+def _leaves(node: tuple, shift: int, start: int = 0) -> Iterator[tuple]:
+    """Folhas do trie a partir da posicao `start`"""
+    if not shift:
+        yield node[start & MASK :] if start else node
+        return
+    first = (start >> shift) & MASK
+    for i in range(first, len(node)):
+        yield from _leaves(node[i], shift - BITS, start if i == first else 0)
+
+
+class PersistentOrderedSet(Mapping):
+    """Conjunto imutavel ordenado por insercao (Mapping chave -> None)
+
+    `add` e `discard` retornam um novo conjunto (ou o proprio, se nada
+    mudou). As chaves devem ser hashable e verdadeiras (IDs nao vazios):
+    posicoes removidas ficam vazias (None) no trie e sao filtradas na
+    iteracao.
+    """
+
+    __slots__ = ("_small", "_index", "_order", "_shift", "_count", "_len")
+
+    @classmethod
+    def _from_small(cls, keys: tuple) -> "PersistentOrderedSet":
+        new = object.__new__(cls)
+        new._small = keys
+        new._index = new._order = None
+        new._shift = new._count = 0
+        new._len = len(keys)
+        return new
+
+    @classmethod
+    def _from_trie(cls, index, order, shift, count, length) -> "PersistentOrderedSet":
+        new = object.__new__(cls)
+        new._small = None
+        new._index = index
+        new._order = order
+        new._shift = shift
+        new._count = count
+        new._len = length
+        return new
+
+    @classmethod
+    def from_iterable(cls, keys: Iterable) -> "PersistentOrderedSet":
+        """Monta o conjunto (duplicados mantem a primeira posicao)"""
+        keys = list(dict.fromkeys(keys))
+        if not all(keys):
+            raise ValueError("chave vazia")
+        if len(keys) <= SMALL:
+            return cls._from_small(tuple(keys))
+
+        index = _Node(0, [])
+        for seq, key in enumerate(keys):
+            _assoc_in_place(index, key, seq, _hash(key))
+        level = [tuple(keys[i : i + WIDTH]) for i in range(0, len(keys), WIDTH)]
+        shift = 0
+        while len(level) > 1:
+            level = [tuple(level[i : i + WIDTH]) for i in range(0, len(level), WIDTH)]
+            shift += BITS
+        return cls._from_trie(index, level[0], shift, len(keys), len(keys))
+
+    # Alteracoes (retornam um conjunto novo) -------------------------------
+
+    def add(self, key) -> "PersistentOrderedSet":
+        if not key:
+            raise ValueError("chave vazia")
+        if self._small is not None:
+            if key in self._small:
+                return self
+            if self._len < SMALL:
+                return self._from_small(self._small + (key,))
+            return self.from_iterable(self._small + (key,))
+
+        h = _hash(key)
+        if _get(self._index, key, h) is not _MISSING:
+            return self
+        seq, order, shift = self._count, self._order, self._shift
+        if seq == 1 << (shift + BITS):
+            # Trie cheio: novo nivel acima da raiz
+            order, shift = (order,), shift + BITS
+        return self._from_trie(
+            _assoc(self._index, key, seq, h, 0),
+            _vec_set(order, shift, seq, key),
+            shift,
+            seq + 1,
+            self._len + 1,
+        )
+
+    def discard(self, key) -> "PersistentOrderedSet":
+        if self._small is not None:
+            if key not in self._small:
+                return self
+            return self._from_small(tuple(k for k in self._small if k != key))
+
+        h = _hash(key)
+        seq = _get(self._index, key, h)
+        if seq is _MISSING:
+            return self
+        length = self._len - 1
+        if length <= SMALL // 2:
+            return self._from_small(tuple(k for k in self if k != key))
+        new = self._from_trie(
+            _dissoc(self._index, key, h, 0) or _Node(0, []),
+            _vec_set(self._order, self._shift, seq, None),
+            self._shift,
+            self._count,
+            length,
+        )
+        if self._count - length > max(length, WIDTH):
+            # Mais vagas que itens: compacta (custo amortizado nas remocoes)
+            return self.from_iterable(new)
+        return new
+
+    # Leitura ----------------------------------------------------------------
+
+    def __contains__(self, key) -> bool:
+        if self._small is not None:
+            return key in self._small
+        return _get(self._index, key, _hash(key)) is not _MISSING
+
+    def __getitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        return None
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator:
+        if self._small is not None:
+            return iter(self._small)
+        items = _flatten(self._order, self._shift)
+        if self._count == self._len:
+            return items
+        return filter(None, items)
+
+    def page(self, offset: int, limit: int) -> List:
+        """Chaves da posicao `offset` (na ordem) ate `offset + limit`"""
+        if self._small is not None:
+            return list(self._small[offset : offset + limit])
+        if offset >= self._len:
+            return []
+        if self._count == self._len:
+            # Sem vagas: a posicao e o indice no trie (pula as folhas antes)
+            items = chain.from_iterable(_leaves(self._order, self._shift, offset))
+            return list(islice(items, limit))
+        return list(islice(self, offset, offset + limit))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({list(self)!r})"
+
+
+EMPTY = PersistentOrderedSet.from_iterable(())
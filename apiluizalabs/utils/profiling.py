@@ -0,0 +1,237 @@
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextvars import Context, ContextVar
+from typing import Dict, List, Optional
+
+# Arquivos em que o ultimo frame indica thread ociosa (esperando trabalho/IO)
+IDLE_FILES = ("threading.py", "selectors.py", "queue.py")
+# Pacotes cujo codigo indica que a thread esta atendendo uma requisicao
+# (anyio: threads do threadpool que executam os endpoints sync)
+APP_PACKAGES = (
+    os.sep + "apiluizalabs" + os.sep,
+    os.sep + "anyio" + os.sep,
+    os.sep + "fastapi" + os.sep,
+    os.sep + "starlette" + os.sep,
+)
+
+
+# Sampler da requisicao perfilada no contexto atual. O contexto e copiado
+# p/ as threads de trabalho (threadpool do anyio/starlette e bounded_map),
+# entao essas threads podem ser atribuidas a requisicao
+current_sampler: ContextVar[Optional["StackSampler"]] = ContextVar(
+    "current_sampler", default=None
+)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+class StackSampler:
+    """Profiler por amostragem de pilhas (sys._current_frames)
+
+    Uma thread le periodicamente a pilha de todas as threads e conta as
+    pilhas no formato "collapsed" (frames separados por ";"), usado por
+    ferramentas de flamegraph. Sao consideradas apenas pilhas que passam
+    pelo codigo da aplicacao e nao estao ociosas, entao entram o event loop
+    (serializacao da resposta), as threads do threadpool (endpoints sync,
+    JWT, validacao) e as buscas a API de produtos.
+
+    Com `scoped`, apenas as pilhas da requisicao perfilada sao contadas: no
+    event loop, enquanto a task da requisicao executa (a pilha passa pelo
+    frame que guarda o sampler); nas threads de trabalho, enquanto executam
+    o contexto copiado da requisicao (current_sampler). Requisicoes
+    simultaneas nao entram no perfil.
+    """
+
+    def __init__(self, interval: float = 0.001, scoped: bool = False):
+        self.interval = interval
+        self.scoped = scoped
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Dict[str, int]:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return dict(self.stacks)
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.sample(exclude=own)
+
+    def _owns(self, frame) -> bool:
+        """Indica se a pilha pertence a requisicao deste sampler"""
+        while frame is not None:
+            for value in frame.f_locals.values():
+                if value is self:
+                    return True
+                if type(value) is Context and value.get(current_sampler) is self:
+                    return True
+            frame = frame.f_back
+        return False
+
+    def sample(self, exclude: Optional[int] = None) -> None:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == exclude:
+                continue
+            if frame.f_code.co_filename.endswith(IDLE_FILES):
+                continue
+            top = frame
+            stack = []
+            in_app = False
+            while frame is not None:
+                in_app = in_app or any(
+                    package in frame.f_code.co_filename for package in APP_PACKAGES
+                )
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            if in_app and (not self.scoped or self._owns(top)):
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+
+def collapsed(stacks: Dict[str, int]) -> str:
+    """Formata as pilhas no formato collapsed (entrada do flamegraph.pl)"""
+    return "".join(
+        f"{stack} {count}\n"
+        for stack, count in sorted(stacks.items(), key=lambda item: -item[1])
+    )
+
+
+class ProfileStore:
+    """Ultimos perfis coletados (em memoria e, opcionalmente, em arquivos)"""
+
+    def __init__(self, keep: int = 20, directory: Optional[str] = None):
+        self.directory = directory
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._profiles: deque = deque(maxlen=keep)
+        self._ids = itertools.count(1)
+
+    def add(self, profile: Dict) -> str:
+        """Registra o perfil (ainda em coleta) e retorna o seu id"""
+        profile["id"] = f"{int(time.time())}-{next(self._ids)}"
+        self._profiles.append(profile)
+        return profile["id"]
+
+    def save(self, profile: Dict) -> None:
+        """Grava as pilhas do perfil concluido em PROFILING_DIR (se definido)"""
+        if self.directory:
+            path = os.path.join(self.directory, f"{profile['id']}.collapsed")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(collapsed(profile["stacks"]))
+
+    def get(self, profile_id: str) -> Optional[Dict]:
+        for profile in self._profiles:
+            if profile["id"] == profile_id:
+                return profile
+        return None
+
+    def list(self) -> List[Dict]:
+        return [
+            {key: value for key, value in profile.items() if key != "stacks"}
+            for profile in reversed(self._profiles)
+        ]
+
+    def clear(self) -> None:
+        self._profiles.clear()
+
+
+class ProfilingMiddleware:
+    """Middleware ASGI que executa requisicoes selecionadas sob o profiler
+
+    Uma requisicao e perfilada quando traz o header X-Profile com um dos
+    tokens permitidos ou quando e sorteada pela taxa de amostragem. O id do
+    perfil volta no header X-Profile-Id e as pilhas ficam disponiveis em
+    /debug/profiles/{id}. O perfil conta apenas as pilhas da propria
+    requisicao (StackSampler com `scoped`); para limitar o custo da
+    amostragem, apenas uma requisicao e perfilada por vez (as demais seguem
+    sem profiler).
+    """
+
+    def __init__(
+        self,
+        app,
+        store: ProfileStore,
+        tokens: List[str] = (),
+        sample_rate: float = 0.0,
+        interval: float = 0.001,
+    ):
+        self.app = app
+        self.store = store
+        self.tokens = {token.encode() for token in tokens if token}
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self._busy = threading.Lock()
+
+    def _selected(self, scope) -> bool:
+        if self.tokens:
+            for name, value in scope["headers"]:
+                if name == b"x-profile" and value in self.tokens:
+                    return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._selected(scope):
+            await self.app(scope, receive, send)
+            return
+        if not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        profile = {"method": scope["method"], "path": scope["path"], "status": None}
+        # `sampler` fica nos locals deste frame: a pilha do event loop que
+        # passa por aqui e da requisicao perfilada
+        sampler = StackSampler(self.interval, scoped=True)
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                # O perfil e registrado antes do fim, p/ o id ir no header
+                profile["status"] = message["status"]
+                profile_id = self.store.add(profile)
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", profile_id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        started = time.perf_counter()
+        token = current_sampler.set(sampler)
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            current_sampler.reset(token)
+            profile["stacks"] = sampler.stop()
+            profile["samples"] = sampler.samples
+            profile["duration_ms"] = round((time.perf_counter() - started) * 1000, 3)
+            self._busy.release()
+            if "id" not in profile:
+                self.store.add(profile)
+            self.store.save(profile)
+
+
+def _store_from_env() -> ProfileStore:
+    return ProfileStore(
+        keep=int(os.getenv("PROFILING_KEEP", "20")),
+        directory=os.getenv("PROFILING_DIR") or None,
+    )
+
+
+# Perfis coletados pelo processo (consultados em /debug/profiles)
+profile_store = _store_from_env()
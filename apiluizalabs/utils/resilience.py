@@ -0,0 +1,199 @@
+import random
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Circuit breaker por taxa de falhas em uma janela deslizante
+
+    - closed: as chamadas passam; com pelo menos `min_requests` chamadas na
+      janela e taxa de falhas >= `failure_rate`, o circuito abre.
+    - open: as chamadas falham imediatamente (sem ocupar threads esperando
+      um upstream lento) ate passar `open_timeout`.
+    - half_open: ate `half_open_probes` chamadas de teste passam; sucesso
+      fecha o circuito, falha abre de novo.
+
+    A janela e dividida em buckets de 1 segundo, entao registrar uma chamada
+    e O(1) e falhas antigas saem da conta sozinhas.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float = 0.5,
+        min_requests: int = 20,
+        window: float = 10.0,
+        open_timeout: float = 5.0,
+        half_open_probes: int = 1,
+    ):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_requests = min_requests
+        self.window = window
+        self.open_timeout = open_timeout
+        self.half_open_probes = half_open_probes
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._opened_at = 0.0
+            self._probes = 0
+            # [segundo, chamadas, falhas]
+            self._buckets: deque = deque()
+            self.opened = 0
+            self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def _current_state(self, now: float) -> str:
+        if self._state == OPEN and now - self._opened_at >= self.open_timeout:
+            self._state = HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    def allow(self) -> bool:
+        """Indica se uma chamada pode ser feita agora"""
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def record(self, success: bool) -> None:
+        """Registra o resultado de uma chamada permitida por allow()"""
+        now = time.monotonic()
+        with self._lock:
+            state = self._current_state(now)
+            if state == HALF_OPEN:
+                if success:
+                    self._state = CLOSED
+                    self._buckets.clear()
+                else:
+                    self._open(now)
+                return
+            if state == OPEN:
+                return
+
+            second = int(now)
+            if not self._buckets or self._buckets[-1][0] != second:
+                self._buckets.append([second, 0, 0])
+            bucket = self._buckets[-1]
+            bucket[1] += 1
+            if not success:
+                bucket[2] += 1
+            while self._buckets and self._buckets[0][0] <= second - self.window:
+                self._buckets.popleft()
+
+            if not success:
+                total = sum(b[1] for b in self._buckets)
+                failures = sum(b[2] for b in self._buckets)
+                if total >= self.min_requests and failures / total >= self.failure_rate:
+                    self._open(now)
+
+    def _open(self, now: float) -> None:
+        self._state = OPEN
+        self._opened_at = now
+        self._buckets.clear()
+        self.opened += 1
+
+    def retry_after(self) -> float:
+        """Segundos ate o circuito aceitar a proxima chamada de teste"""
+        with self._lock:
+            if self._current_state(time.monotonic()) != OPEN:
+                return 0.0
+            return max(self.open_timeout - (time.monotonic() - self._opened_at), 0.0)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            return {
+                "state": state,
+                "requests": sum(b[1] for b in self._buckets),
+                "failures": sum(b[2] for b in self._buckets),
+                "opened": self.opened,
+                "rejected": self.rejected,
+            }
+
+
+class RetryBudget:
+    """Limita as novas tentativas a uma fracao das chamadas (retry budget)
+
+    Cada chamada original deposita `ratio` tokens e cada nova tentativa
+    consome 1; alem disso, `min_per_second` tokens sao repostos por segundo
+    para que chamadas esporadicas ainda possam ser repetidas. Com o upstream
+    fora do ar as tentativas ficam limitadas a ~ratio das chamadas, em vez
+    de multiplicar a carga sobre um servico ja degradado.
+    """
+
+    def __init__(
+        self, ratio: float = 0.2, min_per_second: float = 1.0, max_tokens: float = 10
+    ):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._tokens = self.max_tokens
+            self._refilled = time.monotonic()
+            self.retries = 0
+            self.exhausted = 0
+
+    def _refill(self, amount: float = 0.0) -> None:
+        now = time.monotonic()
+        amount += (now - self._refilled) * self.min_per_second
+        self._refilled = now
+        self._tokens = min(self.max_tokens, self._tokens + amount)
+
+    def deposit(self) -> None:
+        """Registra uma chamada original"""
+        with self._lock:
+            self._refill(self.ratio)
+
+    def withdraw(self) -> bool:
+        """Consome um token p/ uma nova tentativa; False se o budget acabou"""
+        with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                self.exhausted += 1
+                return False
+            self._tokens -= 1
+            self.retries += 1
+            return True
+
+    def stats(self) -> Dict:
+        with self._lock:
+            self._refill()
+            return {
+                "tokens": round(self._tokens, 2),
+                "retries": self.retries,
+                "exhausted": self.exhausted,
+            }
+
+
+def backoff_delay(
+    attempt: int, base: float, cap: float, rng: Optional[random.Random] = None
+) -> float:
+    """Espera antes da nova tentativa `attempt` (0, 1, ...)
+
+    Backoff exponencial com jitter total, para que varios clientes nao
+    repitam as chamadas em sincronia.
+    """
+    return (rng or random).uniform(0, min(cap, base * 2**attempt))
@@ -0,0 +1,77 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """Agrupa chamadas concorrentes com a mesma chave em uma unica execucao
+
+    O primeiro chamador (lider) executa a funcao; os demais que chegarem com a
+    mesma chave enquanto ela estiver em andamento aguardam e recebem o mesmo
+    resultado (ou a mesma excecao). Funciona a partir de threads (rotas sync
+    no threadpool) e de codigo async, inclusive misturando os dois.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        # Execucoes reais e chamadas que reaproveitaram uma execucao em andamento
+        self.calls = 0
+        self.shared = 0
+
+    def _join(self, key: Hashable) -> Tuple[Future, bool]:
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.shared += 1
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            self.calls += 1
+            return future, True
+
+    def _finish(self, key: Hashable) -> None:
+        with self._lock:
+            self._calls.pop(key, None)
+
+    def _run(self, key: Hashable, future: Future, fn: Callable, *args) -> None:
+        try:
+            result = fn(*args)
+        except BaseException as exc:
+            future.set_exception(exc)
+        else:
+            future.set_result(result)
+        finally:
+            self._finish(key)
+
+    def do(self, key: Hashable, fn: Callable, *args) -> Any:
+        """Executa fn(*args) uma unica vez por chave entre chamadas concorrentes"""
+        future, leader = self._join(key)
+        if leader:
+            self._run(key, future, fn, *args)
+        return future.result()
+
+    async def do_async(self, key: Hashable, fn: Callable, *args) -> Any:
+        """Versao async de do(); fn pode ser uma funcao sync ou uma coroutine"""
+        future, leader = self._join(key)
+        if leader:
+            if asyncio.iscoroutinefunction(fn):
+                try:
+                    future.set_result(await fn(*args))
+                except BaseException as exc:
+                    future.set_exception(exc)
+                finally:
+                    self._finish(key)
+            else:
+                # Funcoes sync (ex: httpx.Client) rodam fora do event loop
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(None, self._run, key, future, fn, *args)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "calls": self.calls,
+            "shared": self.shared,
+            "in_flight": len(self._calls),
+        }
@@ -0,0 +1,203 @@
+import threading
+from collections.abc import Mapping
+from contextlib import contextmanager
+from typing import Any, Dict, Hashable, Iterator, List, Optional, Tuple
+
+# Marca de chave ausente (inexistente ou removida) no historico
+_ABSENT = object()
+
+
+class StoreSnapshot(Mapping):
+    """Estado do store fixado em uma versao (somente leitura)
+
+    Nao copia os registros: cada chave e resolvida na leitura, pelo registro
+    atual (se publicado ate a versao do snapshot) ou pelo historico que o
+    store guarda enquanto ha snapshot fixado.
+    """
+
+    def __init__(self, store: "StripedStore", version: int, keys: List[Hashable]):
+        self.version = version
+        self._store = store
+        self._keys = keys
+
+    @property
+    def data(self) -> "StoreSnapshot":
+        return self
+
+    def _candidates(self) -> Dict[Hashable, None]:
+        # Chaves atuais + removidas depois do snapshot (no historico)
+        keys = dict.fromkeys(self._keys)
+        keys.update(dict.fromkeys(list(self._store._history)))
+        return keys
+
+    def __getitem__(self, key: Hashable) -> Any:
+        record = self._store._record_at(key, self.version)
+        if record is _ABSENT:
+            raise KeyError(key)
+        return record
+
+    def __iter__(self) -> Iterator[Hashable]:
+        for key, _ in self.items():
+            yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.items())
+
+    def items(self) -> Iterator[Tuple[Hashable, Any]]:
+        for key in self._candidates():
+            record = self._store._record_at(key, self.version)
+            if record is not _ABSENT:
+                yield key, record
+
+    def values(self) -> Iterator[Any]:
+        for _, record in self.items():
+            yield record
+
+
+class StripedStore(dict):
+    """Dict com locks por faixa de chaves (lock striping) e versoes
+
+    Leituras continuam sendo operacoes de dict, sem lock. Operacoes
+    compostas (verificar e alterar) usam o lock da faixa da chave, escolhida
+    pelo hash: escritas em chaves diferentes raramente disputam o mesmo
+    lock. Operacoes com duas chaves (troca de email) adquirem os locks
+    sempre na mesma ordem, evitando deadlock.
+
+    Registros publicados nao sao alterados (copy-on-write): o escritor monta
+    um registro novo e o publica com `publish`, que troca a referencia e
+    incrementa o contador global de versao. Os favoritos sao um conjunto
+    persistente (apiluizalabs.utils.persistent), entao a copia de um
+    registro e O(campos + log n), nunca a lista inteira.
+
+    Snapshots (`pin`) sao MVCC: fixar registra apenas a versao atual e,
+    enquanto houver snapshot fixado, `publish`/`retire` guardam no historico
+    o registro substituido (O(1)). Nenhum lock de faixa e adquirido e nada e
+    copiado alem da lista de chaves.
+    """
+
+    def __init__(self, stripes: int = 64):
+        super().__init__()
+        self._locks = [threading.Lock() for _ in range(max(stripes, 1))]
+        self.version = 0
+        # chave -> versao em que o registro atual foi publicado (registros
+        # gravados direto no dict sao versao 0 ate `stamp_unversioned`)
+        self.versions: Dict[Hashable, int] = {}
+        # chave -> [(versao, registro)] substituidos enquanto ha snapshot
+        self._history: Dict[Hashable, List[Tuple[int, Any]]] = {}
+        self._pinned = 0
+        self._version_lock = threading.Lock()
+
+    def _stripe(self, key: Hashable) -> int:
+        return hash(key) % len(self._locks)
+
+    @contextmanager
+    def _acquire(self, stripes: List[int]) -> Iterator[None]:
+        for stripe in stripes:
+            self._locks[stripe].acquire()
+        try:
+            yield
+        finally:
+            for stripe in reversed(stripes):
+                self._locks[stripe].release()
+
+    def locked(self, *keys: Optional[Hashable]):
+        """Adquire os locks das faixas das chaves (None e ignorado)"""
+        return self._acquire(
+            sorted({self._stripe(key) for key in keys if key is not None})
+        )
+
+    # Escrita (com o lock da chave) ----------------------------------------
+
+    def _keep(self, key: Hashable) -> None:
+        """Guarda o registro atual no historico (com _version_lock)"""
+        if self._pinned and dict.__contains__(self, key):
+            self._history.setdefault(key, []).append(
+                (self.versions.get(key, 0), dict.__getitem__(self, key))
+            )
+
+    def publish(self, key: Hashable, record: Any) -> int:
+        """Publica a nova versao do registro; retorna a versao"""
+        with self._version_lock:
+            self._keep(key)
+            self.version += 1
+            self[key] = record
+            self.versions[key] = self.version
+            return self.version
+
+    def stamp_unversioned(self) -> int:
+        """Atribui versao aos registros gravados direto no dict (recuperacao)
+
+        Uma unica passada, sem copiar os registros; retorna quantos foram
+        versionados.
+        """
+        with self._version_lock:
+            stamped = 0
+            for key in dict.keys(self):
+                if key not in self.versions:
+                    self.version += 1
+                    self.versions[key] = self.version
+                    stamped += 1
+            return stamped
+
+    def retire(self, key: Hashable) -> Optional[Any]:
+        """Remove o registro publicado"""
+        with self._version_lock:
+            self._keep(key)
+            self.version += 1
+            if key in self._history:
+                self._history[key].append((self.version, _ABSENT))
+            self.versions.pop(key, None)
+            return self.pop(key, None)
+
+    # Leitura --------------------------------------------------------------
+
+    def current(self, key: Hashable) -> Tuple[int, Any]:
+        """Versao e registro publicados da chave, lidos juntos (ou (0, None))"""
+        with self._version_lock:
+            return self.versions.get(key, 0), self.get(key)
+
+    def _record_at(self, key: Hashable, version: int) -> Any:
+        """Registro da chave visivel na versao (ou _ABSENT)"""
+        with self._version_lock:
+            found, record = -1, _ABSENT
+            # Registros gravados sem publish (sem stamp) contam como versao 0
+            current = self.versions.get(key, 0)
+            if current <= version and dict.__contains__(self, key):
+                found, record = current, dict.__getitem__(self, key)
+            for published, old in self._history.get(key, ()):
+                if found < published <= version:
+                    found, record = published, old
+            return record
+
+    @contextmanager
+    def pin(self) -> Iterator[StoreSnapshot]:
+        """Fixa um snapshot consistente do store enquanto o contexto durar
+
+        Apenas a versao e registrada (sob o lock de versao, O(1)); as chaves
+        sao copiadas sem lock (copia de referencias em C, sob o GIL) e os
+        registros sao resolvidos na leitura.
+        """
+        with self._version_lock:
+            self._pinned += 1
+            version = self.version
+        try:
+            yield StoreSnapshot(self, version, list(dict.keys(self)))
+        finally:
+            with self._version_lock:
+                self._pinned -= 1
+                if not self._pinned:
+                    self._history.clear()
+
+    def clear(self) -> None:
+        super().clear()
+        self.versions.clear()
+        self._history.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self),
+            "stripes": len(self._locks),
+            "version": self.version,
+            "pinned": self._pinned,
+            "history": sum(map(len, list(self._history.values()))),
+        }
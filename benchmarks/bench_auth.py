@@ -0,0 +1,44 @@
+"""Benchmark do custo de autenticacao por requisicao (get_current_user)
+
+Mede o tempo medio de get_current_user com o mesmo token reutilizado,
+com e sem o cache de tokens verificados.
+
+Execucao: python -m benchmarks.bench_auth [iteracoes]
+"""
+
+import sys
+import time
+from datetime import timedelta
+
+from apiluizalabs import auth
+from apiluizalabs.utils.cache import TokenCache
+
+
+def per_call_us(token, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        auth.get_current_user(token)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    token = auth.create_access_token({"sub": "admin"}, timedelta(minutes=30))
+    original = auth.token_cache
+    try:
+        auth.token_cache = TokenCache(capacity=0)
+        uncached = per_call_us(token, iterations)
+        auth.token_cache = TokenCache(capacity=10_000)
+        cached = per_call_us(token, iterations)
+    finally:
+        auth.token_cache = original
+
+    print(f"iteracoes: {iterations}")
+    print(f"{'modo':>10} {'us/requisicao':>14}")
+    print(f"{'jwt.decode':>10} {uncached:>14.2f}")
+    print(f"{'cache':>10} {cached:>14.2f}")
+    print(f"reducao: {uncached / cached:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
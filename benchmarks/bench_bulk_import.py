@@ -0,0 +1,72 @@
+"""Benchmark de importacao de clientes: POST /clients/ x POST /clients/bulk
+
+Usa o app em processo (TestClient) no modo mock, com cada cliente
+favoritando alguns produtos de um catalogo pequeno, e reporta a vazao em
+clientes por segundo de cada caminho. O TestClient tem um custo fixo por
+requisicao, entao o caminho de um cliente por requisicao fica abaixo do que
+um servidor real atingiria; a comparacao serve para o custo relativo.
+
+Execucao: python -m benchmarks.bench_bulk_import [clientes]
+"""
+
+import os
+import sys
+import time
+from datetime import timedelta
+
+os.environ.setdefault("PRODUCTS_SOURCE", "mock")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from apiluizalabs.auth import create_access_token  # noqa: E402
+from apiluizalabs.main import app  # noqa: E402
+from apiluizalabs.models import client_index, mem_clients, mem_products  # noqa: E402
+
+CATALOG = 500
+FAVORITES = 5
+
+
+def make_clients(total, prefix):
+    return [
+        {
+            "name": f"Cliente {i}",
+            "email": f"{prefix}{i}@email.com",
+            "favorites": [f"prod-{(i + j) % CATALOG:06}" for j in range(FAVORITES)],
+        }
+        for i in range(total)
+    ]
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    for i in range(CATALOG):
+        mem_products[f"prod-{i:06}"] = {"id": f"prod-{i:06}", "title": "Produto"}
+    token = create_access_token({"sub": "admin"}, timedelta(minutes=30))
+    headers = {"Authorization": f"Bearer {token}"}
+    client = TestClient(app)
+
+    # Um cliente por requisicao (amostra menor, o custo por cliente e fixo)
+    single = make_clients(min(total, 2_000), "um")
+    start = time.perf_counter()
+    for item in single:
+        assert client.post("/clients/", json=item, headers=headers).status_code == 201
+    single_rate = len(single) / (time.perf_counter() - start)
+
+    bulk = make_clients(total, "lote")
+    start = time.perf_counter()
+    resp = client.post("/clients/bulk", json=bulk, headers=headers)
+    bulk_rate = total / (time.perf_counter() - start)
+    assert resp.json()["created"] == total
+
+    mem_clients.clear()
+    client_index.clear()
+    mem_products.clear()
+
+    print(f"clientes: {total}, favoritos/cliente: {FAVORITES}")
+    print(f"{'caminho':>14} {'clientes/s':>12}")
+    print(f"{'POST /clients/':>14} {single_rate:>12,.0f}")
+    print(f"{'POST /bulk':>14} {bulk_rate:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
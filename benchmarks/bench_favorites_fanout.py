@@ -0,0 +1,76 @@
+"""Benchmark da hidratacao de favoritos no modo api
+
+Usa o stub da API de produtos (transport do httpx) com latencia injetada e mede o
+tempo total de ProductService.get_products (o caminho usado para hidratar os
+favoritos) com o cache vazio, para listas de tamanhos e limites de concorrencia
+(PRODUCTS_API_CONCURRENCY) diferentes. As buscas rodam no pool compartilhado
+de CONCURRENCY_POOL_SIZE threads mais a thread chamadora, entao a concorrencia
+efetiva e min(tamanho, concorrencia, CONCURRENCY_POOL_SIZE + 1) e o tempo
+esperado e proximo de ceil(tamanho / concorrencia efetiva) * latencia.
+
+Execucao: python -m benchmarks.bench_favorites_fanout
+"""
+
+import math
+import os
+import time
+
+os.environ["PRODUCTS_SOURCE"] = "api"
+
+from apiluizalabs.services.product_service import (  # noqa: E402
+    ProductService,
+    product_cache,
+    product_fallback,
+)
+from apiluizalabs.utils import concurrency as pool  # noqa: E402
+from apiluizalabs.utils.http_client import (  # noqa: E402
+    close_http_client,
+    init_http_client,
+)
+from benchmarks.stub_product_api import StubProductAPI  # noqa: E402
+
+API_URL = "http://stub.local/api/product"
+LATENCY = 0.02  # segundos por chamada ao upstream
+SIZES = [10, 50, 200]
+CONCURRENCY = [1, 10, 50]
+
+
+def main():
+    os.environ["PRODUCTS_API_URL"] = API_URL
+    os.environ.setdefault("PRODUCTS_API_AUTHORIZATION", "stub")
+    stub = StubProductAPI(products=max(SIZES), latency=str(LATENCY))
+    init_http_client(transport=stub.transport())
+    service = ProductService()
+
+    print(
+        f"latencia do upstream: {LATENCY * 1000:.0f}ms, "
+        f"CONCURRENCY_POOL_SIZE: {pool.POOL_SIZE}"
+    )
+    print(
+        f"{'favoritos':>10} {'concorr.':>9} {'efetiva':>8} {'tempo (s)':>10} "
+        f"{'esperado (s)':>13}"
+    )
+    try:
+        for size in SIZES:
+            for concurrency in CONCURRENCY:
+                service.repository.concurrency = concurrency
+                product_cache.clear()
+                product_fallback.clear()
+                ids = [product["id"] for product in stub.products[:size]]
+                start = time.perf_counter()
+                favorites = service.get_products(ids)
+                elapsed = time.perf_counter() - start
+                assert None not in favorites
+                effective = min(size, concurrency, pool.POOL_SIZE + 1)
+                expected = math.ceil(size / effective) * LATENCY
+                print(
+                    f"{size:>10} {concurrency:>9} {effective:>8} {elapsed:>10.3f} "
+                    f"{expected:>13.3f}"
+                )
+    finally:
+        close_http_client()
+        pool.shutdown_executor()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Benchmark de adicao/remocao de favoritos em listas grandes
+
+Compara o formato antigo (lista de produtos com busca linear por ID) com o
+FavoriteRepository atual, partindo de um cliente com N favoritos ja
+cadastrados. O formato atual e medido pelas chamadas reais do repositorio
+(add_favorite, add_favorite de um ID ja favoritado, ou seja, apenas a
+verificacao de duplicidade, e remove_favorite), incluindo o lock do
+cliente e a publicacao da nova versao (o repositorio retorna o conjunto
+publicado, sem copiar os IDs). Nao inclui a hidratacao dos produtos nem a
+montagem da resposta, que sao O(n) de qualquer forma. Com varios tamanhos
+mostra a escala de cada formato.
+
+Execucao: python -m benchmarks.bench_favorites_membership [N ...]
+"""
+
+import sys
+import time
+
+from apiluizalabs.models import favorites_from_ids, mem_clients
+from apiluizalabs.repositories.favorite_repository import FavoriteRepository
+
+OPERATIONS = 1000
+
+
+def product(i):
+    return {"id": f"prod-{i:06}", "title": f"Produto {i}", "price": 10.0}
+
+
+def list_add(favorites, item):
+    if any(fav["id"] == item["id"] for fav in favorites):
+        return
+    favorites.append(item)
+
+
+def list_remove(favorites, product_id):
+    for i, fav in enumerate(favorites):
+        if fav["id"] == product_id:
+            favorites.pop(i)
+            return
+
+
+def timed(fn, items):
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    return (time.perf_counter() - start) / len(items) * 1e6
+
+
+def measure(size):
+    """(add, duplicado, remove) em us/op: lista x repositorio"""
+    new = [product(size + i) for i in range(OPERATIONS)]
+    new_ids = [item["id"] for item in new]
+
+    # Formato antigo: lista de produtos
+    favorites = [product(i) for i in range(size)]
+    listed = (
+        timed(lambda item: list_add(favorites, item), new),
+        timed(lambda item: list_add(favorites, item), new),
+        timed(lambda pid: list_remove(favorites, pid), new_ids),
+    )
+
+    # Formato atual: chamadas do FavoriteRepository
+    email = "bench@email.com"
+    mem_clients.publish(
+        email,
+        {
+            "name": "Bench",
+            "email": email,
+            "favorites": favorites_from_ids(f"prod-{i:06}" for i in range(size)),
+        },
+    )
+    repository = FavoriteRepository()
+    repo = (
+        timed(lambda pid: repository.add_favorite(email, pid), new_ids),
+        timed(lambda pid: repository.add_favorite(email, pid), new_ids),
+        timed(lambda pid: repository.remove_favorite(email, pid), new_ids),
+    )
+    assert len(repository.get_favorite_ids(email)) == size
+    mem_clients.clear()
+    return listed, repo
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 400_000]
+    print(f"operacoes: {OPERATIONS} (us/op)")
+    print(
+        f"{'favoritos':>10} {'formato':>12} {'add':>10} {'duplicado':>10} "
+        f"{'remove':>10}"
+    )
+    for size in sizes:
+        for name, (add, dup, remove) in zip(("lista", "repositorio"), measure(size)):
+            print(f"{size:>10} {name:>12} {add:>10.2f} {dup:>10.2f} {remove:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Benchmark de memoria dos favoritos (tracemalloc)
+
+Compara dois layouts para N clientes com F favoritos cada, escolhidos entre
+um catalogo de P produtos populares:
+
+- copias: cada cliente guarda uma copia do produto (formato antigo, como o
+  produto chega de cada consulta a API)
+- ids: cada cliente guarda apenas os IDs internados e os produtos ficam em
+  uma unica tabela compartilhada (formato atual)
+
+Execucao: python -m benchmarks.bench_favorites_memory [clientes] [favoritos]
+"""
+
+import json
+import sys
+import tracemalloc
+
+from apiluizalabs.models import favorites_from_ids
+
+CATALOG = 1000
+
+
+def product_json(i):
+    return json.dumps(
+        {
+            "id": f"prod-{i:06}",
+            "title": f"Produto popular numero {i}",
+            "price": 199.9,
+            "image": f"https://images.example.com/products/{i:06}.jpg",
+            "brand": "Marca",
+            "reviewScore": 4.5,
+        }
+    )
+
+
+def favorite_indexes(client, favorites):
+    return [(client * 7 + j * 13) % CATALOG for j in range(favorites)]
+
+
+def build_copies(clients, favorites, payloads):
+    store = {}
+    for c in range(clients):
+        products = (json.loads(payloads[i]) for i in favorite_indexes(c, favorites))
+        store[f"cliente{c}@email.com"] = {
+            "name": f"Cliente {c}",
+            "favorites": {product["id"]: product for product in products},
+        }
+    return store
+
+
+def build_ids(clients, favorites, payloads):
+    table = {}
+    for payload in payloads:
+        product = json.loads(payload)
+        table[product["id"]] = product
+    store = {}
+    for c in range(clients):
+        # IDs chegam como strings novas (ex: corpo da requisicao)
+        ids = (f"prod-{i:06}" for i in favorite_indexes(c, favorites))
+        store[f"cliente{c}@email.com"] = {
+            "name": f"Cliente {c}",
+            "favorites": favorites_from_ids(ids),
+        }
+    return store, table
+
+
+def measure(build, *args):
+    tracemalloc.start()
+    result = build(*args)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current
+
+
+def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    favorites = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    payloads = [product_json(i) for i in range(CATALOG)]
+
+    copies = measure(build_copies, clients, favorites, payloads)
+    ids = measure(build_ids, clients, favorites, payloads)
+
+    print(f"clientes: {clients}, favoritos/cliente: {favorites}, catalogo: {CATALOG}")
+    print(f"{'layout':>8} {'memoria (MB)':>13} {'bytes/favorito':>15}")
+    for name, size in (("copias", copies), ("ids", ids)):
+        per_favorite = size / (clients * favorites)
+        print(f"{name:>8} {size / 2**20:>13.1f} {per_favorite:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""Benchmark de carga HTTP em processo com uma mistura realista de endpoints
+
+Dispara requisicoes concorrentes contra o app ASGI em processo (httpx +
+ASGITransport, sem rede) no modo mock, com a mistura de operacoes abaixo,
+e reporta por endpoint a vazao e as latencias p50/p95/p99. O resultado
+pode ser gravado em JSON e comparado com um baseline gravado antes: a
+execucao termina com codigo 1 se algum endpoint regredir alem da
+tolerancia (p95 maior ou vazao menor).
+
+Execucao:
+    python -m benchmarks.bench_http --requests 20000 --output atual.json
+    python -m benchmarks.bench_http --baseline atual.json --tolerance 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import time
+from datetime import timedelta
+
+os.environ.setdefault("PRODUCTS_SOURCE", "mock")
+
+import httpx  # noqa: E402
+
+from apiluizalabs.auth import create_access_token  # noqa: E402
+from apiluizalabs.main import app  # noqa: E402
+from apiluizalabs.models import client_index, mem_clients, mem_products  # noqa: E402
+
+CATALOG = 2_000
+CLIENTS = 1_000
+FAVORITES = 20
+
+# (endpoint, peso na mistura)
+MIX = [
+    ("GET /clients/{email}", 30),
+    ("GET /favorites/{email}", 30),
+    ("POST /favorites/{email}", 10),
+    ("DELETE /favorites/{email}/{product_id}", 10),
+    ("POST /clients/", 5),
+    ("PATCH /clients/{email}", 5),
+]
+
+
+def seed_data():
+    for i in range(CATALOG):
+        product_id = f"prod-{i:06}"
+        mem_products[product_id] = {
+            "id": product_id,
+            "title": f"Produto {i}",
+            "price": 10.0 + i,
+            "image": f"image_{i:06}.jpg",
+            "brand": "Marca",
+            "reviewScore": 4.5,
+        }
+
+
+def favorites_of(i):
+    return [f"prod-{(i * 7 + j) % CATALOG:06}" for j in range(FAVORITES)]
+
+
+async def create_clients(http):
+    payload = [
+        {
+            "name": f"Cliente {i}",
+            "email": f"c{i}@email.com",
+            "favorites": favorites_of(i),
+        }
+        for i in range(CLIENTS)
+    ]
+    resp = await http.post("/clients/bulk", json=payload)
+    assert resp.json()["created"] == CLIENTS
+
+
+class Workload:
+    """Gera as requisicoes da mistura (com estado p/ add/remove e create)"""
+
+    def __init__(self, seed):
+        self.random = random.Random(seed)
+        self.endpoints = [name for name, _ in MIX]
+        self.weights = [weight for _, weight in MIX]
+        self.created = 0
+        # Favoritos adicionados pelo benchmark e ainda nao removidos
+        self.added = []
+        self.added_set = set()
+
+    def next(self):
+        endpoint = self.random.choices(self.endpoints, self.weights)[0]
+        i = self.random.randrange(CLIENTS)
+        email = f"c{i}@email.com"
+        if endpoint == "GET /clients/{email}":
+            return endpoint, "GET", f"/clients/{email}", None
+        if endpoint == "GET /favorites/{email}":
+            return endpoint, "GET", f"/favorites/{email}", None
+        if endpoint == "DELETE /favorites/{email}/{product_id}" and self.added:
+            email, product_id = self.added.pop()
+            self.added_set.discard((email, product_id))
+            return endpoint, "DELETE", f"/favorites/{email}/{product_id}", None
+        if endpoint in (
+            "POST /favorites/{email}",
+            "DELETE /favorites/{email}/{product_id}",
+        ):
+            product_id = f"prod-{self.random.randrange(CATALOG):06}"
+            if product_id in favorites_of(i) or (email, product_id) in self.added_set:
+                return "GET /favorites/{email}", "GET", f"/favorites/{email}", None
+            # Entra em `added` (p/ ser removido) apenas apos a resposta, para
+            # o DELETE nao ser enviado antes da adicao concluir
+            self.added_set.add((email, product_id))
+            endpoint = "POST /favorites/{email}"
+            return endpoint, "POST", f"/favorites/{email}", {"id": product_id}
+        if endpoint == "POST /clients/":
+            self.created += 1
+            body = {
+                "name": "Novo",
+                "email": f"novo{self.created}@email.com",
+                "favorites": favorites_of(self.created)[:5],
+            }
+            return endpoint, "POST", "/clients/", body
+        return endpoint, "PATCH", f"/clients/{email}", {"name": f"Cliente {i}*"}
+
+
+async def run(total, concurrency, seed):
+    token = create_access_token({"sub": "admin"}, timedelta(hours=1))
+    transport = httpx.ASGITransport(app=app)
+    latencies = {name: [] for name, _ in MIX}
+    errors = {name: 0 for name, _ in MIX}
+    workload = Workload(seed)
+
+    async with httpx.AsyncClient(
+        transport=transport,
+        base_url="http://bench",
+        headers={"Authorization": f"Bearer {token}"},
+    ) as http:
+        await create_clients(http)
+        remaining = [total]
+
+        async def worker():
+            while remaining[0] > 0:
+                remaining[0] -= 1
+                endpoint, method, url, body = workload.next()
+                started = time.perf_counter()
+                resp = await http.request(method, url, json=body)
+                latencies[endpoint].append(time.perf_counter() - started)
+                if resp.status_code >= 400:
+                    errors[endpoint] += 1
+                elif endpoint == "POST /favorites/{email}":
+                    workload.added.append((url.rsplit("/", 1)[1], body["id"]))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return latencies, errors, elapsed
+
+
+def percentile(sorted_values, fraction):
+    index = min(int(len(sorted_values) * fraction), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def summarize(latencies, errors, elapsed):
+    endpoints = {}
+    for endpoint, values in latencies.items():
+        if not values:
+            continue
+        values.sort()
+        endpoints[endpoint] = {
+            "requests": len(values),
+            "errors": errors[endpoint],
+            "rps": round(len(values) / elapsed, 1),
+            "p50_ms": round(percentile(values, 0.50) * 1000, 3),
+            "p95_ms": round(percentile(values, 0.95) * 1000, 3),
+            "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+        }
+    return endpoints
+
+
+def compare(endpoints, baseline, tolerance):
+    """Retorna as regressoes em relacao ao baseline (lista de mensagens)"""
+    regressions = []
+    for endpoint, base in baseline["endpoints"].items():
+        current = endpoints.get(endpoint)
+        if current is None:
+            continue
+        if current["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{endpoint}: p95 {base['p95_ms']:.3f} -> {current['p95_ms']:.3f} ms"
+            )
+        if current["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(
+                f"{endpoint}: vazao {base['rps']:.1f} -> {current['rps']:.1f} req/s"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="grava o resultado em JSON")
+    parser.add_argument("--baseline", help="JSON de uma execucao anterior")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    seed_data()
+    latencies, errors, elapsed = asyncio.run(
+        run(args.requests, args.concurrency, args.seed)
+    )
+    endpoints = summarize(latencies, errors, elapsed)
+    mem_clients.clear()
+    client_index.clear()
+    mem_products.clear()
+
+    print(
+        f"requisicoes: {args.requests}, concorrencia: {args.concurrency}, "
+        f"tempo: {elapsed:.2f}s, vazao total: {args.requests / elapsed:,.0f} req/s"
+    )
+    print(
+        f"{'endpoint':<40} {'req':>7} {'erros':>6} {'req/s':>9} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    )
+    for endpoint, stats in endpoints.items():
+        print(
+            f"{endpoint:<40} {stats['requests']:>7} {stats['errors']:>6} "
+            f"{stats['rps']:>9,.1f} {stats['p50_ms']:>8.2f} "
+            f"{stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f}"
+        )
+
+    result = {
+        "meta": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "elapsed_s": round(elapsed, 3),
+            "python": platform.python_version(),
+        },
+        "endpoints": endpoints,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(endpoints, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSAO {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"sem regressoes (tolerancia {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
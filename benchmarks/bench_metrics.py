@@ -0,0 +1,65 @@
+"""Benchmark do custo de registro das metricas por requisicao
+
+Mede o custo de uma observacao no histograma e o custo adicional do
+MetricsMiddleware por requisicao, chamando diretamente (ASGI, sem rede) um
+app minimo com e sem o middleware.
+
+Execucao: python -m benchmarks.bench_metrics [requisicoes]
+"""
+
+import asyncio
+import sys
+import time
+
+from apiluizalabs.utils.metrics import MetricsMiddleware, MetricsRegistry
+
+
+class Route:
+    path = "/clients/{email}"
+
+
+async def app(scope, receive, send):
+    scope["route"] = Route
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+async def per_request_us(asgi_app, requests):
+    start = time.perf_counter()
+    for _ in range(requests):
+        scope = {"type": "http", "method": "GET", "path": "/clients/a@email.com"}
+        await asgi_app(scope, receive, send)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def observe_ns(iterations):
+    histogram = MetricsRegistry().histogram("bench_seconds", "", labels=("route",))
+    start = time.perf_counter()
+    for _ in range(iterations):
+        histogram.observe(0.003, "/clients/{email}")
+    return (time.perf_counter() - start) / iterations * 1e9
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    baseline = asyncio.run(per_request_us(app, requests))
+    instrumented = asyncio.run(per_request_us(MetricsMiddleware(app), requests))
+
+    print(f"requisicoes: {requests}")
+    print(f"histogram.observe: {observe_ns(requests):.0f} ns")
+    print(f"{'app':>14} {'us/requisicao':>14}")
+    print(f"{'sem metricas':>14} {baseline:>14.2f}")
+    print(f"{'com metricas':>14} {instrumented:>14.2f}")
+    print(f"custo do middleware: {instrumented - baseline:.2f} us/requisicao")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Benchmark de recuperacao da persistencia (snapshot + journal)
+
+Gera N clientes (padrao 1.000.000) com alguns favoritos, grava um snapshot,
+adiciona um final de journal com N/10 mutacoes e mede o tempo de
+recuperacao na inicializacao.
+
+Execucao: python -m benchmarks.bench_recovery [total_de_clientes]
+"""
+
+import sys
+import tempfile
+import time
+
+from apiluizalabs.models import favorites_from_ids
+from apiluizalabs.utils.persistence import PersistenceEngine
+
+
+def build_store(total):
+    store = {}
+    for i in range(total):
+        email = f"cliente{i}@email.com"
+        store[email] = {
+            "name": f"Cliente {i}",
+            "email": email,
+            "favorites": favorites_from_ids(
+                f"prod-{(i + j) % 5000:06}" for j in range(i % 5)
+            ),
+        }
+    return store
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    tail = total // 10
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = PersistenceEngine(directory)
+        store = build_store(total)
+
+        start = time.perf_counter()
+        engine.snapshot(store)
+        snapshot_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for i in range(tail):
+            email = f"cliente{i}@email.com"
+            engine.record("fav_add", email=email, product_id=f"prod-novo-{i}")
+            if i % 100 == 0:
+                engine.flush()
+        engine.flush()
+        record_time = time.perf_counter() - start
+        engine.stop()
+        del store
+
+        recovered = {}
+        start = time.perf_counter()
+        PersistenceEngine(directory).recover(recovered)
+        recovery_time = time.perf_counter() - start
+
+    assert len(recovered) == total
+    print(f"clientes:             {total}")
+    print(f"entradas no journal:  {tail}")
+    print(f"snapshot:             {snapshot_time:.2f}s")
+    print(
+        f"journal (record):     {record_time / tail * 1e6:.2f}us por mutacao "
+        f"(fsync a cada 100)"
+    )
+    print(f"recuperacao:          {recovery_time:.2f}s")
+    print(f"                      {total / recovery_time:,.0f} clientes/s")
+
+
+if __name__ == "__main__":
+    main()
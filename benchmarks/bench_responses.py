@@ -0,0 +1,115 @@
+"""Benchmark do custo de CPU por rota com e sem o caminho rapido de JSON
+
+Executa as mesmas requisicoes contra o app ASGI em processo (httpx +
+ASGITransport, modo mock), primeiro com a validacao do response_model +
+jsonable_encoder (padrao) e depois com FAST_JSON_ENABLED, e reporta o tempo
+de CPU do processo por requisicao em cada rota. A listagem de favoritos e
+medida com paginas de tamanhos diferentes, onde a diferenca e maior. As
+linhas "(304)" repetem a leitura com If-None-Match da ETag atual (resposta
+304, sem hidratacao e sem serializacao: nao passam pelo caminho rapido, a
+diferenca nessas linhas e o ruido da medicao). Os dois modos sao medidos em
+rodadas alternadas e cada rota reporta o menor tempo entre as rodadas.
+
+Execucao: python -m benchmarks.bench_responses [requisicoes por rota] [rodadas]
+"""
+
+import asyncio
+import os
+import sys
+import time
+from datetime import timedelta
+
+os.environ.setdefault("PRODUCTS_SOURCE", "mock")
+
+import httpx  # noqa: E402
+
+from apiluizalabs.auth import create_access_token  # noqa: E402
+from apiluizalabs.main import app  # noqa: E402
+from apiluizalabs.models import client_index, mem_clients, mem_products  # noqa: E402
+from apiluizalabs.utils import fast_json  # noqa: E402
+
+FAVORITES = 500
+EMAIL = "bench@email.com"
+
+# (rota, metodo, url, corpo)
+ROUTES = [
+    ("GET /clients/{email}", "GET", f"/clients/{EMAIL}", None),
+    ("GET /clients/{email} (304)", "GET", f"/clients/{EMAIL}", None),
+    ("PATCH /clients/{email}", "PATCH", f"/clients/{EMAIL}", {"name": "Bench"}),
+    ("GET /products/{id}", "GET", "/products/prod-000001", None),
+    ("GET /favorites/{email} limit=10", "GET", f"/favorites/{EMAIL}?limit=10", None),
+    ("GET /favorites/{email} limit=50", "GET", f"/favorites/{EMAIL}?limit=50", None),
+    ("GET /favorites/{email} limit=500", "GET", f"/favorites/{EMAIL}?limit=500", None),
+    ("GET /favorites/{email} (304)", "GET", f"/favorites/{EMAIL}?limit=500", None),
+    ("POST /favorites/{email}", "POST", f"/favorites/{EMAIL}", {"id": "prod-000001"}),
+]
+
+
+def seed_data():
+    for i in range(FAVORITES):
+        product_id = f"prod-{i:06}"
+        mem_products[product_id] = {
+            "id": product_id,
+            "title": f"Produto {i}",
+            "price": 10.0 + i,
+            "image": f"image_{i:06}.jpg",
+            "brand": "Marca",
+            "reviewScore": 4.5,
+        }
+
+
+async def measure(requests):
+    """Tempo de CPU (us) por requisicao de cada rota"""
+    token = create_access_token({"sub": "admin"}, timedelta(hours=1))
+    transport = httpx.ASGITransport(app=app)
+    results = {}
+    async with httpx.AsyncClient(
+        transport=transport,
+        base_url="http://bench",
+        headers={"Authorization": f"Bearer {token}"},
+    ) as http:
+        body = {"name": "Bench", "email": EMAIL, "favorites": list(mem_products)}
+        assert (await http.post("/clients/", json=body)).status_code == 201
+        for name, method, url, body in ROUTES:
+            headers, status = {}, 200
+            if name.endswith("(304)"):
+                etag = (await http.get(url)).headers["ETag"]
+                headers, status = {"If-None-Match": etag}, 304
+            # Aquecimento (caches de produtos e de clientes, JWT)
+            for _ in range(10):
+                await http.request(method, url, json=body, headers=headers)
+            started = time.process_time()
+            for _ in range(requests):
+                resp = await http.request(method, url, json=body, headers=headers)
+            results[name] = (time.process_time() - started) / requests * 1e6
+            assert resp.status_code == status, (name, resp.status_code)
+        await http.delete(f"/clients/{EMAIL}")
+    return results
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    seed_data()
+    before, after = {}, {}
+    for _ in range(rounds):
+        for enabled, best in ((False, before), (True, after)):
+            fast_json.FAST_JSON_ENABLED = enabled
+            for name, elapsed in asyncio.run(measure(requests)).items():
+                best[name] = min(best.get(name, elapsed), elapsed)
+    mem_clients.clear()
+    client_index.clear()
+    mem_products.clear()
+
+    print(
+        f"requisicoes por rota: {requests}, rodadas: {rounds} "
+        "(CPU do processo, us/requisicao, menor tempo)"
+    )
+    print(f"{'rota':<36} {'padrao':>10} {'rapido':>10} {'reducao':>8}")
+    for name in before:
+        saved = 1 - after[name] / before[name]
+        print(f"{name:<36} {before[name]:>10.0f} {after[name]:>10.0f} {saved:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Benchmark de vazao do store de clientes com varias threads
+
+Cada thread mistura leituras de clientes e adicoes de favoritos (lotes e
+individuais) em um conjunto de clientes compartilhados. Ao final confere
+que nenhuma escrita foi perdida: cada cliente deve ter exatamente os
+favoritos adicionados por todas as threads, e reporta as escritas
+perdidas. Compara 1 lock global (stripes=1) com lock striping em dois
+cenarios:
+
+- CPU: a secao critica e so codigo Python. Com o GIL apenas uma thread
+  executa por vez, entao o striping nao aumenta a vazao (o custo extra de
+  escolher a faixa pode ate deixa-lo um pouco mais lento).
+- bloqueante: a gravacao no journal dentro da secao critica espera
+  `HOLD` segundos (como um fsync sincrono ou outra E/S), liberando o GIL.
+  Com 1 lock global as escritas de clientes diferentes esperam umas pelas
+  outras; com striping elas se sobrepoem.
+
+Execucao: python -m benchmarks.bench_store [threads] [operacoes_por_thread]
+"""
+
+import sys
+import threading
+import time
+
+from apiluizalabs.repositories import client_repository, favorite_repository
+from apiluizalabs.repositories.client_repository import ClientRepository
+from apiluizalabs.repositories.favorite_repository import FavoriteRepository
+from apiluizalabs.utils.store import StripedStore
+
+CLIENTS = 256
+# Espera (s) de cada gravacao no journal no cenario bloqueante
+HOLD = 0.0002
+
+
+def run(stripes, threads, operations, hold=0.0):
+    """Retorna (operacoes/s, escritas perdidas)"""
+    store = StripedStore(stripes=stripes)
+    if hold:
+        favorite_repository.journal = lambda *args, **kwargs: time.sleep(hold)
+    client_repository.mem_clients = store
+    favorite_repository.mem_clients = store
+    clients = ClientRepository()
+    favorites = FavoriteRepository()
+    for c in range(CLIENTS):
+        clients.create({"name": f"C{c}", "email": f"c{c}@email.com"})
+
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(t):
+        barrier.wait()
+        for i in range(operations):
+            email = f"c{i % CLIENTS}@email.com"
+            clients.get_by_email(email)
+            if i % 2:
+                favorites.add_favorite(email, f"t{t}-{i}")
+            else:
+                favorites.batch_update(email, [f"t{t}-{i}"], [], {f"t{t}-{i}"})
+
+    workers = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    total = sum(len(client["favorites"]) for client in store.values())
+    return threads * operations * 2 / elapsed, threads * operations - total
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    operations = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+    original = client_repository.mem_clients
+    original_journal = favorite_repository.journal
+    lost_total = 0
+    try:
+        print(f"threads: {threads}, operacoes/thread: {operations}")
+        print(f"{'cenario':>10} {'stripes':>8} {'ops/s':>12}  escritas perdidas")
+        # O cenario bloqueante usa menos operacoes (cada escrita espera HOLD)
+        for scenario, hold, ops in (
+            ("cpu", 0.0, operations),
+            ("bloqueante", HOLD, max(operations // 20, 1)),
+        ):
+            for stripes in (1, 64):
+                rate, lost = run(stripes, threads, ops, hold)
+                favorite_repository.journal = original_journal
+                lost_total += lost
+                print(f"{scenario:>10} {stripes:>8} {rate:>12,.0f}  {lost}")
+    finally:
+        client_repository.mem_clients = original
+        favorite_repository.mem_clients = original
+        favorite_repository.journal = original_journal
+    if lost_total:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""Stub da API de produtos (mesmo contrato da API LuizaLabs) com injecao de falhas
+
+Serve um catalogo gerado (deterministico pela seed) em:
+    GET /api/product/?page=N    -> {"meta": {...}, "products": [...]} (404 apos a ultima)
+    GET /api/product/{id}/      -> produto (404 se nao existe)
+
+Latencia, erros (500/503), timeouts e rate limit (429) sao configuraveis,
+para testar de forma reproduzivel os caminhos que dependem do upstream.
+Pode ser usado em processo (transport do httpx) ou como servidor HTTP:
+
+    python -m benchmarks.stub_product_api --port 9000 --latency lognormal:0.02:0.5
+    PRODUCTS_SOURCE=api PRODUCTS_API_URL=http://localhost:9000/api/product \
+        uvicorn apiluizalabs.main:app --port 8989
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+import httpx
+
+PREFIX = "/api/product"
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """Converte a especificacao de latencia em uma funcao de sorteio (segundos)
+
+    Formatos: "0.02" (fixa), "uniform:min:max", "lognormal:mediana:sigma"
+    (cauda longa, como um upstream real) e "exp:media".
+    """
+    kind, _, args = spec.partition(":")
+    values = [float(value) for value in args.split(":")] if args else []
+    if not args:
+        fixed = float(kind)
+        return lambda rng: fixed
+    if kind == "uniform":
+        low, high = values
+        return lambda rng: rng.uniform(low, high)
+    if kind == "lognormal":
+        median, sigma = values
+        mu = math.log(median) if median > 0 else 0.0
+        return lambda rng: rng.lognormvariate(mu, sigma) if median > 0 else 0.0
+    if kind == "exp":
+        (mean,) = values
+        return lambda rng: rng.expovariate(1 / mean) if mean > 0 else 0.0
+    raise ValueError(f"Latencia invalida: {spec}")
+
+
+class StubProductAPI:
+    """Catalogo gerado + sorteio de latencia e falhas por requisicao"""
+
+    def __init__(
+        self,
+        products: int = 1000,
+        page_size: int = 100,
+        latency: str = "0",
+        error_rate: float = 0.0,
+        timeout_rate: float = 0.0,
+        timeout_delay: float = 1.0,
+        rate_limit: float = 0.0,
+        seed: int = 42,
+    ):
+        self.page_size = page_size
+        self.latency = parse_latency(latency)
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        # Tempo que uma requisicao "pendurada" leva ate falhar
+        self.timeout_delay = timeout_delay
+        # Requisicoes por segundo aceitas (token bucket); 0 desabilita
+        self.rate_limit = rate_limit
+        self._tokens = rate_limit
+        self._refilled = time.monotonic()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {
+            "requests": 0,
+            "ok": 0,
+            "not_found": 0,
+            "errors": 0,
+            "timeouts": 0,
+            "rate_limited": 0,
+        }
+        self.products: List[Dict] = self._generate(products, seed)
+        self.by_id = {product["id"]: product for product in self.products}
+
+    @staticmethod
+    def _generate(total: int, seed: int) -> List[Dict]:
+        rng = random.Random(seed)
+        brands = ["Acme", "Bravo", "Delta", "Omega", "Zeta"]
+        return [
+            {
+                "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                "title": f"Produto {i + 1}",
+                "price": round(rng.uniform(0.1, 1000), 2),
+                "image": f"http://stub.local/images/{i + 1:06}.jpg",
+                "brand": rng.choice(brands),
+                "reviewScore": round(rng.uniform(0, 5), 1),
+            }
+            for i in range(total)
+        ]
+
+    # Sorteio das falhas ---------------------------------------------------
+
+    def _rate_limited(self) -> bool:
+        if self.rate_limit <= 0:
+            return False
+        now = time.monotonic()
+        self._tokens = min(
+            self.rate_limit, self._tokens + (now - self._refilled) * self.rate_limit
+        )
+        self._refilled = now
+        if self._tokens < 1:
+            return True
+        self._tokens -= 1
+        return False
+
+    def decide(self) -> Tuple[float, Optional[str]]:
+        """Sorteia (latencia, falha) da proxima requisicao
+
+        falha: None, "rate_limited", "timeout" ou "error".
+        """
+        with self._lock:
+            self.stats["requests"] += 1
+            if self._rate_limited():
+                self.stats["rate_limited"] += 1
+                return 0.0, "rate_limited"
+            delay = self.latency(self._random)
+            draw = self._random.random()
+            if draw < self.timeout_rate:
+                self.stats["timeouts"] += 1
+                return self.timeout_delay, "timeout"
+            if draw < self.timeout_rate + self.error_rate:
+                self.stats["errors"] += 1
+                return delay, "error"
+            return delay, None
+
+    # Contrato da API ------------------------------------------------------
+
+    def respond(
+        self, path: str, query: Dict[str, List[str]]
+    ) -> Tuple[int, Dict, Dict[str, str]]:
+        """Retorna (status, corpo, headers) de uma requisicao sem falha"""
+        if not path.startswith(PREFIX):
+            return 404, {"error_message": "Not found"}, {}
+        product_id = path.removeprefix(PREFIX).strip("/")
+        if not product_id:
+            try:
+                page = int(query.get("page", ["1"])[0])
+            except ValueError:
+                return 400, {"error_message": "Invalid page"}, {}
+            start, end = (page - 1) * self.page_size, page * self.page_size
+            products = self.products[start:end]
+            if page < 1 or not products:
+                return 404, {"error_message": f"Page not found: {page}"}, {}
+            meta = {"page_number": page, "page_size": self.page_size}
+            return 200, {"meta": meta, "products": products}, {}
+        product = self.by_id.get(product_id)
+        if product is None:
+            with self._lock:
+                self.stats["not_found"] += 1
+            return 404, {"error_message": f"Product {product_id} not found"}, {}
+        return 200, product, {}
+
+    def _fault_response(self, fault: str) -> Tuple[int, Dict, Dict[str, str]]:
+        if fault == "rate_limited":
+            return 429, {"error_message": "Too many requests"}, {"Retry-After": "1"}
+        if fault == "timeout":
+            return 504, {"error_message": "Gateway timeout"}, {}
+        status = self._random.choice((500, 503))
+        return status, {"error_message": "Internal error"}, {}
+
+    def _count_ok(self, status: int) -> None:
+        if status == 200:
+            with self._lock:
+                self.stats["ok"] += 1
+
+    # Transport do httpx (em processo) -------------------------------------
+
+    def transport(self) -> httpx.BaseTransport:
+        """Transport p/ init_http_client (latencia com time.sleep)"""
+        return _StubTransport(self)
+
+    # Servidor ASGI --------------------------------------------------------
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+        delay, fault = self.decide()
+        if delay:
+            await asyncio.sleep(delay)
+        if fault:
+            status, body, headers = self._fault_response(fault)
+        else:
+            query = parse_qs(scope.get("query_string", b"").decode())
+            status, body, headers = self.respond(scope["path"], query)
+            self._count_ok(status)
+        raw = json.dumps(body).encode()
+        raw_headers = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(raw)).encode()),
+        ] + [(name.lower().encode(), value.encode()) for name, value in headers.items()]
+        await send(
+            {"type": "http.response.start", "status": status, "headers": raw_headers}
+        )
+        await send({"type": "http.response.body", "body": raw})
+
+
+class _StubTransport(httpx.BaseTransport):
+    def __init__(self, stub: StubProductAPI):
+        self.stub = stub
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        delay, fault = self.stub.decide()
+        if delay:
+            time.sleep(delay)
+        if fault == "timeout":
+            raise httpx.ReadTimeout("Stub: timeout injetado", request=request)
+        if fault:
+            status, body, headers = self.stub._fault_response(fault)
+        else:
+            query = parse_qs(request.url.query.decode())
+            status, body, headers = self.stub.respond(request.url.path, query)
+            self.stub._count_ok(status)
+        return httpx.Response(status, json=body, headers=headers, request=request)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub da API de produtos")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--latency", default="0")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-delay", type=float, default=10.0)
+    parser.add_argument("--rate-limit", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    stub = StubProductAPI(
+        products=args.products,
+        page_size=args.page_size,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate,
+        timeout_delay=args.timeout_delay,
+        rate_limit=args.rate_limit,
+        seed=args.seed,
+    )
+    uvicorn.run(stub, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
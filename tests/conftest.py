@@ -1,8 +1,23 @@
+import os
+
 import pytest
 from fastapi.testclient import TestClient
 
-from apiluizalabs.main import app
-from apiluizalabs.models import mem_clients, mem_products
+# Metricas sao desabilitadas por padrao; o middleware e registrado na
+# importacao do app, entao o ambiente e definido antes
+os.environ.setdefault("METRICS_ENABLED", "true")
+
+from apiluizalabs.auth import token_cache  # noqa: E402
+from apiluizalabs.main import app  # noqa: E402
+from apiluizalabs.models import client_index, mem_clients, mem_products  # noqa: E402
+from apiluizalabs.repositories.product_repository import (  # noqa: E402
+    breakers,
+    retry_budget,
+)
+from apiluizalabs.services.product_service import (  # noqa: E402
+    product_cache,
+    product_fallback,
+)
 
 
 @pytest.fixture
@@ -28,7 +43,14 @@ def setup_test_data():
     """Fixture para limpar o estado e configurar dados de teste antes de cada execucao de teste"""
     # Limpa o estado dos clientes e produtos
     mem_clients.clear()
+    client_index.clear()
     mem_products.clear()
+    product_cache.clear()
+    product_fallback.clear()
+    token_cache.clear()
+    for breaker in breakers.values():
+        breaker.reset()
+    retry_budget.reset()
 
     # Adiciona produtos mock basicos para os testes (2 para testes de favoritos)
     mem_products["prod-000001"] = {
@@ -92,3 +92,44 @@ class TestAuth:
         response = client.get("/clients/")
         assert response.status_code == 401
         assert "Not authenticated" in response.json()["detail"]
+
+    def test_get_current_user_caches_verified_token(self, monkeypatch):
+        """Testa se o token valido e verificado uma unica vez"""
+        from datetime import timedelta
+
+        from apiluizalabs import auth
+
+        calls = []
+        decode = auth.jwt.decode
+
+        def spy(*args, **kwargs):
+            calls.append(1)
+            return decode(*args, **kwargs)
+
+        monkeypatch.setattr(auth.jwt, "decode", spy)
+        token = create_access_token({"sub": "admin"}, timedelta(minutes=5))
+        for _ in range(3):
+            assert get_current_user(token)["username"] == "admin"
+        assert len(calls) == 1
+
+        # Token invalido nunca entra no cache
+        for _ in range(2):
+            with pytest.raises(HTTPException):
+                get_current_user(token[:-2] + "xx")
+        assert len(calls) == 3
+
+    def test_token_cache_respects_exp(self):
+        """Testa se o token sai do cache no exp"""
+        import time
+
+        from apiluizalabs.utils.cache import TokenCache
+
+        cache = TokenCache(capacity=2)
+        cache.put("expirado", "admin", time.time() - 1)
+        cache.put("curto", "admin", time.time() + 0.05)
+        cache.put("sem-exp", "admin", None)
+        assert cache.get("expirado") is None
+        assert cache.get("sem-exp") is None
+        assert cache.get("curto") == "admin"
+        time.sleep(0.1)
+        assert cache.get("curto") is None
@@ -0,0 +1,130 @@
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from apiluizalabs.routes import debug
+from apiluizalabs.utils import cache as cache_module
+from apiluizalabs.utils.cache import (
+    CacheSweeper,
+    LRUCacheTTL,
+    caches_stats,
+    register_cache,
+)
+
+
+class TestLRUCacheTTL:
+    def test_monotonic_clock(self, monkeypatch):
+        """Testa se ajustes no relogio do sistema nao expiram os itens"""
+        cache = LRUCacheTTL(capacity=10, ttl=60)
+        cache.put("a", 1)
+        monkeypatch.setattr(time, "time", lambda: 10**10)
+        assert cache.get("a") == 1
+
+    def test_stats_counters(self):
+        """Testa os contadores de hits, misses, expiracoes e remocoes LRU"""
+        cache = LRUCacheTTL(capacity=2, ttl=60)
+        cache.put("a", 1)
+        cache.put("b", 2, ttl=0.01)
+        time.sleep(0.02)
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        cache.put("c", 3)
+        cache.put("d", 4)
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["expirations"] == 1
+        assert stats["evictions"] == 1
+        assert stats["size"] == 2
+        assert stats["hit_ratio"] == 0.5
+
+    def test_put_reuses_expired_slot(self):
+        """Testa se um item expirado e descartado antes de um item valido"""
+        cache = LRUCacheTTL(capacity=2, ttl=60)
+        cache.put("expira", 1, ttl=0.01)
+        cache.put("valido", 2)
+        time.sleep(0.02)
+        cache.put("novo", 3)
+        assert cache.get("valido") == 2
+        assert cache.stats()["evictions"] == 0
+        assert cache.stats()["expirations"] == 1
+
+    def test_sweep_removes_expired(self):
+        """Testa a varredura incremental dos expirados sem leitura"""
+        cache = LRUCacheTTL(capacity=1000, ttl=60)
+        for i in range(500):
+            cache.put(f"expira-{i}", i, ttl=0.01)
+        for i in range(100):
+            cache.put(f"valido-{i}", i)
+        time.sleep(0.02)
+
+        assert cache.sweep(sample=64) == 500
+        assert len(cache.data) == 100
+        assert cache.stats()["expirations"] == 500
+
+    def test_sweep_ttls_diferentes(self):
+        """Testa expirados atras de itens validos na ordem LRU (TTLs diferentes)"""
+        cache = LRUCacheTTL(capacity=200, ttl=60)
+        for i in range(100):
+            cache.put(f"ok{i}", i)
+        for i in range(100):
+            cache.put(f"neg{i}", None, ttl=0.01)
+        time.sleep(0.02)
+
+        assert cache.sweep(sample=64) == 100
+        assert len(cache.data) == 100
+
+    def test_put_cheio_descarta_expirado_fora_do_inicio(self):
+        """Testa se o put no limite descarta um expirado, e nao o item valido"""
+        cache = LRUCacheTTL(capacity=200, ttl=60)
+        for i in range(100):
+            cache.put(f"ok{i}", i)
+        for i in range(100):
+            cache.put(f"neg{i}", None, ttl=0.01)
+        time.sleep(0.02)
+
+        cache.put("novo", 1)
+        assert cache.get("ok0") == 0
+        assert cache.stats()["evictions"] == 0
+
+    def test_heap_de_prazos_limitado(self):
+        """Testa se atualizacoes repetidas nao acumulam entradas no heap"""
+        cache = LRUCacheTTL(capacity=10, ttl=60)
+        for i in range(10_000):
+            cache.put(f"k{i % 10}", i)
+        assert len(cache._expiry) <= 2 * len(cache.data) + 64
+        assert cache.get("k9") == 9999
+
+
+class TestCacheRegistry:
+    def test_named_caches(self):
+        """Testa o registro dos caches nomeados do processo"""
+        stats = caches_stats()
+        assert {"clients", "products", "tokens"} <= set(stats)
+        assert "stale_hits" in stats["products"]
+
+    def test_sweeper_runs_registered_caches(self, monkeypatch):
+        """Testa se o sweeper varre todos os caches registrados"""
+        monkeypatch.setattr(cache_module, "caches", type(cache_module.caches)())
+        cache = LRUCacheTTL(capacity=10, ttl=0.01, name="teste")
+        cache.put("a", 1)
+        time.sleep(0.02)
+
+        sweeper = CacheSweeper(interval=0)
+        assert sweeper.run_once() == 1
+        assert sweeper.removed == 1
+
+    def test_debug_route(self, auth):
+        """Testa a rota de debug com as estatisticas dos caches"""
+        cache = LRUCacheTTL(capacity=10, ttl=60)
+        register_cache("debug-teste", cache)
+        app = FastAPI()
+        app.include_router(debug.router)
+        client = TestClient(app)
+
+        assert client.get("/debug/caches").status_code == 401
+        resp = client.get("/debug/caches", headers=auth)
+        assert resp.status_code == 200
+        assert resp.json()["caches"]["debug-teste"]["capacity"] == 10
@@ -0,0 +1,125 @@
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from apiluizalabs.repositories.product_repository import ProductRepository
+from apiluizalabs.services import catalog_service
+from apiluizalabs.services.catalog_service import CatalogSyncService
+from apiluizalabs.services.product_service import ProductService
+
+
+def fake_repository(total_pages=5, page_size=3):
+    """Repositorio que simula o catalogo paginado da API de produtos"""
+    repository = MagicMock()
+    requested = []
+    lock = threading.Lock()
+
+    def get_page(page):
+        with lock:
+            requested.append(page)
+        if page > total_pages:
+            return []
+        return [{"id": f"p{page}-{i}"} for i in range(page_size)]
+
+    repository.get_page.side_effect = get_page
+    return repository, requested
+
+
+@pytest.fixture
+def synced_catalog(monkeypatch):
+    """Substitui o indice compartilhado por um ja sincronizado"""
+    sync = CatalogSyncService(enabled=True, concurrency=2)
+    repository, _ = fake_repository(total_pages=2)
+    sync.sync(repository)
+    monkeypatch.setattr(catalog_service, "catalog_sync", sync)
+    monkeypatch.setattr("apiluizalabs.services.product_service.catalog_sync", sync)
+    return sync
+
+
+class TestCatalogSync:
+    def test_sync_builds_index(self):
+        """Testa se todas as paginas sao carregadas no indice local"""
+        sync = CatalogSyncService(enabled=True, concurrency=4)
+        repository, requested = fake_repository(total_pages=5)
+
+        assert sync.sync(repository) is True
+        assert len(sync.index) == 15
+        assert sync.get("p5-2") == {"id": "p5-2"}
+        assert sync.ready
+        assert sorted(requested) == list(range(1, 9))
+
+        status = sync.status()
+        assert status["pages_synced"] == 5
+        assert status["products"] == 15
+        assert status["last_synced"] is not None
+        assert status["last_duration"] >= 0
+
+    def test_failed_sync_keeps_previous_index(self):
+        """Testa se erro na sincronizacao mantem o indice anterior"""
+        sync = CatalogSyncService(enabled=True, concurrency=2)
+        repository, _ = fake_repository(total_pages=1)
+        sync.sync(repository)
+
+        repository.get_page.side_effect = Exception("Erro de conexão")
+        assert sync.sync(repository) is False
+        assert len(sync.index) == 3
+        assert "Erro de conexão" in sync.status()["last_error"]
+
+    def test_generation_changes_with_index(self):
+        """Testa se a geracao muda apenas quando o indice sincronizado muda"""
+        sync = CatalogSyncService(enabled=True, concurrency=2)
+        repository, _ = fake_repository(total_pages=1)
+        sync.sync(repository)
+        generation = sync.generation
+
+        sync.sync(repository)
+        assert sync.generation == generation
+
+        sync.sync(fake_repository(total_pages=2)[0])
+        assert sync.generation > generation
+
+    def test_product_service_uses_index(self, monkeypatch, synced_catalog):
+        """Testa se consultas usam o indice e so vao ao upstream para IDs novos"""
+        monkeypatch.setenv("PRODUCTS_SOURCE", "api")
+        service = ProductService()
+        calls = []
+
+        def fake_get_by_id(product_id):
+            calls.append(product_id)
+            return {"id": product_id} if product_id == "novo" else None
+
+        monkeypatch.setattr(service.repository, "get_by_id", fake_get_by_id)
+
+        assert service.product_exists("p1-0") is True
+        assert service.get_product("p2-1") == {"id": "p2-1"}
+        assert service.get_product("novo") == {"id": "novo"}
+        assert calls == ["novo"]
+
+    def test_get_page_reads_products_key(self, monkeypatch):
+        """Testa leitura da pagina no formato {"meta": ..., "products": [...]}"""
+        response = MagicMock(status_code=200)
+        response.json.return_value = {"meta": {}, "products": [{"id": "a"}]}
+        http_client = MagicMock()
+        http_client.get.return_value = response
+        monkeypatch.setattr(
+            "apiluizalabs.repositories.product_repository.get_http_client",
+            lambda: http_client,
+        )
+
+        repository = ProductRepository(source="api", api_url="http://api/product")
+        assert repository.get_page(1) == [{"id": "a"}]
+        http_client.get.assert_called_once_with(
+            "http://api/product/", params={"page": 1}
+        )
+
+    def test_sync_status_route(self, client, auth):
+        resp = client.get("/catalog/sync", headers=auth)
+        assert resp.status_code == 200
+        assert "last_synced" in resp.json()
+
+    def test_trigger_sync_disabled(self, client, auth, monkeypatch):
+        # Independente de PRODUCTS_SYNC_ENABLED no ambiente
+        monkeypatch.setattr("apiluizalabs.routes.catalog.catalog_sync.enabled", False)
+        resp = client.post("/catalog/sync", headers=auth)
+        assert resp.status_code == 400
@@ -1,4 +1,7 @@
+import json
+
 from apiluizalabs.models import mem_clients, mem_products
+from apiluizalabs.utils.ndjson import gzip_chunks
 
 
 class TestClients:
@@ -329,3 +332,150 @@ class TestClients:
         assert call_count[0] == 0
 
         service.cache.ttl = original_ttl
+
+    def test_list_clients_cursor_pagination(self, client, auth):
+        """Testa paginacao por cursor com insercoes e remocoes entre paginas"""
+        for i in range(5):
+            client.post(
+                "/clients/",
+                json={"name": f"Cliente {i}", "email": f"c{i}@email.com"},
+                headers=auth,
+            )
+
+        resp = client.get("/clients/?limit=2", headers=auth)
+        data = resp.json()
+        assert [c["email"] for c in data["results"]] == ["c0@email.com", "c1@email.com"]
+        assert data["page"] == 1 and data["limit"] == 2 and data["total"] == 5
+
+        # Mudancas concorrentes nao repetem nem pulam clientes existentes
+        client.delete("/clients/c0@email.com", headers=auth)
+        client.delete("/clients/c2@email.com", headers=auth)
+        client.post(
+            "/clients/", json={"name": "Novo", "email": "c5@email.com"}, headers=auth
+        )
+
+        emails = []
+        cursor = data["next"]
+        while cursor:
+            data = client.get(f"/clients/?limit=2&cursor={cursor}", headers=auth).json()
+            emails += [c["email"] for c in data["results"]]
+            cursor = data["next"]
+        assert emails == ["c3@email.com", "c4@email.com", "c5@email.com"]
+        assert data["page"] == 3
+
+    def test_list_clients_invalid_cursor(self, client, auth):
+        resp = client.get("/clients/?cursor=nao-e-um-cursor", headers=auth)
+        assert resp.status_code == 400
+
+    def test_export_clients_ndjson(self, client, auth):
+        """Testa exportacao NDJSON com favoritos resolvidos e compressao gzip"""
+        import gzip
+        import json
+
+        client.post(
+            "/clients/",
+            json={"name": "A", "email": "a@email.com", "favorites": ["prod-000001"]},
+            headers=auth,
+        )
+        client.post(
+            "/clients/", json={"name": "B", "email": "b@email.com"}, headers=auth
+        )
+
+        resp = client.get("/clients/export", headers=auth)
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in resp.text.splitlines()]
+        assert [c["email"] for c in lines] == ["a@email.com", "b@email.com"]
+        assert lines[0]["favorites"] == ["prod-000001"]
+
+        resp = client.get("/clients/export?hydrate=true&gzip=true", headers=auth)
+        assert resp.headers["content-encoding"] == "gzip"
+        # O TestClient ja descomprime o corpo da resposta
+        lines = [json.loads(line) for line in resp.text.splitlines()]
+        assert lines[0]["favorites"][0]["title"] == "Mock Product 1"
+        assert gzip.decompress(b"".join(gzip_chunks([b"a\n", b"b\n"]))) == b"a\nb\n"
+
+    def test_export_ignores_changes_during_read(self):
+        """Testa se a exportacao le os clientes existentes no inicio"""
+        from apiluizalabs.repositories.client_repository import ClientRepository
+
+        repository = ClientRepository()
+        for i in range(5):
+            repository.create({"name": "C", "email": f"e{i}@email.com"})
+
+        batches = repository.iter_batches(batch_size=2)
+        first = next(batches)
+        repository.create({"name": "Novo", "email": "novo@email.com"})
+        repository.delete("e3@email.com")
+        emails = [c["email"] for batch in [first, *batches] for c in batch]
+        assert emails == [f"e{i}@email.com" for i in range(5)]
+
+    def test_bulk_create_clients(self, client, auth, monkeypatch):
+        """Testa importacao em lote com resultado por item e validacao unica"""
+        from apiluizalabs.routes.clients import client_service
+
+        client.post(
+            "/clients/",
+            json={"name": "Existe", "email": "existe@email.com"},
+            headers=auth,
+        )
+        lookups = []
+        get_products = client_service.product_service.get_products
+
+        def spy(product_ids):
+            lookups.append(list(product_ids))
+            return get_products(product_ids)
+
+        monkeypatch.setattr(client_service.product_service, "get_products", spy)
+
+        items = [
+            {"name": "A", "email": "a@email.com", "favorites": ["prod-000001"]},
+            {"name": "B", "email": "b@email.com", "favorites": ["prod-000001"]},
+            {"name": "C", "email": "existe@email.com"},
+            {"name": "D", "email": "d@email.com", "favorites": ["prod-nao-existe"]},
+            {"name": "E", "email": "email-invalido"},
+            {"name": "F", "email": "a@email.com"},
+        ]
+        resp = client.post("/clients/bulk", json=items, headers=auth)
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["created"] == 2 and data["failed"] == 4
+        assert [r["status"] for r in data["results"]] == [
+            "created",
+            "created",
+            "error",
+            "error",
+            "error",
+            "error",
+        ]
+        assert "prod-nao-existe" in data["results"][3]["error"]
+        assert lookups == [["prod-000001", "prod-nao-existe"]]
+        assert mem_clients["b@email.com"]["favorites"] == {"prod-000001": None}
+
+    def test_bulk_create_clients_ndjson(self, client, auth):
+        body = '{"name": "A", "email": "a@email.com"}\n{"name": "B", "email": "b@email.com"}\n'
+        resp = client.post(
+            "/clients/bulk",
+            content=body,
+            headers={**auth, "Content-Type": "application/x-ndjson"},
+        )
+        assert resp.json()["created"] == 2
+        assert client.get("/clients/", headers=auth).json()["total"] == 2
+
+        resp = client.post("/clients/bulk", json={"nao": "lista"}, headers=auth)
+        assert resp.status_code == 400
+
+    def test_bulk_create_clients_corpo_grande(self, client, auth, monkeypatch):
+        """Testa se um lote acima de CLIENTS_BULK_MAX_BYTES e recusado (413)"""
+        from apiluizalabs.routes import clients
+
+        monkeypatch.setattr(clients, "BULK_MAX_BYTES", 100)
+        items = [{"name": "A", "email": f"a{i}@email.com"} for i in range(10)]
+        resp = client.post("/clients/bulk", json=items, headers=auth)
+        assert resp.status_code == 413
+        assert len(mem_clients) == 0
+
+        # Sem Content-Length (chunked) o limite vale durante a leitura
+        body = iter([b"[", json.dumps(items).encode()[1:]])
+        resp = client.post("/clients/bulk", content=body, headers=auth)
+        assert resp.status_code == 413
@@ -0,0 +1,57 @@
+import threading
+import time
+
+import pytest
+
+from apiluizalabs.utils import concurrency
+from apiluizalabs.utils.concurrency import bounded_map, get_executor
+
+
+class TestBoundedMap:
+    def test_ordem_e_limite(self):
+        """Resultados na ordem dos itens e no maximo `concurrency` simultaneas"""
+        running = []
+        peak = []
+        lock = threading.Lock()
+
+        def fn(item):
+            with lock:
+                running.append(item)
+                peak.append(len(running))
+            time.sleep(0.01)
+            with lock:
+                running.remove(item)
+            return item * 2
+
+        assert bounded_map(fn, range(20), 4) == [i * 2 for i in range(20)]
+        assert max(peak) <= 4
+
+    def test_pool_compartilhado(self):
+        """Chamadas seguidas usam o mesmo pool (sem criar threads por chamada)"""
+        bounded_map(lambda x: x, range(5), 3)
+        executor = get_executor()
+        bounded_map(lambda x: x, range(5), 3)
+        assert get_executor() is executor
+
+    def test_primeiro_erro(self):
+        """O erro do primeiro item com falha e levantado"""
+
+        def fn(item):
+            if item in (3, 7):
+                raise ValueError(item)
+            return item
+
+        with pytest.raises(ValueError, match="3"):
+            bounded_map(fn, range(10), 4)
+
+    def test_pool_ocupado_nao_trava(self, monkeypatch):
+        """Com o pool ocupado (ou chamadas aninhadas) a thread chamadora avanca"""
+        monkeypatch.setattr(concurrency, "POOL_SIZE", 1)
+        concurrency.shutdown_executor()
+        try:
+            nested = bounded_map(
+                lambda x: sum(bounded_map(lambda y: y, range(x), 4)), range(6), 4
+            )
+            assert nested == [sum(range(x)) for x in range(6)]
+        finally:
+            concurrency.shutdown_executor()
@@ -0,0 +1,177 @@
+import time
+
+import pytest
+
+from apiluizalabs.models import mem_clients
+from apiluizalabs.routes.favorites import favorite_service
+from apiluizalabs.utils import fast_json
+from apiluizalabs.utils.etag import EPOCH, expected_versions, make_etag
+from apiluizalabs.utils.persistence import PersistenceEngine
+
+EMAIL = "ana@email.com"
+
+
+@pytest.fixture
+def ana(client, auth):
+    client.post(
+        "/clients/",
+        json={"name": "Ana", "email": EMAIL, "favorites": ["prod-000001"]},
+        headers=auth,
+    )
+
+
+class TestEtagHelpers:
+    def test_expected_versions(self):
+        """If-Match aceita apenas ETags fortes da epoca atual"""
+        tag = make_etag(7, 3)
+        assert expected_versions(None) is None
+        assert expected_versions("*") is None
+        assert expected_versions(f"{make_etag(5)}, {tag}") == {5, 7}
+        assert expected_versions(f"W/{tag}") == set()
+        assert expected_versions('"outra.7"') == set()
+
+
+class TestConditionalGet:
+    def test_cliente_304(self, client, auth, ana):
+        """If-None-Match com a ETag atual responde 304 sem corpo"""
+        resp = client.get(f"/clients/{EMAIL}", headers=auth)
+        etag = resp.headers["ETag"]
+        assert etag.startswith(f'"{EPOCH}.')
+
+        resp = client.get(f"/clients/{EMAIL}", headers={**auth, "If-None-Match": etag})
+        assert resp.status_code == 304
+        assert resp.content == b""
+        assert resp.headers["ETag"] == etag
+
+    def test_cliente_alterado_200(self, client, auth, ana):
+        """Apos uma alteracao a ETag antiga nao corresponde mais"""
+        etag = client.get(f"/clients/{EMAIL}", headers=auth).headers["ETag"]
+        client.patch(f"/clients/{EMAIL}", json={"name": "Ana Maria"}, headers=auth)
+
+        resp = client.get(f"/clients/{EMAIL}", headers={**auth, "If-None-Match": etag})
+        assert resp.status_code == 200
+        assert resp.json()["name"] == "Ana Maria"
+        assert resp.headers["ETag"] != etag
+
+    def test_cliente_inexistente(self, client, auth):
+        """If-None-Match: * nao vale para cliente inexistente"""
+        resp = client.get(
+            "/clients/x@email.com", headers={**auth, "If-None-Match": "*"}
+        )
+        assert resp.status_code == 404
+
+    def test_recuperado_304(self, client, auth, tmp_path):
+        """Clientes recuperados do snapshot/journal tem ETag e respondem 304"""
+        engine = PersistenceEngine(str(tmp_path))
+        engine.record(
+            "put",
+            client={"name": "Ana", "email": EMAIL, "favorites": ["prod-000001"]},
+        )
+        engine.flush()
+        PersistenceEngine(str(tmp_path)).recover(mem_clients)
+        assert mem_clients.versions[EMAIL] > 0
+
+        for url in (f"/clients/{EMAIL}", f"/favorites/{EMAIL}"):
+            etag = client.get(url, headers=auth).headers["ETag"]
+            resp = client.get(url, headers={**auth, "If-None-Match": etag})
+            assert resp.status_code == 304
+
+    def test_favoritos_304_sem_hidratacao(self, client, auth, ana, monkeypatch):
+        """O 304 dos favoritos nao resolve os produtos nem serializa a resposta"""
+        etag = client.get(f"/favorites/{EMAIL}", headers=auth).headers["ETag"]
+
+        def fail(*args, **kwargs):
+            raise AssertionError("produtos resolvidos ou resposta serializada")
+
+        monkeypatch.setattr(favorite_service.product_service, "lookup_products", fail)
+        monkeypatch.setattr("apiluizalabs.routes.favorites.respond", fail)
+        headers = {**auth, "If-None-Match": f"W/{etag}"}
+        assert client.get(f"/favorites/{EMAIL}", headers=headers).status_code == 304
+
+    def test_favoritos_etag_geracao_dos_produtos(self, client, auth, ana, monkeypatch):
+        """A ETag dos favoritos segue a geracao dos produtos, nao o relogio"""
+        etag = client.get(f"/favorites/{EMAIL}", headers=auth).headers["ETag"]
+        now = time.time()
+        monkeypatch.setattr(time, "time", lambda: now + 3600)
+        assert client.get(f"/favorites/{EMAIL}", headers=auth).headers["ETag"] == etag
+
+        # Mesma versao do cliente, produto alterado: ETag nova
+        product_service = favorite_service.product_service
+        generation = product_service.generation() + 1
+        monkeypatch.setattr(product_service, "generation", lambda: generation)
+        resp = client.get(
+            f"/favorites/{EMAIL}", headers={**auth, "If-None-Match": etag}
+        )
+        assert resp.status_code == 200
+        assert resp.headers["ETag"] != etag
+
+    def test_favoritos_cliente_inexistente(self, client, auth):
+        """Favoritos de cliente inexistente: 404 mesmo com If-None-Match: *"""
+        resp = client.get(
+            "/favorites/x@email.com", headers={**auth, "If-None-Match": "*"}
+        )
+        assert resp.status_code == 404
+
+    def test_favoritos_alterados(self, client, auth, ana):
+        """Adicionar um favorito muda a ETag dos favoritos"""
+        etag = client.get(f"/favorites/{EMAIL}", headers=auth).headers["ETag"]
+        client.post(f"/favorites/{EMAIL}", json={"id": "prod-000002"}, headers=auth)
+
+        resp = client.get(
+            f"/favorites/{EMAIL}", headers={**auth, "If-None-Match": etag}
+        )
+        assert resp.status_code == 200
+        assert len(resp.json()["favorites"]) == 2
+
+    def test_etag_no_caminho_rapido(self, client, auth, ana, monkeypatch):
+        """A ETag vai tambem nas respostas do FAST_JSON_ENABLED"""
+        monkeypatch.setattr(fast_json, "FAST_JSON_ENABLED", True)
+        etag = make_etag(mem_clients.versions[EMAIL])
+        assert client.get(f"/clients/{EMAIL}", headers=auth).headers["ETag"] == etag
+
+
+class TestIfMatch:
+    def test_patch_versao_antiga_412(self, client, auth, ana):
+        """PATCH com If-Match antigo responde 412 e nao altera o cliente"""
+        etag = client.get(f"/clients/{EMAIL}", headers=auth).headers["ETag"]
+        client.post(f"/favorites/{EMAIL}", json={"id": "prod-000002"}, headers=auth)
+
+        resp = client.patch(
+            f"/clients/{EMAIL}",
+            json={"name": "Outro"},
+            headers={**auth, "If-Match": etag},
+        )
+        assert resp.status_code == 412
+        assert resp.headers["ETag"] == make_etag(mem_clients.versions[EMAIL])
+        assert mem_clients[EMAIL]["name"] == "Ana"
+
+    def test_patch_versao_atual(self, client, auth, ana):
+        """PATCH com a ETag atual e aplicado"""
+        etag = client.get(f"/clients/{EMAIL}", headers=auth).headers["ETag"]
+        resp = client.patch(
+            f"/clients/{EMAIL}",
+            json={"name": "Outro"},
+            headers={**auth, "If-Match": etag},
+        )
+        assert resp.status_code == 200
+        assert mem_clients[EMAIL]["name"] == "Outro"
+
+    def test_favoritos_if_match(self, client, auth, ana):
+        """Alteracoes de favoritos aceitam a ETag da listagem de favoritos"""
+        etag = client.get(f"/favorites/{EMAIL}", headers=auth).headers["ETag"]
+        headers = {**auth, "If-Match": etag}
+
+        resp = client.post(
+            f"/favorites/{EMAIL}", json={"id": "prod-000002"}, headers=headers
+        )
+        assert resp.status_code == 200
+        # A adicao gerou uma versao nova: a mesma ETag agora falha
+        resp = client.delete(f"/favorites/{EMAIL}/prod-000002", headers=headers)
+        assert resp.status_code == 412
+        resp = client.post(
+            f"/favorites/{EMAIL}/batch",
+            json={"remove": ["prod-000001"]},
+            headers=headers,
+        )
+        assert resp.status_code == 412
+        assert list(mem_clients[EMAIL]["favorites"]) == ["prod-000001", "prod-000002"]
@@ -0,0 +1,115 @@
+import pytest
+from fastapi.exceptions import ResponseValidationError
+
+from apiluizalabs.models import mem_products
+from apiluizalabs.schemas import FavoriteList, FavoritesListOut, ProductOut
+from apiluizalabs.utils import fast_json
+from apiluizalabs.utils.fast_json import FastJSONResponse, respond, serializer
+
+
+@pytest.fixture
+def fast(monkeypatch):
+    monkeypatch.setattr(fast_json, "FAST_JSON_ENABLED", True)
+
+
+class TestSerializer:
+    def test_projeta_campos_do_modelo(self):
+        """Campos extras ficam fora e os defaults sao aplicados"""
+        product = {**mem_products["prod-000001"], "interno": 1}
+        del product["reviewScore"]
+        out = serializer(ProductOut)(product)
+        assert out == {
+            "id": "prod-000001",
+            "title": "Mock Product 1",
+            "price": 10.0,
+            "image": "img1.jpg",
+            "brand": "Brand1",
+            "reviewScore": None,
+        }
+
+    def test_modelos_aninhados(self):
+        """Listas de modelos sao projetadas item a item"""
+        product = {**mem_products["prod-000002"], "interno": 1}
+        out = serializer(FavoriteList)(
+            {"total": 1, "page": 1, "limit": 50, "favorites": [product]}
+        )
+        assert out["next"] is None
+        assert "interno" not in out["favorites"][0]
+
+    def test_desabilitado_retorna_o_conteudo(self, monkeypatch):
+        """Sem FAST_JSON_ENABLED o conteudo segue p/ o response_model"""
+        monkeypatch.setattr(fast_json, "FAST_JSON_ENABLED", False)
+        content = {"id": "x"}
+        assert respond(ProductOut, content) is content
+
+    def test_campo_obrigatorio_ausente(self, fast):
+        """Conteudo sem campo obrigatorio segue p/ a validacao do response_model"""
+        content = {"id": "x"}
+        assert respond(ProductOut, content) is content
+        favorites = {"favorites": [{"id": "x"}]}
+        assert respond(FavoritesListOut, favorites) is favorites
+
+    def test_habilitado_retorna_response(self, fast):
+        """Com FAST_JSON_ENABLED a rota retorna a resposta ja serializada"""
+        products = list(mem_products.values())
+        resp = respond(list[ProductOut], products, status_code=201)
+        assert isinstance(resp, FastJSONResponse)
+        assert resp.status_code == 201
+        assert resp.body.startswith(b'[{"id":"prod-000001"')
+
+
+class TestRoutes:
+    def _requests(self, client, auth):
+        client.post(
+            "/clients/",
+            json={
+                "name": "Ana",
+                "email": "ana@email.com",
+                "favorites": ["prod-000001", "prod-000002"],
+            },
+            headers=auth,
+        )
+        return [
+            client.get("/clients/ana@email.com", headers=auth),
+            client.get("/favorites/ana@email.com?limit=1", headers=auth),
+            client.patch("/clients/ana@email.com", json={"name": "A"}, headers=auth),
+            client.delete("/favorites/ana@email.com/prod-000002", headers=auth),
+            client.post(
+                "/favorites/ana@email.com/batch",
+                json={"add": ["prod-000002", "x"]},
+                headers=auth,
+            ),
+            client.get("/clients/?limit=10", headers=auth),
+        ]
+
+    def test_mesmas_respostas(self, client, auth, monkeypatch):
+        """O caminho rapido responde o mesmo que a validacao do response_model"""
+        expected = [(r.status_code, r.json()) for r in self._requests(client, auth)]
+        client.delete("/clients/ana@email.com", headers=auth)
+
+        monkeypatch.setattr(fast_json, "FAST_JSON_ENABLED", True)
+        fast = [(r.status_code, r.json()) for r in self._requests(client, auth)]
+        assert fast == expected
+
+    def test_campo_ausente_erro_de_validacao(self, client, auth, fast, monkeypatch):
+        """Campo ausente gera o erro de validacao do caminho padrao (nao KeyError)"""
+        client.post(
+            "/clients/",
+            json={
+                "name": "Ana",
+                "email": "ana@email.com",
+                "favorites": ["prod-000001"],
+            },
+            headers=auth,
+        )
+        monkeypatch.setitem(mem_products, "prod-000001", {"id": "prod-000001"})
+        with pytest.raises(ResponseValidationError):
+            client.get("/favorites/ana@email.com", headers=auth)
+
+    def test_create_status_201(self, client, auth, fast):
+        """O status da rota e mantido no caminho rapido"""
+        resp = client.post(
+            "/clients/", json={"name": "B", "email": "b@email.com"}, headers=auth
+        )
+        assert resp.status_code == 201
+        assert resp.json() == {"name": "B", "email": "b@email.com", "favorites": []}
@@ -1,4 +1,5 @@
-from apiluizalabs.models import mem_products
+from apiluizalabs.models import mem_clients, mem_products
+from apiluizalabs.repositories.favorite_repository import FavoriteRepository
 from apiluizalabs.services.client_service import ClientService
 from apiluizalabs.services.favorite_service import FavoriteService
 
@@ -147,3 +148,186 @@ class TestFavorites:
 
         assert resp.status_code == 404
         assert "Produto nao esta nos favoritos" in resp.json()["detail"]
+
+    def test_favorites_keep_insertion_order(self, client, auth):
+        """Testa ordem de insercao e adicao duplicada sem efeito"""
+        client.post(
+            "/clients/",
+            json={"name": "Ordem", "email": "ordem@email.com"},
+            headers=auth,
+        )
+        mem_products["prod-000003"] = {
+            **mem_products["prod-000001"],
+            "id": "prod-000003",
+        }
+        for product_id in ["prod-000003", "prod-000001", "prod-000002"]:
+            client.post(
+                "/favorites/ordem@email.com", json={"id": product_id}, headers=auth
+            )
+
+        resp = client.post(
+            "/favorites/ordem@email.com", json={"id": "prod-000003"}, headers=auth
+        )
+        ids = [fav["id"] for fav in resp.json()["favorites"]]
+        assert ids == ["prod-000003", "prod-000001", "prod-000002"]
+
+        resp = client.delete("/favorites/ordem@email.com/prod-000001", headers=auth)
+        ids = [fav["id"] for fav in resp.json()["favorites"]]
+        assert ids == ["prod-000003", "prod-000002"]
+
+        resp = client.get("/clients/ordem@email.com", headers=auth)
+        assert resp.json()["favorites"] == ["prod-000003", "prod-000002"]
+
+    def test_favorites_store_only_ids(self, client, auth):
+        """Testa se o cliente guarda apenas IDs e ve alteracoes do produto"""
+        client.post(
+            "/clients/",
+            json={
+                "name": "Ids",
+                "email": "ids@email.com",
+                "favorites": ["prod-000001"],
+            },
+            headers=auth,
+        )
+        client.post(
+            "/favorites/ids@email.com", json={"id": "prod-000002"}, headers=auth
+        )
+        assert mem_clients["ids@email.com"]["favorites"] == {
+            "prod-000001": None,
+            "prod-000002": None,
+        }
+
+        mem_products["prod-000001"]["price"] = 5.0
+        resp = client.get("/favorites/ids@email.com", headers=auth)
+        assert resp.json()["favorites"][0]["price"] == 5.0
+
+    def test_repository_returns_published_set(self):
+        """Testa se o repositorio retorna o conjunto publicado, sem copiar os IDs"""
+        ClientService().repository.create({"name": "Set", "email": "set@email.com"})
+        repository = FavoriteRepository()
+
+        added = repository.add_favorite("set@email.com", "prod-000001")
+        assert added is mem_clients["set@email.com"]["favorites"]
+        # Duplicado: o mesmo conjunto, sem nova versao
+        assert repository.add_favorite("set@email.com", "prod-000001") is added
+        removed = repository.remove_favorite("set@email.com", "prod-000001")
+        assert removed is mem_clients["set@email.com"]["favorites"]
+        assert len(removed) == 0
+
+    def test_list_favorites_paginated(self, client, auth, monkeypatch):
+        """Testa paginacao dos favoritos resolvendo apenas os produtos da pagina"""
+        from apiluizalabs.routes.favorites import favorite_service
+
+        ids = [f"prod-pag-{i:03}" for i in range(30)]
+        for product_id in ids:
+            mem_products[product_id] = {**mem_products["prod-000001"], "id": product_id}
+        client.post(
+            "/clients/",
+            json={"name": "Pag", "email": "pag@email.com", "favorites": ids},
+            headers=auth,
+        )
+
+        resolved = []
+        get_products = favorite_service.product_service.get_products
+
+        def spy(product_ids, **kwargs):
+            resolved.extend(product_ids)
+            return get_products(product_ids, **kwargs)
+
+        monkeypatch.setattr(favorite_service.product_service, "get_products", spy)
+
+        resp = client.get("/favorites/pag@email.com?page=2&limit=10", headers=auth)
+        data = resp.json()
+        assert data["total"] == 30 and data["page"] == 2 and data["limit"] == 10
+        assert [fav["id"] for fav in data["favorites"]] == ids[10:20]
+        assert data["next"] == (
+            "http://testserver/favorites/pag@email.com?page=3&limit=10"
+        )
+        assert resolved == ids[10:20]
+
+        data = client.get(data["next"], headers=auth).json()
+        assert len(data["favorites"]) == 10 and data["next"] is None
+
+    def test_list_favorites_sem_paginacao(self, client, auth):
+        """Sem page/limit a resposta e a lista completa, no formato anterior"""
+        ids = [f"prod-full-{i:03}" for i in range(60)]
+        for product_id in ids:
+            mem_products[product_id] = {**mem_products["prod-000001"], "id": product_id}
+        client.post(
+            "/clients/",
+            json={"name": "Full", "email": "full@email.com", "favorites": ids},
+            headers=auth,
+        )
+
+        data = client.get("/favorites/full@email.com", headers=auth).json()
+        assert list(data) == ["favorites"]
+        assert [fav["id"] for fav in data["favorites"]] == ids
+
+        data = client.get("/favorites/full@email.com?limit=50", headers=auth).json()
+        assert data["total"] == 60 and len(data["favorites"]) == 50
+
+    def test_batch_update_favorites(self, client, auth):
+        """Testa adicao/remocao em lote com resultado por ID"""
+        client.post(
+            "/clients/",
+            json={
+                "name": "Lote",
+                "email": "lote@email.com",
+                "favorites": ["prod-000001"],
+            },
+            headers=auth,
+        )
+        resp = client.post(
+            "/favorites/lote@email.com/batch",
+            json={
+                "add": ["prod-000002", "prod-000001", "prod-nao-existe", "prod-000002"],
+                "remove": ["prod-000001", "prod-fora"],
+            },
+            headers=auth,
+        )
+        assert resp.status_code == 200
+        data = resp.json()
+        assert [(r["id"], r["status"]) for r in data["results"]] == [
+            ("prod-000001", "removed"),
+            ("prod-fora", "not_found"),
+            ("prod-000002", "added"),
+            ("prod-000001", "added"),
+            ("prod-nao-existe", "not_found"),
+            ("prod-000002", "duplicate"),
+        ]
+        assert data["total"] == 2
+        assert list(mem_clients["lote@email.com"]["favorites"]) == [
+            "prod-000002",
+            "prod-000001",
+        ]
+
+    def test_batch_update_sem_alteracao(self, client, auth, monkeypatch):
+        """Lote sem efeito nao publica versao nova nem grava no journal"""
+        from apiluizalabs.repositories import favorite_repository
+
+        client.post(
+            "/clients/",
+            json={"name": "L", "email": "l@email.com", "favorites": ["prod-000001"]},
+            headers=auth,
+        )
+        entries = []
+        monkeypatch.setattr(
+            favorite_repository, "journal", lambda op, **kw: entries.append(op)
+        )
+        version = mem_clients.versions["l@email.com"]
+        resp = client.post(
+            "/favorites/l@email.com/batch",
+            json={"add": ["prod-000001"], "remove": ["prod-fora"]},
+            headers=auth,
+        )
+        assert resp.json()["total"] == 1
+        assert mem_clients.versions["l@email.com"] == version
+        assert entries == []
+
+    def test_batch_update_favorites_client_not_found(self, client, auth):
+        resp = client.post(
+            "/favorites/naoexiste@email.com/batch",
+            json={"add": ["prod-000001"]},
+            headers=auth,
+        )
+        assert resp.status_code == 404
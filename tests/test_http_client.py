@@ -0,0 +1,51 @@
+import httpx
+
+from apiluizalabs.utils import http_client
+from apiluizalabs.utils.http_client import (
+    close_http_client,
+    get_http_client,
+    init_http_client,
+)
+
+
+class TestHttpClient:
+    def teardown_method(self):
+        close_http_client()
+
+    def test_get_http_client_is_shared(self):
+        """Testa se o mesmo cliente e reutilizado entre chamadas"""
+        assert get_http_client() is get_http_client()
+
+    def test_http_client_auth_header(self, monkeypatch):
+        """Testa se o header de autorizacao e montado uma unica vez no cliente"""
+        monkeypatch.setenv("PRODUCTS_API_AUTHORIZATION", "token-123")
+        client = init_http_client()
+        assert client.headers["Authorization"] == "Bearer token-123"
+
+    def test_http_client_timeouts(self, monkeypatch):
+        """Testa se os timeouts de conexao e leitura sao configuraveis"""
+        monkeypatch.setenv("PRODUCTS_API_CONNECT_TIMEOUT", "1.5")
+        monkeypatch.setenv("PRODUCTS_API_READ_TIMEOUT", "3")
+        client = init_http_client()
+        assert client.timeout.connect == 1.5
+        assert client.timeout.read == 3.0
+
+    def test_http_client_http2_without_h2(self, monkeypatch):
+        """Testa fallback para HTTP/1.1 quando o pacote h2 nao esta instalado"""
+        monkeypatch.setenv("PRODUCTS_API_HTTP2", "true")
+        monkeypatch.setattr(http_client, "_http2_available", lambda: False)
+        client = init_http_client()
+        assert isinstance(client, httpx.Client)
+
+    def test_http_client_custom_transport(self):
+        """Testa uso de um transport customizado (ex: stub da API)"""
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, json={}))
+        client = init_http_client(transport=transport)
+        assert client.get("http://stub/api/product/1/").status_code == 200
+
+    def test_close_http_client(self):
+        """Testa se o cliente e recriado apos o fechamento do pool"""
+        client = get_http_client()
+        close_http_client()
+        assert client.is_closed
+        assert get_http_client() is not client
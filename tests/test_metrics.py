@@ -0,0 +1,96 @@
+import httpx
+
+from apiluizalabs import main
+from apiluizalabs.repositories.product_repository import ProductRepository
+from apiluizalabs.utils import metrics
+from apiluizalabs.utils.http_client import close_http_client, init_http_client
+from apiluizalabs.utils.metrics import MetricsRegistry
+
+
+class TestMetricsRegistry:
+    def test_histogram_render(self):
+        """Testa o formato texto do Prometheus de um histograma"""
+        registry = MetricsRegistry()
+        histogram = registry.histogram(
+            "latencia_seconds", "Latencia", labels=("rota",), buckets=(0.1, 1)
+        )
+        histogram.observe(0.05, "/a")
+        histogram.observe(0.5, "/a")
+        histogram.observe(2, "/a")
+
+        text = registry.render()
+        assert "# TYPE latencia_seconds histogram" in text
+        assert 'latencia_seconds_bucket{rota="/a",le="0.1"} 1' in text
+        assert 'latencia_seconds_bucket{rota="/a",le="1"} 2' in text
+        assert 'latencia_seconds_bucket{rota="/a",le="+Inf"} 3' in text
+        assert 'latencia_seconds_count{rota="/a"} 3' in text
+        assert 'latencia_seconds_sum{rota="/a"} 2.55' in text
+
+    def test_counter_and_gauge(self):
+        """Testa contador e gauge com labels"""
+        registry = MetricsRegistry()
+        counter = registry.counter("eventos_total", "Eventos", labels=("tipo",))
+        gauge = registry.gauge("em_andamento", "Em andamento")
+        counter.inc("a")
+        counter.inc("a", amount=2)
+        gauge.inc()
+        gauge.inc()
+        gauge.dec()
+
+        text = registry.render()
+        assert 'eventos_total{tipo="a"} 3' in text
+        assert "em_andamento 1" in text
+        assert registry.counter("eventos_total", "Eventos") is counter
+
+
+class TestMetricsEndpoint:
+    def test_route_latency(self, client, auth):
+        """Testa a latencia por template de rota (nao por URL)"""
+        before = metrics.http_requests.count("GET", "/clients/{email}", "404")
+        client.get("/clients/a@email.com", headers=auth)
+        client.get("/clients/b@email.com", headers=auth)
+
+        assert metrics.http_requests.count("GET", "/clients/{email}", "404") == (
+            before + 2
+        )
+        assert metrics.http_in_flight.value("GET") == 0
+
+        resp = client.get("/metrics")
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert (
+            'http_request_duration_seconds_count{method="GET",'
+            'route="/clients/{email}",status="404"}'
+        ) in resp.text
+
+    def test_desabilitado_404(self, client, monkeypatch):
+        """Testa o endpoint desabilitado (padrao de METRICS_ENABLED)"""
+        monkeypatch.setattr(main, "METRICS_ENABLED", False)
+        assert client.get("/metrics").status_code == 404
+
+    def test_cache_counters(self, client, auth):
+        """Testa a exportacao dos contadores dos caches nomeados"""
+        text = client.get("/metrics").text
+        assert 'cache_hits_total{cache="clients"}' in text
+        assert 'cache_evictions_total{cache="products"}' in text
+
+    def test_upstream_calls_by_status(self):
+        """Testa contagem e latencia das chamadas a API de produtos por status"""
+
+        def handler(request):
+            if request.url.path.endswith("/p1"):
+                return httpx.Response(200, json={"id": "p1"})
+            return httpx.Response(404)
+
+        init_http_client(transport=httpx.MockTransport(handler))
+        try:
+            before_ok = metrics.upstream_requests.count("get", "200")
+            before_404 = metrics.upstream_requests.count("get", "404")
+            repository = ProductRepository(source="api", api_url="http://api")
+            assert repository.get_by_id("p1") == {"id": "p1"}
+            assert repository.get_by_id("p2") is None
+        finally:
+            close_http_client()
+
+        assert metrics.upstream_requests.count("get", "200") == before_ok + 1
+        assert metrics.upstream_requests.count("get", "404") == before_404 + 1
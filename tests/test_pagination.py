@@ -0,0 +1,53 @@
+import pytest
+
+from apiluizalabs.utils.pagination import (
+    InvalidCursor,
+    OrderedIndex,
+    decode_cursor,
+    encode_cursor,
+)
+
+
+class TestOrderedIndex:
+    def test_page_after_sequence(self):
+        """Testa paginas sequenciais a partir da ultima sequencia retornada"""
+        index = OrderedIndex()
+        for key in "abcde":
+            index.add(key)
+
+        keys, last, has_more = index.page(0, 2)
+        assert keys == ["a", "b"] and has_more
+        keys, last, has_more = index.page(last, 2)
+        assert keys == ["c", "d"] and has_more
+        keys, last, has_more = index.page(last, 2)
+        assert keys == ["e"] and not has_more
+
+    def test_remove_rename_and_compaction(self):
+        """Testa lapides, compactacao e troca de chave mantendo a posicao"""
+        index = OrderedIndex()
+        for i in range(10):
+            index.add(i)
+        for i in range(8):
+            index.remove(i)
+        assert len(index._keys) < 10  # compactado
+        index.rename(9, "nove")
+        keys, _, has_more = index.page(0, 10)
+        assert keys == [8, "nove"] and not has_more
+        assert len(index) == 2
+
+    def test_trailing_tombstones_end_pagination(self):
+        index = OrderedIndex()
+        for key in "abc":
+            index.add(key)
+        index.remove("c")
+        _, _, has_more = index.page(0, 2)
+        assert has_more is False
+
+
+class TestCursor:
+    def test_roundtrip(self):
+        assert decode_cursor(encode_cursor(seq=10, page=2)) == {"seq": 10, "page": 2}
+
+    def test_invalid(self):
+        with pytest.raises(InvalidCursor):
+            decode_cursor("%%%")
@@ -0,0 +1,110 @@
+import glob
+import os
+
+from apiluizalabs.models import mem_clients
+from apiluizalabs.repositories.client_repository import ClientRepository
+from apiluizalabs.repositories.favorite_repository import FavoriteRepository
+from apiluizalabs.utils import persistence
+from apiluizalabs.utils.persistence import PersistenceEngine
+
+
+def client_record(email, favorites=None):
+    return {"name": "Cliente", "email": email, "favorites": favorites or {}}
+
+
+class TestPersistence:
+    def test_journal_replay(self, tmp_path):
+        """Testa recuperacao apenas a partir do journal"""
+        engine = PersistenceEngine(str(tmp_path))
+        engine.record("put", client=client_record("a@email.com"))
+        engine.record("put", client=client_record("b@email.com"))
+        engine.record("fav_add", email="a@email.com", product={"id": "p1"})
+        engine.record("del", email="b@email.com")
+        engine.flush()
+
+        store = {}
+        assert PersistenceEngine(str(tmp_path)).recover(store) == 1
+        assert store["a@email.com"]["favorites"] == {"p1": None}
+
+    def test_group_commit(self, tmp_path):
+        """Testa se varias mutacoes sao gravadas com um unico fsync"""
+        engine = PersistenceEngine(str(tmp_path))
+        for i in range(100):
+            engine.record("put", client=client_record(f"{i}@email.com"))
+        assert engine.stats()["entries_written"] == 0
+
+        engine.flush()
+        assert engine.stats()["batches"] == 1
+        assert engine.stats()["entries_written"] == 100
+
+    def test_snapshot_and_journal_tail(self, tmp_path):
+        """Testa snapshot + reaplicacao das entradas posteriores"""
+        engine = PersistenceEngine(str(tmp_path))
+        store = {}
+        for i in range(10):
+            store[f"{i}@email.com"] = client_record(f"{i}@email.com")
+            engine.record("put", client=store[f"{i}@email.com"])
+        seq = engine.snapshot(store)
+        assert seq == 10
+
+        engine.record("fav_add", email="1@email.com", product={"id": "p1"})
+        engine.record("fav_del", email="1@email.com", product_id="p1")
+        engine.record("fav_add", email="2@email.com", product={"id": "p2"})
+        engine.record("del", email="3@email.com")
+        engine.record("fav_batch", email="4@email.com", add=["p3", "p4"], remove=[])
+        engine.record("fav_batch", email="4@email.com", add=[], remove=["p3"])
+        engine.flush()
+
+        # Apenas o segmento posterior ao snapshot permanece
+        assert len(glob.glob(os.path.join(str(tmp_path), "journal-*.log"))) == 1
+
+        recovered = {}
+        assert PersistenceEngine(str(tmp_path)).recover(recovered) == 9
+        assert recovered["1@email.com"]["favorites"] == {}
+        assert recovered["2@email.com"]["favorites"] == {"p2": None}
+        assert "3@email.com" not in recovered
+        assert recovered["4@email.com"]["favorites"] == {"p4": None}
+
+    def test_truncated_journal_line(self, tmp_path):
+        """Testa se uma linha incompleta no fim do journal e ignorada"""
+        engine = PersistenceEngine(str(tmp_path))
+        engine.record("put", client=client_record("a@email.com"))
+        engine.flush()
+        with open(engine._file.name, "a") as f:
+            f.write('{"seq": 2, "op": "put", "cli')
+
+        recovered_engine = PersistenceEngine(str(tmp_path))
+        store = {}
+        assert recovered_engine.recover(store) == 1
+        assert recovered_engine.stats()["seq"] == 1
+
+    def test_repositories_write_journal(self, tmp_path, monkeypatch):
+        """Testa se as mutacoes dos repositorios sao registradas no journal"""
+        engine = PersistenceEngine(str(tmp_path))
+        monkeypatch.setattr(persistence, "engine", engine)
+
+        repository = ClientRepository()
+        repository.create(client_record("a@email.com"))
+        repository.update("a@email.com", {"email": "b@email.com"})
+        FavoriteRepository().add_favorite("b@email.com", "p1")
+        repository.create(client_record("c@email.com"))
+        repository.delete("c@email.com")
+        engine.stop()
+
+        store = {}
+        PersistenceEngine(str(tmp_path)).recover(store)
+        assert list(store) == ["b@email.com"]
+        assert store["b@email.com"]["favorites"] == {"p1": None}
+
+    def test_legacy_list_favorites(self, tmp_path):
+        """Testa se favoritos gravados no formato antigo sao convertidos na carga"""
+        engine = PersistenceEngine(str(tmp_path))
+        engine.record(
+            "put", client=client_record("a@email.com", [{"id": "p1"}, {"id": "p2"}])
+        )
+        engine.record("fav_del", email="a@email.com", product_id="p1")
+        engine.flush()
+
+        store = {}
+        PersistenceEngine(str(tmp_path)).recover(store)
+        assert store["a@email.com"]["favorites"] == {"p2": None}
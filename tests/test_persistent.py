@@ -0,0 +1,68 @@
+import random
+
+from apiluizalabs.utils.persistent import EMPTY, SMALL, PersistentOrderedSet
+
+
+class CollidingKey(str):
+    # Hash constante: forca chaves com o mesmo hash completo na HAMT
+    def __hash__(self):
+        return 42
+
+
+class TestPersistentOrderedSet:
+    def test_operacoes_iguais_ao_dict(self):
+        """Testa adicoes/remocoes aleatorias contra um dict ordenado"""
+        rng = random.Random(7)
+        favorites, expected = EMPTY, {}
+        for _ in range(5000):
+            key = f"prod-{rng.randrange(2000):06}"
+            if rng.random() < 0.6:
+                favorites = favorites.add(key)
+                expected.setdefault(key, None)
+            else:
+                favorites = favorites.discard(key)
+                expected.pop(key, None)
+        assert list(favorites) == list(expected)
+        assert favorites == expected
+        assert len(favorites) == len(expected)
+        assert all(key in favorites for key in expected)
+        assert "inexistente" not in favorites
+
+    def test_versoes_anteriores_inalteradas(self):
+        """Testa se add/discard nao alteram o conjunto original"""
+        keys = [f"p{i}" for i in range(100)]
+        original = PersistentOrderedSet.from_iterable(keys)
+        changed = original.add("novo").discard("p0").discard("p50")
+        assert list(original) == keys
+        assert list(changed) == keys[1:50] + keys[51:] + ["novo"]
+        assert original.add("p1") is original
+        assert original.discard("ausente") is original
+
+    def test_pagina(self):
+        """Testa a pagina por posicao, com e sem posicoes removidas"""
+        keys = [f"p{i}" for i in range(2000)]
+        favorites = PersistentOrderedSet.from_iterable(keys)
+        assert favorites.page(1030, 5) == keys[1030:1035]
+        assert favorites.page(1998, 10) == keys[1998:]
+        assert favorites.page(5000, 10) == []
+        favorites = favorites.discard("p0")
+        assert favorites.page(1030, 5) == keys[1031:1036]
+
+    def test_conjunto_pequeno(self):
+        """Testa a transicao entre tupla (ate SMALL) e trie"""
+        keys = [f"p{i}" for i in range(SMALL + 1)]
+        favorites = EMPTY
+        for key in keys:
+            favorites = favorites.add(key)
+        for key in keys[:-1]:
+            favorites = favorites.discard(key)
+        assert list(favorites) == keys[-1:]
+
+    def test_colisao_de_hash(self):
+        """Testa chaves diferentes com o mesmo hash"""
+        keys = [CollidingKey(f"k{i}") for i in range(20)]
+        favorites = PersistentOrderedSet.from_iterable(keys)
+        assert all(key in favorites for key in keys)
+        favorites = favorites.discard(keys[3]).add(CollidingKey("novo"))
+        assert list(favorites) == keys[:3] + keys[4:] + ["novo"]
+        assert keys[3] not in favorites
@@ -0,0 +1,180 @@
+import threading
+import time
+
+import pytest
+
+from apiluizalabs.repositories.product_repository import ProductsUnavailable
+from apiluizalabs.services.client_service import ClientService
+from apiluizalabs.services.product_service import (
+    ProductService,
+    product_cache,
+    product_refresher,
+)
+from apiluizalabs.utils.background import BackgroundRefresher
+from apiluizalabs.utils.cache import LRUCacheTTL, ProductCache
+
+
+def api_service(monkeypatch, products):
+    """Cria um ProductService em modo api contando as chamadas ao upstream"""
+    monkeypatch.setenv("PRODUCTS_SOURCE", "api")
+    monkeypatch.setenv("PRODUCTS_API_URL", "http://exemplo.com/api")
+    service = ProductService()
+    calls = []
+
+    def fake_get_by_id(product_id):
+        calls.append(product_id)
+        product = products.get(product_id)
+        return dict(product) if product else None
+
+    monkeypatch.setattr(service.repository, "get_by_id", fake_get_by_id)
+    return service, calls
+
+
+class TestProductCache:
+    def test_lru_cache_ttl_per_item(self):
+        """Testa TTL por item e contadores de hit/miss"""
+        cache = LRUCacheTTL(capacity=10, ttl=60)
+        cache.put("a", 1)
+        cache.put("b", 2, ttl=0.05)
+        assert cache.get("a") == 1
+        time.sleep(0.1)
+        assert cache.get("b") is None
+        assert cache.get("c") is None
+        assert cache.hits == 1
+        assert cache.misses == 2
+
+    def test_negative_cache(self):
+        """Testa armazenamento de produto inexistente com TTL proprio"""
+        cache = ProductCache(capacity=10, ttl=60, negative_ttl=0.05)
+        cache.put("nao-existe", None)
+        assert cache.get("nao-existe") == (True, None)
+        time.sleep(0.1)
+        assert cache.get("nao-existe") == (False, None)
+
+    def test_get_and_exists_share_upstream_call(self, monkeypatch):
+        """Testa se exists e get do mesmo produto geram uma unica chamada"""
+        service, calls = api_service(monkeypatch, {"p1": {"id": "p1"}})
+        assert service.product_exists("p1") is True
+        assert service.get_product("p1") == {"id": "p1"}
+        assert ProductService().get_product("p1") == {"id": "p1"}
+        assert calls == ["p1"]
+        assert product_cache.stats()["hits"] >= 2
+
+    def test_missing_product_is_cached(self, monkeypatch):
+        """Testa se IDs inexistentes repetidos nao voltam ao upstream"""
+        service, calls = api_service(monkeypatch, {})
+        assert service.product_exists("nao-existe") is False
+        assert service.get_product("nao-existe") is None
+        assert calls == ["nao-existe"]
+
+    def test_upstream_error_is_not_cached(self, monkeypatch):
+        """Testa se erros do upstream nao sao armazenados como inexistente"""
+        service, calls = api_service(monkeypatch, {})
+
+        def failing_get_by_id(product_id):
+            calls.append(product_id)
+            raise Exception("Erro de conexão")
+
+        monkeypatch.setattr(service.repository, "get_by_id", failing_get_by_id)
+        for _ in range(2):
+            with pytest.raises(ProductsUnavailable):
+                service.get_product("p1")
+        assert calls == ["p1", "p1"]
+
+    def test_invalidate_product(self, monkeypatch):
+        """Testa invalidacao explicita de um produto"""
+        service, calls = api_service(monkeypatch, {"p1": {"id": "p1"}})
+        service.get_product("p1")
+        service.invalidate_product("p1")
+        service.get_product("p1")
+        assert calls == ["p1", "p1"]
+
+    def test_create_client_single_lookup_per_product(self, monkeypatch):
+        """Testa se criar cliente com favoritos consulta cada produto uma vez"""
+        client_service = ClientService()
+        service, calls = api_service(monkeypatch, {"p1": {"id": "p1"}})
+        client_service.product_service = service
+        client_service.create_client(
+            {"name": "Cache", "email": "cache@email.com", "favorites": ["p1"]}
+        )
+        assert calls == ["p1"]
+
+    def test_get_products_keeps_order(self, monkeypatch):
+        """Testa busca em lote: ordem preservada e apenas IDs fora do cache"""
+        products = {"p1": {"id": "p1"}, "p2": {"id": "p2"}}
+        service, calls = api_service(monkeypatch, products)
+        service.get_product("p1")
+        result = service.get_products(["p2", "p1", "nao-existe", "p2"])
+        assert result == [{"id": "p2"}, {"id": "p1"}, None, {"id": "p2"}]
+        assert sorted(calls) == ["nao-existe", "p1", "p2"]
+
+    def test_stale_while_revalidate(self, monkeypatch):
+        """Testa retorno imediato do valor stale com atualizacao em segundo plano"""
+        products = {"p1": {"id": "p1", "price": 10.0}}
+        service, calls = api_service(monkeypatch, products)
+        service.cache = ProductCache(capacity=10, ttl=0.05, negative_ttl=1, stale_ttl=5)
+
+        assert service.get_product("p1")["price"] == 10.0
+        products["p1"] = {"id": "p1", "price": 12.0}
+        time.sleep(0.1)
+
+        # Valor stale retornado sem esperar o upstream
+        assert service.get_product("p1")["price"] == 10.0
+        deadline = time.time() + 2
+        while product_refresher.stats()["pending"] and time.time() < deadline:
+            time.sleep(0.01)
+
+        assert calls == ["p1", "p1"]
+        assert service.get_product("p1")["price"] == 12.0
+        assert service.cache.stats()["stale_hits"] == 1
+
+    def test_hard_ttl_blocks_on_fetch(self, monkeypatch):
+        """Testa se apos o TTL hard a requisicao busca o valor novo no upstream"""
+        products = {"p1": {"id": "p1", "price": 10.0}}
+        service, calls = api_service(monkeypatch, products)
+        service.cache = ProductCache(
+            capacity=10, ttl=0.05, negative_ttl=1, stale_ttl=0.05
+        )
+
+        service.get_product("p1")
+        products["p1"] = {"id": "p1", "price": 12.0}
+        time.sleep(0.15)
+
+        assert service.get_product("p1")["price"] == 12.0
+        assert calls == ["p1", "p1"]
+
+    def test_generation_follows_content(self, monkeypatch):
+        """Testa se a geracao muda apenas quando o conteudo de um produto muda"""
+        products = {"g1": {"id": "g1", "price": 10.0}}
+        service, calls = api_service(monkeypatch, products)
+        service.cache = ProductCache(capacity=10, ttl=60, negative_ttl=1)
+        service.get_product("g1")
+        generation = service.generation()
+
+        # Nova busca (ex: TTL expirado) com o mesmo conteudo
+        service.cache.cache.invalidate("g1")
+        service.get_product("g1")
+        assert service.generation() == generation
+
+        products["g1"] = {"id": "g1", "price": 12.0}
+        service.cache.cache.invalidate("g1")
+        assert service.get_product("g1")["price"] == 12.0
+        assert service.generation() > generation
+        assert calls == ["g1", "g1", "g1"]
+
+        generation = service.generation()
+        service.invalidate_product("g1")
+        assert service.generation() > generation
+
+    def test_background_refresher_is_bounded(self):
+        """Testa deduplicacao por chave e descarte com a fila cheia"""
+        refresher = BackgroundRefresher(max_workers=1, max_pending=1)
+        release = threading.Event()
+        try:
+            assert refresher.submit("p1", release.wait) is True
+            assert refresher.submit("p1", release.wait) is False
+            assert refresher.submit("p2", release.wait) is False
+            assert refresher.stats()["dropped"] == 1
+        finally:
+            release.set()
+            refresher.shutdown(wait=True)
@@ -1,5 +1,8 @@
 from unittest.mock import patch
 
+import pytest
+
+from apiluizalabs.repositories.product_repository import ProductsUnavailable
 from apiluizalabs.services.product_service import ProductService
 
 
@@ -34,38 +37,38 @@ class TestProductService:
         assert service.product_exists(produto_id) is True
         assert service.product_exists("produto-inexistente") is False
 
-    @patch("httpx.get")
+    @patch("apiluizalabs.repositories.product_repository.get_http_client")
     def test_api_service_get_all_error(self, mock_get, monkeypatch):
         """Testa erro na obtenção de produtos via API"""
         monkeypatch.setenv("PRODUCTS_SOURCE", "api")
         monkeypatch.setenv("PRODUCTS_API_URL", "http://exemplo.com/api")
-        mock_get.side_effect = Exception("Erro de conexão")
+        mock_get.return_value.get.side_effect = Exception("Erro de conexão")
         service = ProductService()
 
         # Verificar se o erro é tratado
         produtos = service.get_all_products()
         assert produtos is None
 
-    @patch("httpx.get")
+    @patch("apiluizalabs.repositories.product_repository.get_http_client")
     def test_api_service_get_error(self, mock_get, monkeypatch):
         """Testa erro na obtenção de produto específico via API"""
         monkeypatch.setenv("PRODUCTS_SOURCE", "api")
         monkeypatch.setenv("PRODUCTS_API_URL", "http://exemplo.com/api")
-        mock_get.side_effect = Exception("Erro de conexão")
+        mock_get.return_value.get.side_effect = Exception("Erro de conexão")
         service = ProductService()
 
-        # Verificar se o erro é tratado
-        produto = service.get_product("produto-1")
-        assert produto is None
+        # Erro da API nao e reportado como produto inexistente
+        with pytest.raises(ProductsUnavailable):
+            service.get_product("produto-1")
 
-    @patch("httpx.get")
+    @patch("apiluizalabs.repositories.product_repository.get_http_client")
     def test_api_service_exists_error(self, mock_get, monkeypatch):
         """Testa erro na verificação de existência de produto via API"""
         monkeypatch.setenv("PRODUCTS_SOURCE", "api")
         monkeypatch.setenv("PRODUCTS_API_URL", "http://exemplo.com/api")
-        mock_get.side_effect = Exception("Erro de conexão")
+        mock_get.return_value.get.side_effect = Exception("Erro de conexão")
         service = ProductService()
 
-        # Verificar se o erro é tratado
-        result = service.product_exists("produto-1")
-        assert result is False
+        # Erro da API nao e reportado como produto inexistente
+        with pytest.raises(ProductsUnavailable):
+            service.product_exists("produto-1")
@@ -43,57 +43,59 @@ class TestProducts:
             else:
                 assert service.repository.source == "mock"
 
-    @patch("apiluizalabs.repositories.product_repository.httpx.get")
-    def test_product_api_service_get_all_success(self, mock_httpx_get):
+    @patch("apiluizalabs.repositories.product_repository.get_http_client")
+    def test_product_api_service_get_all_success(self, mock_get_http_client):
         mock_response = MagicMock()
         mock_response.status_code = 200
         mock_response.json.return_value = [{"id": "api-1"}, {"id": "api-2"}]
+        mock_httpx_get = mock_get_http_client.return_value.get
         mock_httpx_get.return_value = mock_response
 
         repository = ProductRepository(
             source="api", api_url="http://fakeapi.com/products"
         )
         result = repository.get_all()
-        mock_httpx_get.assert_called_once_with(
-            "http://fakeapi.com/products",
-            headers={"Authorization": f"Bearer {os.getenv('PRODUCTS_API_AUTHORIZATION')}"}
-        )
+        mock_httpx_get.assert_called_once_with("http://fakeapi.com/products")
         assert len(result) == 2
         assert result[0]["id"] == "api-1"
 
-    @patch("apiluizalabs.repositories.product_repository.httpx.get")
-    def test_product_api_service_get_all_error(self, mock_httpx_get):
+    @patch("apiluizalabs.repositories.product_repository.get_http_client")
+    def test_product_api_service_get_all_error(self, mock_get_http_client):
         mock_response = MagicMock()
         mock_response.status_code = 500
+        mock_httpx_get = mock_get_http_client.return_value.get
         mock_httpx_get.return_value = mock_response
 
         repository = ProductRepository(
             source="api", api_url="http://fakeapi.com/products"
         )
         result = repository.get_all()
-        mock_httpx_get.assert_called_once_with(
-            "http://fakeapi.com/products",
-            headers={"Authorization": f"Bearer {os.getenv('PRODUCTS_API_AUTHORIZATION')}"}
-        )
+        mock_httpx_get.assert_called_once_with("http://fakeapi.com/products")
         assert result == []
 
-    @patch("apiluizalabs.repositories.product_repository.httpx.get")
-    def test_product_api_service_get_one_success(self, mock_httpx_get):
+    @patch("apiluizalabs.repositories.product_repository.get_http_client")
+    def test_product_api_service_get_one_success(self, mock_get_http_client):
         mock_response = MagicMock()
         mock_response.status_code = 200
         mock_response.json.return_value = {"id": "api-1", "name": "API Product 1"}
+        mock_httpx_get = mock_get_http_client.return_value.get
         mock_httpx_get.return_value = mock_response
 
         repository = ProductRepository(
             source="api", api_url="http://fakeapi.com/products"
         )
         result = repository.get_by_id("api-1")
-        mock_httpx_get.assert_called_once_with(
-            "http://fakeapi.com/products/api-1",
-            headers={"Authorization": f"Bearer {os.getenv('PRODUCTS_API_AUTHORIZATION')}"}
-        )
+        mock_httpx_get.assert_called_once_with("http://fakeapi.com/products/api-1")
         assert result == {"id": "api-1", "name": "API Product 1"}
 
+    def test_product_api_get_many_not_supported(self):
+        """No modo api a busca em lote e feita pelo ProductService"""
+        repository = ProductRepository(
+            source="api", api_url="http://fakeapi.com/products"
+        )
+        with pytest.raises(ValueError):
+            repository.get_many(["api-1"])
+
 
 # Também precisamos importar a função get_product_service
 from apiluizalabs.services.product_service import ProductService
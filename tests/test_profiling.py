@@ -0,0 +1,133 @@
+import threading
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from apiluizalabs.routes import debug
+from apiluizalabs.utils.concurrency import bounded_map
+from apiluizalabs.utils.profiling import (
+    ProfileStore,
+    ProfilingMiddleware,
+    collapsed,
+    profile_store,
+)
+
+
+def busy_work(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def other_work(seconds):
+    busy_work(seconds)
+
+
+def pooled_work(item):
+    busy_work(0.01)
+    return item
+
+
+def profiled_app(store, **options):
+    app = FastAPI()
+
+    @app.get("/lento")
+    def slow():
+        busy_work(0.05)
+        return {"ok": True}
+
+    @app.get("/outro")
+    def other():
+        other_work(0.3)
+        return {"ok": True}
+
+    @app.get("/pool")
+    def pool():
+        return bounded_map(pooled_work, range(8), 4)
+
+    app.add_middleware(ProfilingMiddleware, store=store, **options)
+    return TestClient(app)
+
+
+class TestProfiling:
+    def test_profile_by_header(self):
+        """Testa o profiling de requisicoes com o header permitido"""
+        store = ProfileStore()
+        client = profiled_app(store, tokens=["segredo"])
+
+        assert "x-profile-id" not in client.get("/lento").headers
+        assert (
+            "x-profile-id"
+            not in client.get("/lento", headers={"X-Profile": "outro"}).headers
+        )
+
+        resp = client.get("/lento", headers={"X-Profile": "segredo"})
+        profile = store.get(resp.headers["x-profile-id"])
+        assert profile["status"] == 200
+        assert profile["samples"] > 0
+        # A pilha da thread do threadpool chega ate a funcao do endpoint
+        assert any("busy_work" in stack for stack in profile["stacks"])
+
+    def test_profile_by_sample_rate(self, tmp_path):
+        """Testa o profiling por amostragem com gravacao em arquivo"""
+        store = ProfileStore(directory=str(tmp_path))
+        client = profiled_app(store, sample_rate=1.0)
+
+        profile_id = client.get("/lento").headers["x-profile-id"]
+        content = (tmp_path / f"{profile_id}.collapsed").read_text()
+        assert "busy_work" in content
+        assert [p["id"] for p in store.list()] == [profile_id]
+
+    def test_profile_only_own_request(self):
+        """Testa se requisicoes simultaneas nao entram no perfil"""
+        store = ProfileStore()
+        client = profiled_app(store, tokens=["segredo"])
+        other = threading.Thread(target=client.get, args=("/outro",))
+        other.start()
+        time.sleep(0.05)
+        try:
+            resp = client.get("/lento", headers={"X-Profile": "segredo"})
+        finally:
+            other.join()
+
+        stacks = store.get(resp.headers["x-profile-id"])["stacks"]
+        assert any("busy_work" in stack for stack in stacks)
+        assert not any("other_work" in stack for stack in stacks)
+
+    def test_profile_includes_pool_threads(self):
+        """Testa se as execucoes do bounded_map entram no perfil da requisicao"""
+        store = ProfileStore()
+        client = profiled_app(store, tokens=["segredo"])
+
+        resp = client.get("/pool", headers={"X-Profile": "segredo"})
+        assert resp.json() == list(range(8))
+        stacks = store.get(resp.headers["x-profile-id"])["stacks"]
+        assert any(
+            "pooled_work" in stack and "bounded-map" in stack for stack in stacks
+        )
+
+    def test_collapsed_format(self):
+        """Testa o formato collapsed (pilha seguida da contagem)"""
+        text = collapsed({"main;a;b": 2, "main;a": 5})
+        assert text == "main;a 5\nmain;a;b 2\n"
+
+    def test_debug_profiles_route(self, auth):
+        """Testa a consulta dos perfis pela rota de debug"""
+        profile_store.clear()
+        profile_id = profile_store.add(
+            {"method": "GET", "path": "/x", "stacks": {"main;f": 3}}
+        )
+        app = FastAPI()
+        app.include_router(debug.router)
+        client = TestClient(app)
+
+        assert client.get("/debug/profiles", headers=auth).json()[0]["id"] == (
+            profile_id
+        )
+        resp = client.get(f"/debug/profiles/{profile_id}", headers=auth)
+        assert resp.text == "main;f 3\n"
+        assert client.get("/debug/profiles/nao-existe", headers=auth).status_code == (
+            404
+        )
+        profile_store.clear()
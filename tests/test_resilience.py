@@ -0,0 +1,213 @@
+import json
+import time
+
+import pytest
+
+from apiluizalabs.models import favorites_from_ids, mem_clients
+from apiluizalabs.repositories import product_repository
+from apiluizalabs.repositories.product_repository import (
+    ProductRepository,
+    ProductsUnavailable,
+    breakers,
+)
+from apiluizalabs.routes import clients, favorites
+from apiluizalabs.services.product_service import ProductService, product_cache
+from apiluizalabs.utils.http_client import close_http_client, init_http_client
+from apiluizalabs.utils.resilience import CircuitBreaker, RetryBudget, backoff_delay
+from benchmarks.stub_product_api import StubProductAPI
+
+API_URL = "http://stub.local/api/product"
+
+
+def fail_for(service, monkeypatch, *failing):
+    """Servico com cache (modo api) em que os IDs `failing` estao indisponiveis"""
+
+    def get_product(product_id):
+        if product_id in failing:
+            raise ProductsUnavailable(retry_after=1)
+        return {
+            "id": product_id,
+            "title": f"Produto {product_id}",
+            "price": 1.0,
+            "image": f"{product_id}.jpg",
+            "brand": "Marca",
+        }
+
+    monkeypatch.setattr(service, "cache", product_cache)
+    monkeypatch.setattr(service, "get_product", get_product)
+
+
+@pytest.fixture
+def stub():
+    """Stub da API de produtos no cliente HTTP compartilhado"""
+    stub = StubProductAPI(products=10)
+    init_http_client(transport=stub.transport())
+    yield stub
+    close_http_client()
+
+
+class TestCircuitBreaker:
+    def test_opens_on_failure_rate(self):
+        """Testa abertura do circuito pela taxa de falhas na janela"""
+        breaker = CircuitBreaker("teste", failure_rate=0.5, min_requests=4)
+        for success in (True, False, True):
+            assert breaker.allow()
+            breaker.record(success)
+        assert breaker.state == "closed"
+
+        breaker.record(False)
+        assert breaker.state == "open"
+        assert not breaker.allow()
+        assert breaker.stats()["rejected"] == 1
+        assert 0 < breaker.retry_after() <= breaker.open_timeout
+
+    def test_half_open_probe(self):
+        """Testa a chamada de teste (meio aberto) que fecha ou reabre o circuito"""
+        breaker = CircuitBreaker("teste", min_requests=1, open_timeout=0.05)
+        breaker.record(False)
+        assert breaker.state == "open"
+        time.sleep(0.06)
+
+        assert breaker.state == "half_open"
+        assert breaker.allow()
+        assert not breaker.allow()  # apenas uma chamada de teste
+        breaker.record(False)
+        assert breaker.state == "open"
+
+        time.sleep(0.06)
+        assert breaker.allow()
+        breaker.record(True)
+        assert breaker.state == "closed"
+
+
+class TestRetryBudget:
+    def test_budget_limits_retries(self):
+        """Testa se as novas tentativas ficam limitadas pelo budget"""
+        budget = RetryBudget(ratio=0.5, min_per_second=0, max_tokens=2)
+        assert budget.withdraw() and budget.withdraw()
+        assert not budget.withdraw()
+        budget.deposit()
+        budget.deposit()
+        assert budget.withdraw()
+        assert budget.stats()["exhausted"] == 1
+
+    def test_backoff_jitter(self):
+        """Testa o backoff exponencial com jitter e limite"""
+        for attempt in range(6):
+            assert 0 <= backoff_delay(attempt, 0.1, 1.0) <= min(1.0, 0.1 * 2**attempt)
+
+
+class TestUpstreamResilience:
+    def test_transient_error_is_retried(self, stub, monkeypatch):
+        """Testa nova tentativa apos falha temporaria do upstream"""
+        results = iter([(0.0, "error"), (0.0, None)])
+        monkeypatch.setattr(stub, "decide", lambda: next(results))
+        repository = ProductRepository(source="api", api_url=API_URL)
+        assert repository.get_by_id(stub.products[0]["id"]) == stub.products[0]
+
+    def test_open_circuit_fails_fast(self, stub, monkeypatch):
+        """Testa se o circuito aberto evita chamadas ao upstream"""
+        monkeypatch.setattr(product_repository, "RETRIES", 0)
+        stub.error_rate = 1.0
+        repository = ProductRepository(source="api", api_url=API_URL)
+        product_id = stub.products[0]["id"]
+        for _ in range(breakers["product"].min_requests):
+            with pytest.raises(ProductsUnavailable):
+                repository.get_by_id(product_id)
+        assert breakers["product"].state == "open"
+
+        requests = stub.stats["requests"]
+        with pytest.raises(ProductsUnavailable) as error:
+            repository.get_by_id(product_id)
+        assert error.value.retry_after > 0
+        assert stub.stats["requests"] == requests
+
+    def test_last_known_good_fallback(self, stub, monkeypatch):
+        """Testa o retorno da ultima versao conhecida com a API fora do ar"""
+        monkeypatch.setenv("PRODUCTS_SOURCE", "api")
+        monkeypatch.setenv("PRODUCTS_API_URL", API_URL)
+        service = ProductService()
+        product = stub.products[0]
+        assert service.get_product(product["id"]) == product
+
+        # Item expirado do cache e API indisponivel
+        service.cache.clear()
+        stub.error_rate = 1.0
+        assert service.get_product(product["id"]) == product
+        with pytest.raises(ProductsUnavailable):
+            service.get_product(stub.products[1]["id"])
+
+    def test_unavailable_returns_503(self, client, auth, monkeypatch):
+        """Testa 503 (e nao 'produto nao encontrado') com a API indisponivel"""
+        mem_clients.publish("a@email.com", {"name": "A", "email": "a@email.com"})
+
+        def unavailable(product_id):
+            raise ProductsUnavailable(retry_after=2.5)
+
+        monkeypatch.setattr(
+            favorites.favorite_service.product_service, "get_product", unavailable
+        )
+        resp = client.post("/favorites/a@email.com", json={"id": "p1"}, headers=auth)
+        assert resp.status_code == 503
+        assert resp.headers["retry-after"] == "3"
+
+    def test_get_products_parcial(self, stub, monkeypatch):
+        """Testa a falha de um ID sem derrubar a consulta dos demais"""
+        monkeypatch.setenv("PRODUCTS_SOURCE", "api")
+        monkeypatch.setenv("PRODUCTS_API_URL", API_URL)
+        service = ProductService()
+        ok, failing = stub.products[0], stub.products[1]
+        get_by_id = service.repository.get_by_id
+
+        def flaky(product_id):
+            if product_id == failing["id"]:
+                raise ProductsUnavailable(retry_after=1)
+            return get_by_id(product_id)
+
+        monkeypatch.setattr(service.repository, "get_by_id", flaky)
+        ids = [ok["id"], failing["id"]]
+        products, unavailable = service.lookup_products(ids)
+        assert products == [ok, None]
+        assert list(unavailable) == [failing["id"]]
+        assert service.get_products(ids, partial=True) == [ok, None]
+        # Validacao (sem partial) e leitura com todos indisponiveis: 503
+        with pytest.raises(ProductsUnavailable):
+            service.get_products(ids)
+        with pytest.raises(ProductsUnavailable):
+            service.get_products([failing["id"]], partial=True)
+
+    def test_favoritos_com_um_indisponivel(self, client, auth, monkeypatch):
+        """Testa a listagem de favoritos com um produto indisponivel"""
+        mem_clients.publish(
+            "a@email.com",
+            {
+                "name": "A",
+                "email": "a@email.com",
+                "favorites": favorites_from_ids(["p1", "p2", "p3"]),
+            },
+        )
+        service = favorites.favorite_service.product_service
+        fail_for(service, monkeypatch, "p2")
+        resp = client.get("/favorites/a@email.com", headers=auth)
+        assert resp.status_code == 200
+        assert [p["id"] for p in resp.json()["favorites"]] == ["p1", "p3"]
+
+        fail_for(service, monkeypatch, "p1", "p2", "p3")
+        assert client.get("/favorites/a@email.com", headers=auth).status_code == 503
+
+    def test_export_marca_indisponiveis(self, client, auth, monkeypatch):
+        """Testa a exportacao com a API fora do ar (sem interromper o stream)"""
+        for email, ids in (("a@email.com", ["p1", "p2"]), ("b@email.com", ["p2"])):
+            mem_clients.publish(
+                email,
+                {"name": "A", "email": email, "favorites": favorites_from_ids(ids)},
+            )
+        fail_for(clients.client_service.product_service, monkeypatch, "p1", "p2")
+        resp = client.get("/clients/export?hydrate=true", headers=auth)
+        assert resp.status_code == 200
+        lines = [json.loads(line) for line in resp.text.splitlines()]
+        assert [c["email"] for c in lines] == ["a@email.com", "b@email.com"]
+        assert lines[0]["favorites"] == [
+            {"id": "p1", "unavailable": True},
+            {"id": "p2", "unavailable": True},
+        ]
@@ -0,0 +1,134 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from apiluizalabs.services.product_service import ProductService, product_flight
+from apiluizalabs.utils.singleflight import SingleFlight
+
+
+class TestSingleFlight:
+    def test_concurrent_threads_share_call(self):
+        """Testa se threads concorrentes com a mesma chave executam uma vez"""
+        flight = SingleFlight()
+        calls = []
+
+        def fetch(key):
+            calls.append(key)
+            time.sleep(0.1)
+            return {"id": key}
+
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            results = list(
+                executor.map(lambda _: flight.do("p1", fetch, "p1"), range(10))
+            )
+
+        assert calls == ["p1"]
+        assert all(result == {"id": "p1"} for result in results)
+        assert flight.calls == 1
+        assert flight.shared == 9
+
+    def test_error_is_shared(self):
+        """Testa se a excecao do lider e repassada aos demais chamadores"""
+        flight = SingleFlight()
+        started = threading.Event()
+
+        def fetch():
+            started.set()
+            time.sleep(0.1)
+            raise ValueError("upstream fora do ar")
+
+        errors = []
+
+        def call():
+            try:
+                flight.do("p1", fetch)
+            except ValueError as e:
+                errors.append(str(e))
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait()
+        follower = threading.Thread(target=call)
+        follower.start()
+        leader.join()
+        follower.join()
+
+        assert errors == ["upstream fora do ar", "upstream fora do ar"]
+        assert flight.calls == 1
+
+    def test_key_released_after_call(self):
+        """Testa se uma nova chamada apos a conclusao executa novamente"""
+        flight = SingleFlight()
+        assert flight.do("p1", lambda: 1) == 1
+        assert flight.do("p1", lambda: 2) == 2
+        assert flight.stats() == {"calls": 2, "shared": 0, "in_flight": 0}
+
+    def test_async_callers_share_call(self):
+        """Testa coalescencia a partir de codigo async (funcao sync e coroutine)"""
+        flight = SingleFlight()
+        calls = []
+
+        def fetch_sync():
+            calls.append("sync")
+            time.sleep(0.1)
+            return "sync"
+
+        async def fetch_async():
+            calls.append("async")
+            await asyncio.sleep(0.1)
+            return "async"
+
+        async def run():
+            sync_results = await asyncio.gather(
+                *[flight.do_async("a", fetch_sync) for _ in range(5)]
+            )
+            async_results = await asyncio.gather(
+                *[flight.do_async("b", fetch_async) for _ in range(5)]
+            )
+            return sync_results, async_results
+
+        sync_results, async_results = asyncio.run(run())
+        assert sync_results == ["sync"] * 5
+        assert async_results == ["async"] * 5
+        assert calls == ["sync", "async"]
+        assert flight.shared == 8
+
+    def test_product_service_coalesces_upstream(self, monkeypatch):
+        """Testa se buscas simultaneas do mesmo produto geram uma unica chamada"""
+        monkeypatch.setenv("PRODUCTS_SOURCE", "api")
+        monkeypatch.setenv("PRODUCTS_API_URL", "http://exemplo.com/api")
+        service = ProductService()
+        calls = []
+
+        def fake_get_by_id(product_id):
+            calls.append(product_id)
+            time.sleep(0.1)
+            return {"id": product_id}
+
+        monkeypatch.setattr(service.repository, "get_by_id", fake_get_by_id)
+        concurrent_callers = 20
+        shared_before = product_flight.shared
+
+        with ThreadPoolExecutor(max_workers=concurrent_callers) as executor:
+            results = list(
+                executor.map(
+                    lambda _: service.get_product("sku-1"), range(concurrent_callers)
+                )
+            )
+
+        assert calls == ["sku-1"]
+        assert all(result == {"id": "sku-1"} for result in results)
+        # Quem chegou apos a conclusao foi atendido pelo cache
+        assert product_flight.shared - shared_before > 0
+
+
+class TestSingleFlightMetrics:
+    def test_shared_exportado(self):
+        """Testa se as chamadas economizadas aparecem no /metrics"""
+        from apiluizalabs.utils.metrics import registry
+
+        shared = product_flight.shared
+        text = registry.render()
+        assert f"products_singleflight_shared_total {shared}" in text
+        assert "products_singleflight_calls_total" in text
@@ -0,0 +1,194 @@
+import threading
+
+from apiluizalabs.models import mem_clients
+from apiluizalabs.repositories.client_repository import ClientRepository
+from apiluizalabs.repositories.favorite_repository import FavoriteRepository
+from apiluizalabs.utils.cache import LRUCacheTTL
+from apiluizalabs.utils.store import StripedStore
+
+
+def run_threads(target, total):
+    barrier = threading.Barrier(total)
+
+    def worker(i):
+        barrier.wait()
+        target(i)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(total)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+class TestStripedStore:
+    def test_locked_orders_stripes(self):
+        """Testa locks de duas chaves em ordens opostas sem deadlock"""
+        store = StripedStore(stripes=4)
+
+        def worker(i):
+            for _ in range(500):
+                keys = ("a", "b") if i % 2 else ("b", "a")
+                with store.locked(*keys):
+                    store[keys[0]] = store.get(keys[0], 0) + 1
+
+        run_threads(worker, 8)
+        assert store["a"] + store["b"] == 4000
+
+    def test_concurrent_create_same_email(self):
+        """Testa unicidade do email com criacoes simultaneas"""
+        repository = ClientRepository()
+        created = []
+
+        def worker(i):
+            client = repository.create({"name": f"C{i}", "email": "mesmo@email.com"})
+            if client is not None:
+                created.append(client)
+
+        run_threads(worker, 16)
+        assert len(created) == 1
+        assert mem_clients["mesmo@email.com"] is created[0]
+
+    def test_concurrent_email_changes(self):
+        """Testa trocas de email simultaneas p/ o mesmo destino"""
+        repository = ClientRepository()
+        for i in range(8):
+            repository.create({"name": f"C{i}", "email": f"c{i}@email.com"})
+
+        results = []
+        run_threads(
+            lambda i: results.append(
+                repository.update(f"c{i}@email.com", {"email": "alvo@email.com"})
+            ),
+            8,
+        )
+        assert sum(r is not None for r in results) == 1
+        assert len(mem_clients) == 8
+        assert mem_clients["alvo@email.com"]["email"] == "alvo@email.com"
+
+    def test_concurrent_favorites_no_lost_updates(self):
+        """Testa adicoes/remocoes simultaneas nos favoritos do mesmo cliente"""
+        ClientRepository().create({"name": "Fav", "email": "fav@email.com"})
+        repository = FavoriteRepository()
+
+        def worker(i):
+            for j in range(200):
+                repository.add_favorite("fav@email.com", f"p{i}-{j}")
+            repository.batch_update(
+                "fav@email.com", [f"lote{i}"], [f"p{i}-0"], {f"lote{i}"}
+            )
+
+        run_threads(worker, 8)
+        favorites = mem_clients["fav@email.com"]["favorites"]
+        assert len(favorites) == 8 * 200
+        assert all(f"lote{i}" in favorites for i in range(8))
+
+    def test_lru_cache_concurrent_access(self):
+        """Testa o LRU com leituras e escritas simultaneas acima da capacidade"""
+        cache = LRUCacheTTL(capacity=50, ttl=60)
+
+        def worker(i):
+            for j in range(2000):
+                cache.put(j % 100, j)
+                cache.get((j + i) % 100)
+                if j % 7 == 0:
+                    cache.invalidate(j % 100)
+
+        run_threads(worker, 8)
+        assert len(cache.data) <= 50
+
+
+class TestSnapshots:
+    def test_update_publishes_new_version(self):
+        """Testa se a atualizacao publica um registro novo sem alterar o antigo"""
+        repository = ClientRepository()
+        repository.create({"name": "Antes", "email": "v@email.com"})
+        before = repository.get_by_email("v@email.com")
+        version = repository.get_version("v@email.com")
+
+        repository.update("v@email.com", {"name": "Depois"})
+        assert before["name"] == "Antes"
+        assert repository.get_by_email("v@email.com")["name"] == "Depois"
+        assert repository.get_version("v@email.com") > version
+
+    def test_client_cache_pairs_version_and_record(self, monkeypatch):
+        """Testa se o cache nao associa um registro antigo a uma versao nova"""
+        from apiluizalabs.services.client_service import ClientService
+
+        service = ClientService()
+        repository = service.repository
+        repository.create({"name": "Antes", "email": "v@email.com"})
+        get_by_email = ClientRepository.get_by_email
+
+        def read_then_write(self, email):
+            # Escrita concorrente logo apos a leitura do registro
+            client = get_by_email(self, email)
+            mem_clients.publish(email, {**client, "name": "Depois"})
+            return client
+
+        monkeypatch.setattr(ClientRepository, "get_by_email", read_then_write)
+        service.get_client("v@email.com")
+        monkeypatch.undo()
+
+        version, client = service.cache.get("v@email.com")
+        assert (version, client) == mem_clients.current("v@email.com")
+        assert service.get_client("v@email.com")["name"] == client["name"]
+
+    def test_pinned_snapshot_isolated_from_writes(self):
+        """Testa se o snapshot fixado nao ve escritas posteriores"""
+        clients = ClientRepository()
+        favorites = FavoriteRepository()
+        clients.create({"name": "A", "email": "a@email.com"})
+        clients.create({"name": "B", "email": "b@email.com"})
+        favorites.add_favorite("a@email.com", "p1")
+
+        with mem_clients.pin() as snapshot:
+            favorites.add_favorite("a@email.com", "p2")
+            favorites.remove_favorite("a@email.com", "p1")
+            clients.update("b@email.com", {"name": "B2"})
+            clients.delete("b@email.com")
+            clients.create({"name": "C", "email": "c@email.com"})
+
+            assert list(snapshot.data["a@email.com"]["favorites"]) == ["p1"]
+            assert snapshot.data["b@email.com"]["name"] == "B"
+            assert "c@email.com" not in snapshot.data
+            assert mem_clients.version > snapshot.version
+
+        assert list(mem_clients["a@email.com"]["favorites"]) == ["p2"]
+        # Sem snapshot fixado o historico e descartado
+        assert mem_clients.stats()["history"] == 0
+
+    def test_published_favorites_never_mutated(self):
+        """Testa se alterar favoritos sem snapshot fixado nao altera o publicado"""
+        ClientRepository().create({"name": "A", "email": "a@email.com"})
+        repository = FavoriteRepository()
+        repository.add_favorite("a@email.com", "p1")
+        before = mem_clients["a@email.com"]
+
+        repository.add_favorite("a@email.com", "p2")
+        repository.remove_favorite("a@email.com", "p1")
+        assert list(before["favorites"]) == ["p1"]
+        assert list(mem_clients["a@email.com"]["favorites"]) == ["p2"]
+
+    def test_snapshot_includes_unversioned_records(self):
+        """Testa registros gravados sem publish (recuperacao) no snapshot"""
+        mem_clients["r@email.com"] = {"name": "R", "email": "r@email.com"}
+        with mem_clients.pin() as snapshot:
+            mem_clients.retire("r@email.com")
+            assert snapshot.data["r@email.com"]["name"] == "R"
+            assert list(snapshot.data) == ["r@email.com"]
+
+    def test_export_reads_pinned_snapshot(self):
+        """Testa se a exportacao em andamento nao ve alteracoes concorrentes"""
+        clients = ClientRepository()
+        for i in range(4):
+            clients.create({"name": "C", "email": f"e{i}@email.com"})
+
+        batches = clients.iter_batches(batch_size=2)
+        first = next(batches)
+        clients.update("e3@email.com", {"name": "Alterado"})
+        FavoriteRepository().add_favorite("e2@email.com", "p1")
+        rest = [c for batch in batches for c in batch]
+
+        assert len(first) == 2
+        assert rest[0]["favorites"] == [] and rest[1]["name"] == "C"
@@ -0,0 +1,91 @@
+import random
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from apiluizalabs.repositories.product_repository import (
+    ProductRepository,
+    ProductsUnavailable,
+)
+from apiluizalabs.utils.http_client import close_http_client, init_http_client
+from benchmarks.stub_product_api import StubProductAPI, parse_latency
+
+API_URL = "http://stub.local/api/product"
+
+
+@pytest.fixture
+def use_stub():
+    """Liga o cliente HTTP compartilhado a um stub da API de produtos"""
+
+    def install(**options):
+        stub = StubProductAPI(**options)
+        init_http_client(transport=stub.transport())
+        return stub, ProductRepository(source="api", api_url=API_URL)
+
+    yield install
+    close_http_client()
+
+
+class TestStubProductAPI:
+    def test_catalog_contract(self, use_stub):
+        """Testa paginas e detalhe do produto no contrato da API"""
+        stub, repository = use_stub(products=25, page_size=10)
+
+        assert len(repository.get_page(1)) == 10
+        assert len(repository.get_page(3)) == 5
+        assert repository.get_page(4) == []
+        product = stub.products[7]
+        assert repository.get_by_id(product["id"]) == product
+        assert repository.get_by_id("nao-existe") is None
+
+    def test_catalog_is_deterministic(self):
+        """Testa se a mesma seed gera o mesmo catalogo"""
+        assert (
+            StubProductAPI(products=5).products == StubProductAPI(products=5).products
+        )
+        assert StubProductAPI(seed=1).products != StubProductAPI(seed=2).products
+
+    def test_injected_errors(self, use_stub):
+        """Testa erros 5xx injetados"""
+        stub, repository = use_stub(products=5, error_rate=1.0)
+        with pytest.raises(ProductsUnavailable):
+            repository.get_by_id(stub.products[0]["id"])
+        with pytest.raises(ProductsUnavailable):
+            repository.get_page(1)
+        assert stub.stats["errors"] == stub.stats["requests"]
+
+    def test_injected_timeouts(self, use_stub):
+        """Testa timeouts injetados (excecao de timeout do httpx)"""
+        stub, repository = use_stub(products=5, timeout_rate=1.0, timeout_delay=0)
+        with pytest.raises(ProductsUnavailable):
+            repository.get_by_id(stub.products[0]["id"])
+        # Chamada original + novas tentativas (PRODUCTS_API_RETRIES)
+        assert stub.stats["timeouts"] == 3
+
+    def test_rate_limit(self):
+        """Testa respostas 429 acima do limite de requisicoes por segundo"""
+        stub = StubProductAPI(products=5, rate_limit=3)
+        client = httpx.Client(transport=stub.transport(), base_url=API_URL)
+        statuses = [client.get("/").status_code for _ in range(5)]
+        assert statuses == [200, 200, 200, 429, 429]
+
+    def test_latency_specs(self):
+        """Testa as distribuicoes de latencia"""
+        rng = random.Random(1)
+        assert parse_latency("0.05")(rng) == 0.05
+        assert 0.01 <= parse_latency("uniform:0.01:0.02")(rng) <= 0.02
+        assert parse_latency("lognormal:0.02:0.5")(rng) > 0
+        assert parse_latency("exp:0")(rng) == 0
+        with pytest.raises(ValueError):
+            parse_latency("gamma:1")
+
+    def test_asgi_server(self):
+        """Testa o stub servido como app ASGI (modo servidor)"""
+        stub = StubProductAPI(products=3, page_size=2)
+        client = TestClient(stub)
+        page = client.get("/api/product/?page=1").json()
+        assert page["meta"] == {"page_number": 1, "page_size": 2}
+        product_id = page["products"][0]["id"]
+        assert client.get(f"/api/product/{product_id}/").json()["id"] == product_id
+        assert client.get("/api/product/?page=3").status_code == 404